@@ -1,236 +1,1326 @@
 from fastapi import FastAPI, Request, Form, Response, Cookie
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import (
+    HTMLResponse,
+    RedirectResponse,
+    JSONResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 import os
 import json
+import asyncio
+import contextlib
+import functools
+import hashlib
+import logging
+import tempfile
+import time
 from pathlib import Path
 from app.utils.crypto import (
+    ballot_candidate,
     generate_keys,
+    generate_server_dh_pairs,
+    key_pair_matches,
     sign_blinded_message,
-    verify_signature,
+    sign_blinded_messages,
+    split_batch,
+    SignatureVerifier,
     hash_to_int,
 )
+from app.utils.admission import Admission, AdmissionRejected
+from app.utils.registry import ISSUED, NOT_AUTHORIZED, ALREADY_VOTED
+from app.utils.backends import create_backend
+from app.utils.broadcast import format_sse
+from app.utils.bulletin import leaf_hash
+from app.utils.config import ConfigError, load_config
+from app.utils.dh import DHKeyPool, DHSessionStore
+from app.utils.elections import (
+    Election,
+    ElectionNotFound,
+    ElectionShards,
+    election_path,
+    load_definition,
+)
+from app.utils.executor import CryptoExecutor, CryptoOverloaded, resolve_mode
+from app.utils.assets import AssetFiles, AssetManifest
+from app.utils.lifecycle import FAILED, Readiness, ReadinessGate
+from app.utils.logs import configure_logging
+from app.utils.pages import PrerenderedPage, page_response
+from app.utils.roster import Roster, load as load_roster, normalize_id
+from app.utils.wire import B64_MEDIA_TYPE, is_binary
+from app.utils.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    MetricsMiddleware,
+    MetricsRegistry,
+    add_crypto_time,
+)
+
+logger = logging.getLogger(__name__)
+
+# Importing this module has no side effects. startup() loads the configuration
+# when the server starts, warm_up() then sets up everything below in the
+# background while /readyz reports 503.
+config = None
+logging_runtime = None
+keys = None
+roster = None
+verifier = None
+crypto_executor = None
+state = None
+# The election configured by the environment, served at /, and the ones hosted
+# in ELECTIONS_DIR, served under /elections/{id}/
+default_election = None
+elections = None
+admissions = {}
+pages = {}
+readiness = Readiness()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+
+app = FastAPI(title="Blind Signature Voting Demo", lifespan=lifespan)
+
+# Static files are hashed and compressed during warm-up; templates link them by
+# fingerprinted name via asset_url(). Until then StaticFiles serves them as is.
+static_files = AssetFiles(None, fallback=StaticFiles(directory="app/static"))
+app.mount("/static", static_files, name="static")
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Shared keys of /dh-exchange and the precomputed (b, g^b) pairs behind them,
+# set up in warm_up_crypto
+dh_sessions = None
+dh_pool = None
+
+# Prometheus metrics, served at /metrics
+metrics = MetricsRegistry()
+request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ("method", "route", "status"),
+)
+request_crypto_duration = metrics.histogram(
+    "http_request_crypto_seconds",
+    "Part of the request latency spent waiting for signing or verification",
+    ("route",),
+)
+crypto_duration = metrics.histogram(
+    "crypto_operation_seconds",
+    "Time from submitting a crypto operation to its result, including queueing",
+    ("operation",),
+)
+signatures_issued = metrics.counter(
+    "signatures_issued_total", "Blind signatures issued"
+)
+sign_rejected = metrics.counter(
+    "sign_requests_rejected_total",
+    "Signing requests refused, by reason",
+    ("reason",),
+)
+ballots_accepted = metrics.counter("ballots_accepted_total", "Ballots counted")
+ballots_rejected = metrics.counter(
+    "ballots_rejected_total", "Ballots refused, by reason", ("reason",)
+)
+requests_shed = metrics.counter(
+    "requests_shed_total",
+    "Requests refused by admission control, by endpoint and reason",
+    ("endpoint", "reason"),
+)
+admission_in_flight = metrics.gauge(
+    "admission_in_flight", "Admitted requests being handled", ("endpoint",)
+)
+admission_queued = metrics.gauge(
+    "admission_queued", "Requests waiting for admission", ("endpoint",)
+)
+state_gauges = {
+    name: metrics.gauge(name, documentation)
+    for name, documentation in [
+        ("election_eligible_students", "Students on the roster"),
+        ("election_students_voted", "Students that were issued a signature"),
+        ("election_ballots_cast", "Ballots in the tally"),
+        ("sse_subscribers", "Connected /results/stream clients"),
+        ("verify_cache_entries", "Message hashes in the verification cache"),
+        ("verify_cache_hits", "Verifications answered from the cache"),
+        ("verify_cache_misses", "Verifications that needed an exponentiation"),
+        ("crypto_executor_pending", "Crypto operations submitted and not finished"),
+        ("crypto_executor_queued", "Crypto operations waiting for a worker"),
+        ("crypto_executor_peak_pending", "Highest number of pending operations"),
+        ("crypto_executor_rejected", "Crypto operations refused as overloaded"),
+        ("dh_sessions", "Stored DH sessions"),
+        ("dh_pool_ready", "Precomputed DH key pairs ready"),
+        ("dh_pool_hits", "DH exchanges served from the precomputed pool"),
+        ("dh_pool_misses", "DH exchanges that had to compute g^b themselves"),
+        ("elections_active", "Hosted elections loaded in memory"),
+        ("elections_loads", "Hosted elections loaded since the start"),
+        ("elections_evictions", "Hosted elections dropped from memory"),
+    ]
+}
+app.add_middleware(ReadinessGate, readiness=readiness)
+app.add_middleware(
+    MetricsMiddleware,
+    duration=request_duration,
+    crypto_duration=request_crypto_duration,
+    # Streams stay open for minutes and would only distort the histogram
+    exclude=("/results/stream",),
+)
+
+
+async def startup():
+    """Load the configuration and start the warm-up
+
+    An invalid configuration stops the server here, before it accepts a
+    single request.
+    """
+    global config, logging_runtime, elections
+    try:
+        config = load_config()
+    except ConfigError as e:
+        logging_runtime = configure_logging()
+        logger.error("config_error", extra={"fields": {"error": str(e)}})
+        logging_runtime.stop()
+        raise
+
+    # Structured logging, written by a background thread. LOG_LEVEL=DEBUG
+    # explains every signature and verification; LOG_DEBUG_SAMPLE keeps only
+    # every n-th of these records under load.
+    logging_runtime = configure_logging(
+        level=config.log_level,
+        log_format=config.log_format,
+        debug_sample=config.log_debug_sample,
+        queue_size=config.log_queue_size,
+    )
+    admissions.update(create_admissions(config))
+    elections = ElectionShards(
+        open_election,
+        max_active=config.elections_max_active,
+        idle_seconds=config.elections_idle_seconds,
+    )
+    readiness.start(
+        [
+            ("keys", warm_up_keys),
+            ("roster", warm_up_roster),
+            ("crypto", warm_up_crypto),
+            ("state", warm_up_state),
+            ("pages", warm_up_pages),
+        ]
+    )
+
+
+async def shutdown():
+    await readiness.stop()
+    if dh_pool is not None:
+        await dh_pool.stop()
+    if elections is not None:
+        await elections.close()
+    if state is not None:
+        await state.close()
+    if crypto_executor is not None:
+        crypto_executor.shutdown()
+    logger.info("shutdown", extra={"fields": {"log_dropped": logging_runtime.dropped}})
+    logging_runtime.stop()
+
+
+def create_exclusively(path, content):
+    """Write a file unless it exists, without readers ever seeing it half-written
+
+    The content goes to a temporary file that is then hard-linked to path,
+    which fails if another process created path first; its file is kept.
+
+    Returns:
+        bool: True if this call created the file
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(tmp)
+
+
+def load_keys(keys_file="data/keys.json"):
+    """Read the key pair, generating it on the first start
+
+    Key size: unset keeps the small demo group, otherwise e.g. 2048 or 3072
+    bits. KEY_GROUP picks the standard groups of RFC 7919 ("ffdhe") or RFC 3526
+    ("modp"); sizes without a standard group, or "generate", use a generated
+    safe prime cached in PARAMS_CACHE_DIR.
+    """
+    keys_file = Path(keys_file)
+    keys_file.parent.mkdir(parents=True, exist_ok=True)
+    if not keys_file.exists():
+        group = None
+        if config.key_bits:
+            # Only needed to create a key, not on every start
+            from app.utils.groups import load_group
+
+            group = load_group(
+                config.key_bits, config.key_group, config.params_cache_dir
+            )
+        pub_key, priv_key = generate_keys(group)
+        create_exclusively(
+            keys_file, json.dumps({"public_key": pub_key, "private_key": priv_key})
+        )
+
+    # Every worker uses the key in the file, whichever worker created it
+    with open(keys_file, "r") as f:
+        loaded = json.load(f)
+
+    bits = loaded["public_key"]["p"].bit_length()
+    if config.key_bits and bits != config.key_bits:
+        raise ValueError(
+            f"{keys_file} holds a {bits}-bit key but KEY_BITS is {config.key_bits}; "
+            "remove the file to generate a new key"
+        )
+    return loaded
+
+
+async def warm_up_keys():
+    global keys
+    keys = await asyncio.to_thread(load_keys)
+
+
+def read_roster():
+    """Eligible students from ROSTER_FILE (through its cache) or VOTING_STUDENTS"""
+    if not config.roster_file:
+        return Roster.from_ids(config.voting_students), False
+    return load_roster(
+        config.roster_file, config.roster_cache_dir, config.roster_column
+    )
+
+
+async def warm_up_roster():
+    global roster
+    roster, cached = await asyncio.to_thread(read_roster)
+    logger.info(
+        "roster",
+        extra={
+            "fields": {
+                "students": len(roster),
+                "source": config.roster_file or "VOTING_STUDENTS",
+                "cached": cached,
+            }
+        },
+    )
+
+
+async def warm_up_crypto():
+    """Set up verification and the executor, and start its workers"""
+    global verifier, crypto_executor, dh_sessions, dh_pool
+    # Ballot verification, caching H(m)^x per distinct message
+    verifier = SignatureVerifier(
+        keys["private_key"], cache_size=config.verify_cache_size
+    )
+
+    # Signing and verification run here instead of on the event loop. "auto"
+    # uses a process pool for production-size keys and runs the toy key inline.
+    crypto_executor = CryptoExecutor(
+        resolve_mode(config.crypto_executor, keys["private_key"]["p"].bit_length()),
+        workers=config.crypto_workers,
+        max_pending=config.crypto_max_pending,
+    )
+    # One call per worker starts the whole pool (the first request would pay
+    # for forking it otherwise) and checks y = g^x in every worker
+    checks = await asyncio.gather(
+        *(
+            crypto_executor.run(
+                key_pair_matches, keys["public_key"], keys["private_key"]
+            )
+            for _ in range(min(crypto_executor.workers, config.crypto_max_pending))
+        )
+    )
+    if not all(checks):
+        raise ValueError("data/keys.json: public key y does not match g^x")
+
+    # /dh-exchange: B = g^b is computed ahead of time, a request only waits
+    # for its A^b. Filling the pool runs in the background.
+    dh_sessions = DHSessionStore(config.dh_max_sessions, config.dh_session_ttl)
+    dh_pool = DHKeyPool(
+        functools.partial(
+            run_crypto, "dh_pairs", generate_server_dh_pairs, keys["public_key"]
+        ),
+        size=config.dh_pool_size,
+    )
+    if config.dh_pool_size:
+        dh_pool.start()
+
+    logger.info(
+        "startup",
+        extra={
+            "fields": {
+                "key_bits": keys["public_key"]["p"].bit_length(),
+                "executor": crypto_executor.mode,
+                "students": len(roster),
+                "candidates": len(config.candidates),
+            }
+        },
+    )
+
+
+async def warm_up_state():
+    """Open the state backend, replaying the journal, and check it answers"""
+    global state, default_election
+    # Election state: "memory" (single worker, optionally journaled to disk),
+    # "sqlite" or "redis" (shared between several workers)
+    state = await asyncio.to_thread(
+        create_backend,
+        config.state_backend,
+        roster,
+        # Durable journal of issued signatures and accepted ballots, replayed
+        # on startup. An empty JOURNAL_DIR keeps everything in memory only.
+        journal_dir=config.journal_dir,
+        group_commit=config.journal_group_commit,
+        snapshot_every=config.journal_snapshot_every,
+        sqlite_path=config.sqlite_path,
+        redis_url=config.redis_url,
+        redis_prefix=config.redis_prefix,
+    )
+    await state.counters()
+    default_election = Election(
+        None, config.course_name, config.candidates, roster, keys, verifier, state
+    )
+    # Hash the ballots already cast into the bulletin board now, not on the
+    # first request for it
+    await default_election.bulletin.sync(state)
 
-app = FastAPI(title="Blind Signature Voting Demo")
 
+def load_election(election_id):
+    """Read the definition, keys and roster of a hosted election and open its state
+
+    Hosted elections always keep their state on disk, in the election's
+    directory, since it is dropped from memory when the election is evicted.
+    """
+    path = election_path(config.elections_dir, election_id)
+    definition = load_definition(path)
+    election_keys = load_keys(os.path.join(path, "keys.json"))
+    if not key_pair_matches(election_keys["public_key"], election_keys["private_key"]):
+        raise ValueError(f"{path}/keys.json: public key y does not match g^x")
+    if definition["roster_file"]:
+        students, _ = load_roster(
+            definition["roster_file"],
+            os.path.join(path, "roster"),
+            definition["roster_column"],
+        )
+    else:
+        students = Roster.from_ids(definition["voting_students"])
+    election_state = create_backend(
+        config.state_backend,
+        students,
+        journal_dir=os.path.join(path, "journal"),
+        group_commit=config.journal_group_commit,
+        snapshot_every=config.journal_snapshot_every,
+        sqlite_path=os.path.join(path, "election.db"),
+        redis_url=config.redis_url,
+        redis_prefix=f"{config.redis_prefix}{election_id}:",
+    )
+    return Election(
+        election_id,
+        definition["course_name"],
+        definition["candidates"],
+        students,
+        election_keys,
+        SignatureVerifier(
+            election_keys["private_key"], cache_size=config.verify_cache_size
+        ),
+        election_state,
+    )
+
+
+async def open_election(election_id):
+    """Load a hosted election for ElectionShards"""
+    start = time.perf_counter()
+    election = await asyncio.to_thread(load_election, election_id)
+    await election.state.counters()
+    logger.info(
+        "election_loaded",
+        extra={
+            "fields": {
+                "election": election_id,
+                "students": len(election.roster),
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+        },
+    )
+    return election
+
+
+async def warm_up_pages():
+    global pages
+    assets, pages = await asyncio.to_thread(render_pages)
+    static_files.manifest = assets
+
+
+async def run_crypto(operation, fn, *args):
+    """Run fn(*args) on the crypto executor and record how long it took"""
+    start = time.perf_counter()
+    try:
+        return await crypto_executor.run(fn, *args)
+    finally:
+        elapsed = time.perf_counter() - start
+        crypto_duration.observe(elapsed, operation=operation)
+        add_crypto_time(elapsed)
+
+
+def invalid_request_response():
+    """400 for a JSON body that is not an object"""
+    return JSONResponse(status_code=400, content={"error": "Invalid request"})
+
+
+def overloaded_response():
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Server is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
 
-# Load and validate configuration from environment variables
-def load_env_var(name, default=None):
-    value = os.getenv(name, default)
-    if value is None:
-        raise ValueError(f"Environment variable {name} is required")
-    return value
 
+def rejected_response(rejection):
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Too many requests, please retry"},
+        headers={"Retry-After": rejection.retry_after_header},
+    )
+
+
+def create_admissions(config):
+    """Admission control for the crypto endpoints
+
+    Token buckets per client IP and, for signing, per student ID, then at most
+    ADMISSION_CONCURRENCY requests per endpoint at once and ADMISSION_MAX_QUEUE
+    waiting. The rest gets a 429 with Retry-After right away. A lecture hall
+    often shares one IP, so the IP limit is generous.
+    """
+
+    def create(name, concurrency, **limits):
+        return Admission(
+            name,
+            concurrency,
+            max_queue=config.admission_max_queue,
+            queue_timeout=config.admission_queue_timeout,
+            limits={key: limit for key, limit in limits.items() if limit},
+        )
+
+    # Ballots are only limited per IP: nothing a voter sends with them may be
+    # linkable to their student ID.
+    ip, student = config.rate_limit_ip, config.rate_limit_student
+    return {
+        "sign": create("sign", config.admission_concurrency, ip=ip, student=student),
+        "sign_batch": create("sign_batch", config.admission_batch_concurrency, ip=ip),
+        "submit": create("submit", config.admission_concurrency, ip=ip),
+        "dh": create("dh", config.admission_concurrency, ip=ip),
+    }
 
-try:
-    COURSE_NAME = load_env_var("COURSE_NAME")
 
-    # Parse comma-separated strings into lists
-    voting_students_str = load_env_var("VOTING_STUDENTS")
-    VOTING_STUDENTS = [s.strip() for s in voting_students_str.split(",")]
+def client_ip(request):
+    return request.client.host if request.client else None
 
-    candidates_str = load_env_var("CANDIDATES")
-    CANDIDATES = [s.strip() for s in candidates_str.split(",")]
 
-    # Validate the loaded data
-    if not isinstance(VOTING_STUDENTS, list):
-        raise ValueError("VOTING_STUDENTS must be a list")
-    if not isinstance(CANDIDATES, list):
-        raise ValueError("CANDIDATES must be a list")
-    if not CANDIDATES:
-        raise ValueError("CANDIDATES cannot be empty")
-except Exception as e:
-    print(f"Error loading configuration: {str(e)}")
-    raise
+async def admitted(endpoint, handler, data, **keys):
+    """Run handler(data) if admission control lets the request in, else a 429
 
-# Set up static files and templates
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
+    Args:
+        endpoint: Key of admissions
+        handler: Coroutine function handling the parsed request body
+        data: Parsed request body
+        keys: Rate limit keys, e.g. ip=... and student=...
+    """
+    admission = admissions[endpoint]
+    # Only string identifiers key a bucket, anything else is not rate limited
+    keys = {k: v for k, v in keys.items() if isinstance(v, str)}
+    try:
+        await admission.acquire(**keys)
+    except AdmissionRejected as rejection:
+        requests_shed.inc(endpoint=endpoint, reason=rejection.reason)
+        logger.debug(
+            "shed", extra={"fields": {"endpoint": endpoint, "reason": rejection.reason}}
+        )
+        return rejected_response(rejection)
+    try:
+        return await handler(data)
+    finally:
+        admission.release()
+
+
+SITE_URL = "http://141.72.12.183:33059/"
 
-# Ensure data directory exists
-os.makedirs("data", exist_ok=True)
 
-# Generate keys on startup if they don't exist
-keys_file = Path("data/keys.json")
-if not keys_file.exists():
-    pub_key, priv_key = generate_keys()
-    with open(keys_file, "w") as f:
-        json.dump({"public_key": pub_key, "private_key": priv_key}, f)
+def render_pages():
+    """Compress the static files and render the HTML pages
 
-# Load keys
-with open(keys_file, "r") as f:
-    keys = json.load(f)
+    Both only depend on the configuration, so this runs once during warm-up.
 
-# In-memory storage
-voted_students = []
-cast_votes = []
+    Returns:
+        tuple: (AssetManifest, dict of PrerenderedPage by name)
+    """
+    # Jinja is only needed here, not on import
+    from fastapi.templating import Jinja2Templates
 
-# Store for DH session parameters
-dh_sessions = {}
+    assets = AssetManifest("app/static", url_prefix="/static")
+    templates = Jinja2Templates(directory="app/templates")
+    templates.env.globals["asset_url"] = assets.url
+
+    def render(name, **context):
+        return PrerenderedPage(templates.get_template(name).render(**context))
+
+    course_name, candidates = config.course_name, list(config.candidates)
+    return assets, {
+        "index": render("index.html", course_name=course_name, site_url=SITE_URL),
+        "admin": render(
+            "admin.html",
+            course_name=course_name,
+            candidates=candidates,
+        ),
+        "vote": render("vote.html", course_name=course_name, candidates=candidates),
+    }
 
 
 # Routes
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop answers"""
+    status_code = 503 if readiness.status == FAILED else 200
+    return JSONResponse(status_code=status_code, content={"status": readiness.status})
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once warm-up is done, with the time each step took"""
+    status_code = 200 if readiness.ready else 503
+    return JSONResponse(status_code=status_code, content=readiness.report())
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    site_url = "http://141.72.12.183:33059/"
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "course_name": COURSE_NAME, "site_url": site_url},
-    )
+    return page_response(request, pages["index"])
 
 
 @app.get("/admin", response_class=HTMLResponse)
 async def admin(request: Request):
-    return templates.TemplateResponse(
-        "admin.html",
-        {
-            "request": request,
-            "course_name": COURSE_NAME,
-            "voting_students": VOTING_STUDENTS,
-            "candidates": CANDIDATES,
-        },
-    )
+    return page_response(request, pages["admin"])
 
 
 @app.get("/vote", response_class=HTMLResponse)
 async def vote_page(request: Request):
-    return templates.TemplateResponse(
-        "vote.html",
-        {"request": request, "course_name": COURSE_NAME, "candidates": CANDIDATES},
-    )
+    return page_response(request, pages["vote"])
 
 
 @app.post("/get-public-key")
 async def get_public_key():
-    return {"public_key": keys["public_key"]}
+    return await public_key(default_election)
+
+
+async def public_key(election):
+    return {"public_key": election.keys["public_key"]}
 
 
 @app.post("/dh-exchange")
 async def dh_exchange(request: Request):
-    """Legacy DH exchange route - simplified for compatibility"""
-    data = await request.json()
-    client_id = data.get("client_id")
-    client_A = data.get("A")
-
-    try:
-        # Convert A to integer
-        A_int = int(client_A)
+    """Diffie-Hellman exchange with the signer
 
-        # Just return a random B value - not used in the new scheme
-        import random
+    The client sends A = g^a mod p and gets B = g^b mod p and the id of the
+    session holding the shared key K = A^b mod p.
+    """
+    data = await request.json()
+    return await admitted("dh", exchange_keys, data, ip=client_ip(request))
 
-        B = random.randint(100, 1000)
 
-        return {"B": str(B)}
+async def exchange_keys(data):
+    p = keys["public_key"]["p"]
+    try:
+        A = default_election.codec.decode(
+            data.get("A") if isinstance(data, dict) else None
+        )
     except (ValueError, TypeError) as e:
         return JSONResponse(
-            status_code=400, content={"error": f"Invalid parameters: {str(e)}"}
+            status_code=400, content={"error": f"Invalid parameters: {e}"}
+        )
+    # 0, 1 and p - 1 would make the shared key predictable
+    if not 1 < A < p - 1:
+        return JSONResponse(
+            status_code=400, content={"error": "Invalid parameters: A out of range"}
         )
 
+    try:
+        b, B = await dh_pool.take()
+        K = await run_crypto("dh", pow, A, b, p)
+    except CryptoOverloaded:
+        logger.warning("overloaded", extra={"fields": {"route": "/dh-exchange"}})
+        return overloaded_response()
+
+    return {"B": str(B), "session_id": dh_sessions.create(K)}
+
 
 @app.post("/sign-ballot")
 async def sign_ballot(request: Request):
-    global voted_students
+    return await request_signature(default_election, request)
+
+
+async def request_signature(election, request):
     data = await request.json()
-    student_id = data.get("student_id")
+    student_id = (
+        normalize_id(data.get("student_id")) if isinstance(data, dict) else None
+    )
+    if student_id is not None and election.id is not None:
+        # The same student in two elections has two rate limit buckets
+        student_id = f"{election.id}/{student_id}"
+    return await admitted(
+        "sign",
+        functools.partial(issue_signature, election, binary=is_binary(request)),
+        data,
+        ip=client_ip(request),
+        student=student_id,
+    )
+
+
+def wire_response(content, binary):
+    """Response with big integers encoded as in the request, see app.utils.wire"""
+    if binary:
+        return JSONResponse(content=content, media_type=B64_MEDIA_TYPE)
+    return content
+
+
+async def issue_signature(election, data, binary=False):
+    if not isinstance(data, dict):
+        sign_rejected.inc(reason="bad_format")
+        return invalid_request_response()
+    student_id = normalize_id(data.get("student_id"))
     blinded_ballot = data.get("blinded_ballot")
     client_id = data.get("client_id")
 
-    # Check if student is in the list and hasn't voted
-    if student_id not in VOTING_STUDENTS:
+    # Check if student is in the list
+    if not election.state.is_eligible(student_id):
+        sign_rejected.inc(reason="not_authorized")
         return JSONResponse(
             status_code=403, content={"error": "Student not authorized to vote"}
         )
 
-    # Check if student has already voted
-    if student_id in voted_students:
-        return JSONResponse(
-            status_code=403, content={"error": "Student has already voted"}
-        )
-
     # Make sure blinded_ballot is an integer
     try:
-        blinded_ballot_int = int(blinded_ballot)
+        blinded_ballot_int = election.codec.decode(blinded_ballot, binary)
     except (ValueError, TypeError):
+        sign_rejected.inc(reason="bad_format")
         return JSONResponse(
             status_code=400, content={"error": "Invalid blinded ballot format"}
         )
 
+    # Check if student has already voted and mark them in one atomic step
+    status = await election.state.issue(student_id)
+    if status == NOT_AUTHORIZED:
+        sign_rejected.inc(reason="not_authorized")
+        return JSONResponse(
+            status_code=403, content={"error": "Student not authorized to vote"}
+        )
+
+    if status == ALREADY_VOTED:
+        sign_rejected.inc(reason="already_voted")
+        return JSONResponse(
+            status_code=403, content={"error": "Student has already voted"}
+        )
+
     # Sign blinded ballot
-    blind_signature = sign_blinded_message(blinded_ballot_int, keys["private_key"])
+    try:
+        blind_signature = await run_crypto(
+            "sign",
+            sign_blinded_message,
+            blinded_ballot_int,
+            election.keys["private_key"],
+        )
+    except CryptoOverloaded:
+        await revoke_signature(election, student_id)
+        sign_rejected.inc(reason="overloaded")
+        logger.warning("overloaded", extra={"fields": {"route": "/sign-ballot"}})
+        return overloaded_response()
+    except Exception:
+        await revoke_signature(election, student_id)
+        raise
+
+    signatures_issued.inc()
+    if logger.isEnabledFor(logging.DEBUG):
+        # Demo explanation: S' = M'^x mod p
+        logger.debug(
+            "sign",
+            extra={
+                "fields": {
+                    "student_id": student_id,
+                    "blinded": blinded_ballot_int,
+                    "blind_signature": blind_signature,
+                }
+            },
+        )
+    _, voted_count = await election.state.counters()
+    election.broadcaster.publish(
+        "voted", participation_delta(election, student_id, voted_count)
+    )
+
+    return wire_response(
+        {"blind_signature": election.codec.encode(blind_signature, binary)}, binary
+    )
+
+
+@app.post("/sign-ballot/batch")
+async def sign_ballot_batch(request: Request):
+    """Sign many blinded ballots pre-collected by a polling station at once.
+
+    Returns one result per ballot, in request order, with either a
+    blind_signature or an error and the status code the single endpoint would
+    have used.
+    """
+    data = await request.json()
+    return await admitted(
+        "sign_batch",
+        functools.partial(
+            issue_signatures, default_election, binary=is_binary(request)
+        ),
+        data,
+        ip=client_ip(request),
+    )
 
-    # Mark student as voted
-    voted_students.append(student_id)
 
-    return {"blind_signature": str(blind_signature)}
+async def issue_signatures(election, data, binary=False):
+    if not isinstance(data, dict):
+        return invalid_request_response()
+    items = data.get("ballots")
+    if not isinstance(items, list):
+        return JSONResponse(
+            status_code=400, content={"error": "Expected a list of ballots"}
+        )
+    # Upper bound so one request cannot monopolize the signer
+    if len(items) > config.sign_batch_limit:
+        return JSONResponse(
+            status_code=413,
+            content={"error": f"At most {config.sign_batch_limit} ballots per batch"},
+        )
+
+    def failure(student_id, status_code, error):
+        return {"student_id": student_id, "status": status_code, "error": error}
+
+    # Validate eligibility and format of every item in one pass
+    results = [None] * len(items)
+    pending = []
+    for i, item in enumerate(items):
+        sent_id = item.get("student_id") if isinstance(item, dict) else None
+        student_id = normalize_id(sent_id)
+        if not election.state.is_eligible(student_id):
+            sign_rejected.inc(reason="not_authorized")
+            results[i] = failure(sent_id, 403, "Student not authorized to vote")
+            continue
+        try:
+            blinded = election.codec.decode(item.get("blinded_ballot"), binary)
+            pending.append((i, student_id, blinded))
+        except (ValueError, TypeError):
+            sign_rejected.inc(reason="bad_format")
+            results[i] = failure(sent_id, 400, "Invalid blinded ballot format")
+
+    statuses = await election.state.issue_many(
+        [student_id for _, student_id, _ in pending]
+    )
+    to_sign = []
+    for (i, student_id, blinded), status in zip(pending, statuses):
+        if status == ISSUED:
+            to_sign.append((i, student_id, blinded))
+        elif status == ALREADY_VOTED:
+            sign_rejected.inc(reason="already_voted")
+            results[i] = failure(
+                items[i]["student_id"], 403, "Student has already voted"
+            )
+        else:
+            sign_rejected.inc(reason="not_authorized")
+            results[i] = failure(
+                items[i]["student_id"], 403, "Student not authorized to vote"
+            )
+
+    # One chunk per crypto worker, each a call on the executor, so batches
+    # count against CRYPTO_MAX_PENDING and show up in its stats
+    chunks = split_batch(
+        [blinded for _, _, blinded in to_sign],
+        election.keys["public_key"]["p"],
+        crypto_executor.workers,
+    )
+    try:
+        signed = await asyncio.gather(
+            *(
+                run_crypto(
+                    "sign_batch",
+                    sign_blinded_messages,
+                    chunk,
+                    election.keys["private_key"],
+                )
+                for chunk in chunks
+            )
+        )
+    except CryptoOverloaded:
+        for _, student_id, _ in to_sign:
+            await revoke_signature(election, student_id)
+        sign_rejected.inc(len(to_sign), reason="overloaded")
+        logger.warning("overloaded", extra={"fields": {"route": "/sign-ballot/batch"}})
+        return overloaded_response()
+    except Exception:
+        for _, student_id, _ in to_sign:
+            await revoke_signature(election, student_id)
+        raise
+    signatures = [signature for chunk in signed for signature in chunk]
+    signatures_issued.inc(len(signatures))
+    logger.info("sign_batch", extra={"fields": {"signed": len(signatures)}})
+
+    _, voted_count = await election.state.counters()
+    for (i, student_id, _), signature in zip(to_sign, signatures):
+        results[i] = {
+            "student_id": items[i]["student_id"],
+            "blind_signature": election.codec.encode(signature, binary),
+        }
+        election.broadcaster.publish(
+            "voted", participation_delta(election, student_id, voted_count)
+        )
+
+    return wire_response({"results": results}, binary)
 
 
 @app.post("/submit-vote")
 async def submit_vote(request: Request):
-    global cast_votes
+    return await submit_ballot(default_election, request)
+
+
+async def submit_ballot(election, request):
     data = await request.json()
+    return await admitted(
+        "submit",
+        functools.partial(cast_ballot, election, binary=is_binary(request)),
+        data,
+        ip=client_ip(request),
+    )
+
+
+async def cast_ballot(election, data, binary=False):
+    if not isinstance(data, dict):
+        ballots_rejected.inc(reason="bad_format")
+        return invalid_request_response()
     vote = data.get("vote")
     signature = data.get("signature")
-    candidate = data.get("candidate", "Unbekannt")  # Candidate name for display
+
+    if not isinstance(vote, str):
+        ballots_rejected.inc(reason="bad_format")
+        return JSONResponse(status_code=400, content={"error": "Invalid vote format"})
+
+    # Only the message is signed: the ballot counts for the candidate it names,
+    # and a candidate field sent along has to agree with it
+    candidate_name = ballot_candidate(vote, election.candidates)
+    if candidate_name is None or data.get("candidate", candidate_name) != (
+        candidate_name
+    ):
+        ballots_rejected.inc(reason="bad_candidate")
+        return JSONResponse(status_code=400, content={"error": "Invalid candidate"})
 
     # Convert signature to integer
     try:
-        signature_int = int(signature)
-    except (ValueError, TypeError):
+        signature_int = election.codec.decode(signature, binary)
+    except (ValueError, TypeError) as e:
+        ballots_rejected.inc(reason="bad_format")
         return JSONResponse(
-            status_code=400, content={"error": f"Invalid signature format: {signature}"}
+            status_code=400, content={"error": f"Invalid signature format: {e}"}
         )
 
     # Verify signature using the raw vote message
-    if not verify_signature(vote, signature_int, keys["public_key"]):
+    try:
+        valid = await election.verifier.verify_async(
+            vote, signature_int, functools.partial(run_crypto, "verify")
+        )
+    except CryptoOverloaded:
+        ballots_rejected.inc(reason="overloaded")
+        logger.warning("overloaded", extra={"fields": {"route": "/submit-vote"}})
+        return overloaded_response()
+    if not valid:
+        ballots_rejected.inc(reason="invalid_signature")
+        logger.debug(
+            "ballot_rejected", extra={"fields": {"reason": "invalid_signature"}}
+        )
         return JSONResponse(status_code=403, content={"error": "Invalid signature"})
 
-    # Check if this exact vote has been cast before
-    for cast_vote in cast_votes:
-        if cast_vote["signature"] == signature:
-            return JSONResponse(status_code=403, content={"error": "Vote already cast"})
-
-    # Use the provided candidate name
-    candidate_name = candidate
+    # Store vote unless this exact vote has been cast before
+    ballot = {"vote": candidate_name, "message": vote, "signature": str(signature_int)}
+    counted = await election.state.cast(ballot)
+    if counted is None:
+        ballots_rejected.inc(reason="duplicate_signature")
+        logger.debug(
+            "ballot_rejected", extra={"fields": {"reason": "duplicate_signature"}}
+        )
+        return JSONResponse(status_code=403, content={"error": "Vote already cast"})
+    version, count = counted
+    ballots_accepted.inc()
+    logger.debug(
+        "ballot_accepted",
+        extra={"fields": {"candidate": candidate_name, "count": count}},
+    )
 
-    # Store vote in memory
-    cast_votes.append({"vote": candidate_name, "signature": signature})
+    election.broadcaster.publish(
+        "vote", {"candidate": candidate_name, "count": count, "version": version}
+    )
 
     return {"success": True}
 
 
-@app.get("/results")
-async def get_results():
-    global cast_votes
+def participation_percentage(voted_count, students_count):
+    """Calculate participation percentage, ensure it's a number"""
+    participation = (voted_count / students_count) * 100 if students_count > 0 else 0
+    return round(participation, 2)
 
-    # Count votes
-    votes = {}
-    for vote_data in cast_votes:
-        vote = vote_data["vote"]
-        votes[vote] = votes.get(vote, 0) + 1
 
-    # Get participation
-    students_count = len(VOTING_STUDENTS)
-    voted_count = len(voted_students)
+async def revoke_signature(election, student_id):
+    """Take back a signature that was never delivered and tell the dashboards"""
+    await election.state.revoke(student_id)
+    _, voted_count = await election.state.counters()
+    election.broadcaster.publish(
+        "revoked", participation_delta(election, student_id, voted_count)
+    )
 
-    # Calculate participation percentage, ensure it's a number
-    participation = (voted_count / students_count) * 100 if students_count > 0 else 0
 
+def participation_delta(election, student_id, voted_count):
+    """Payload of the "voted" and "revoked" stream events"""
+    students_count = election.state.total
     return {
-        "votes": votes,
-        "participation": round(participation, 2),
+        "student_id": student_id,
+        "participation": participation_percentage(voted_count, students_count),
         "total_students": students_count,
         "voted_students": voted_count,
     }
 
 
+async def render_results(election):
+    """Return (etag, body) for /results, re-rendering only if something changed
+
+    The ETag is a hash of the body, so it stays right when the counters start
+    over, e.g. after a restart without a journal, and agrees between workers.
+    """
+    counters = await election.state.counters()
+    cache = election.results_cache
+    if cache["counters"] == counters:
+        return cache["etag"], cache["body"]
+
+    tally_version, votes, voted_count = await election.state.results()
+
+    # Get participation
+    students_count = election.state.total
+
+    body = json.dumps(
+        {
+            "votes": votes,
+            "participation": participation_percentage(voted_count, students_count),
+            "total_students": students_count,
+            "voted_students": voted_count,
+            "version": tally_version,
+        }
+    ).encode()
+    cache["counters"] = (tally_version, voted_count)
+    cache["etag"] = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    cache["body"] = body
+    return cache["etag"], body
+
+
+@app.get("/results")
+async def get_results(request: Request):
+    return await results_response(default_election, request)
+
+
+async def results_response(election, request):
+    etag, body = await render_results(election)
+    # no-cache lets browsers keep the body but revalidate it with If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/results/stream")
+async def results_stream():
+    """Server-sent events with the current results, then one event per change
+
+    The snapshot holds the results, with the number of voted students but not
+    the list: dashboards page through /voted-students for it, so a reconnect
+    costs a small snapshot plus the changes the dashboard missed.
+    """
+    broadcaster = default_election.broadcaster
+    subscription = broadcaster.subscribe()
+    _, body = await render_results(default_election)
+    snapshot = {"results": json.loads(body)}
+
+    async def events():
+        try:
+            yield format_sse("snapshot", snapshot)
+            while True:
+                try:
+                    message = await subscription.get(STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    # Client fell behind, let it reconnect for a fresh snapshot
+                    break
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Largest page of /voted-students, in log entries
+VOTED_STUDENTS_PAGE_LIMIT = 10000
+
+
 @app.get("/voted-students")
-async def get_voted_students():
-    """Return a list of students who have voted"""
-    global voted_students
+async def get_voted_students(request: Request):
+    """Students who have been issued a signature, or the changes since a call.
+
+    Query parameters:
+        since: sequence of a previous response (default 0: everything)
+        limit: Read at most this many log entries; page on with since=sequence
+            until complete is true
+
+    The response lists voted_students added and students revoked after since.
+    If its epoch differs from the one the sequence came from, start over with
+    since=0.
+    """
+    try:
+        since = int(request.query_params.get("since", "0"))
+        limit = request.query_params.get("limit")
+        limit = None if limit is None else int(limit)
+    except ValueError:
+        return JSONResponse(
+            status_code=400, content={"error": "since and limit must be integers"}
+        )
+    if limit is not None and not 0 < limit <= VOTED_STUDENTS_PAGE_LIMIT:
+        error = f"limit must be between 1 and {VOTED_STUDENTS_PAGE_LIMIT}"
+        return JSONResponse(status_code=400, content={"error": error})
+    return await state.voted_changes(since, limit)
+
+
+# Largest page of /bulletin/ballots, in ballots
+BULLETIN_PAGE_LIMIT = 10000
+
+
+@app.get("/bulletin/root")
+async def get_bulletin_root():
+    return await bulletin_root(default_election)
+
+
+async def bulletin_root(election):
+    """Merkle root over all ballots counted so far"""
+    await election.bulletin.sync(election.state)
+    return election.bulletin.root()
+
+
+@app.get("/bulletin/proof/{signature}")
+async def get_bulletin_proof(signature: str):
+    return await bulletin_proof(default_election, signature)
+
+
+async def bulletin_proof(election, signature):
+    """Inclusion proof of the ballot cast with this (decimal) signature"""
+    try:
+        signature_int = election.codec.decode(signature)
+    except (ValueError, TypeError) as e:
+        return JSONResponse(
+            status_code=400, content={"error": f"Invalid signature format: {e}"}
+        )
+    await election.bulletin.sync(election.state)
+    proof = election.bulletin.proof(signature_int)
+    if proof is None:
+        return JSONResponse(status_code=404, content={"error": "No such ballot"})
+    return proof
+
+
+def bulletin_line(index, ballot):
+    candidate, message = ballot["vote"], ballot["message"]
+    signature = ballot["signature"]
+    line = {
+        "index": index,
+        "candidate": candidate,
+        "message": message,
+        "signature": signature,
+        "leaf": leaf_hash(candidate, message, signature).hex(),
+    }
+    return json.dumps(line) + "\n"
+
+
+@app.get("/bulletin/ballots")
+async def get_bulletin_ballots(request: Request):
+    return await bulletin_ballots(default_election, request)
+
+
+async def bulletin_ballots(election, request):
+    """Accepted ballots as JSON lines, in tree order.
+
+    Query parameters:
+        start: Index of the first ballot (default 0)
+        limit: At most this many ballots (default and maximum
+            BULLETIN_PAGE_LIMIT); a Link header with rel="next" points to the
+            next page
+
+    Every line holds index, candidate, message, signature and the leaf hash. The page
+    ends at the X-Tree-Size the current /bulletin/root was computed over.
+    """
+    try:
+        start = int(request.query_params.get("start", "0"))
+        limit = int(request.query_params.get("limit", BULLETIN_PAGE_LIMIT))
+    except ValueError:
+        return JSONResponse(
+            status_code=400, content={"error": "start and limit must be integers"}
+        )
+    if start < 0 or not 0 < limit <= BULLETIN_PAGE_LIMIT:
+        error = f"start must be >= 0, limit between 1 and {BULLETIN_PAGE_LIMIT}"
+        return JSONResponse(status_code=400, content={"error": error})
 
-    return {"voted_students": voted_students}
+    await election.bulletin.sync(election.state)
+    size = len(election.bulletin)
+    stop = min(start + limit, size)
+    headers = {"X-Tree-Size": str(size)}
+    if stop < size:
+        headers["Link"] = f'<{request.url.path}?start={stop}&limit={limit}>; rel="next"'
+
+    async def lines():
+        # The body is sent after in_election released a hosted election, so
+        # hold it again while reading from its state
+        current = election
+        if election.id is not None:
+            current = await elections.acquire(election.id)
+        try:
+            # Read in slices so the page is never all in memory
+            for offset in range(start, stop, 1000):
+                ballots = await current.state.ballots(offset, min(1000, stop - offset))
+                yield "".join(
+                    bulletin_line(index, ballot)
+                    for index, ballot in enumerate(ballots, start=offset)
+                )
+        finally:
+            if election.id is not None:
+                elections.release(current)
+
+    return StreamingResponse(
+        lines(), media_type="application/x-ndjson", headers=headers
+    )
+
+
+# Elections hosted in ELECTIONS_DIR, see app.utils.elections. Each route does
+# what its counterpart above does for the default election.
+async def in_election(election_id, handle):
+    """Return await handle(election) for a hosted election, or a 404"""
+    try:
+        election = await elections.acquire(election_id)
+    except ElectionNotFound:
+        return JSONResponse(
+            status_code=404, content={"error": f"Unknown election {election_id}"}
+        )
+    try:
+        return await handle(election)
+    finally:
+        elections.release(election)
+
+
+@app.post("/elections/{election_id}/get-public-key")
+async def election_public_key(election_id: str):
+    return await in_election(election_id, public_key)
+
+
+@app.post("/elections/{election_id}/sign-ballot")
+async def election_sign_ballot(election_id: str, request: Request):
+    return await in_election(
+        election_id, functools.partial(request_signature, request=request)
+    )
+
+
+@app.post("/elections/{election_id}/submit-vote")
+async def election_submit_vote(election_id: str, request: Request):
+    return await in_election(
+        election_id, functools.partial(submit_ballot, request=request)
+    )
+
+
+@app.get("/elections/{election_id}/results")
+async def election_results(election_id: str, request: Request):
+    return await in_election(
+        election_id, functools.partial(results_response, request=request)
+    )
+
+
+@app.get("/elections/{election_id}/bulletin/root")
+async def election_bulletin_root(election_id: str):
+    return await in_election(election_id, bulletin_root)
+
+
+@app.get("/elections/{election_id}/bulletin/proof/{signature}")
+async def election_bulletin_proof(election_id: str, signature: str):
+    return await in_election(
+        election_id, functools.partial(bulletin_proof, signature=signature)
+    )
+
+
+@app.get("/elections/{election_id}/bulletin/ballots")
+async def election_bulletin_ballots(election_id: str, request: Request):
+    return await in_election(
+        election_id, functools.partial(bulletin_ballots, request=request)
+    )
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics; state sizes are sampled at scrape time"""
+    version, voted_count = await state.counters()
+    executor_stats = crypto_executor.stats()
+    for name, value in [
+        ("election_eligible_students", state.total),
+        ("election_students_voted", voted_count),
+        ("election_ballots_cast", version),
+        ("sse_subscribers", default_election.broadcaster.subscriber_count),
+        ("verify_cache_entries", verifier.cache_entries),
+        ("verify_cache_hits", verifier.hits),
+        ("verify_cache_misses", verifier.misses),
+        ("crypto_executor_pending", executor_stats["pending"]),
+        ("crypto_executor_queued", executor_stats["queued"]),
+        ("crypto_executor_peak_pending", executor_stats["peak_pending"]),
+        ("crypto_executor_rejected", executor_stats["rejected"]),
+        ("dh_sessions", len(dh_sessions)),
+        ("dh_pool_ready", len(dh_pool)),
+        ("dh_pool_hits", dh_pool.hits),
+        ("dh_pool_misses", dh_pool.misses),
+        ("elections_active", len(elections)),
+        ("elections_loads", elections.loads),
+        ("elections_evictions", elections.evictions),
+    ]:
+        state_gauges[name].set(value)
+    for endpoint, admission in admissions.items():
+        admission_in_flight.set(admission.slots.in_flight, endpoint=endpoint)
+        admission_queued.set(admission.slots.queued, endpoint=endpoint)
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/crypto-stats")
+async def get_crypto_stats():
+    """Queue depth, rejections and timings of the crypto executor"""
+    return {
+        "executor": crypto_executor.stats(),
+        "verify_cache": {
+            "size": config.verify_cache_size,
+            "hits": verifier.hits,
+            "misses": verifier.misses,
+        },
+    }
 
 
 if __name__ == "__main__":
@@ -51,7 +51,7 @@ function setupEventListeners() {
         const originalText = this.innerHTML;
         this.innerHTML = `<span class="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span>Lade...`;
         
-        fetchVotedStudents().finally(() => {
+        fetchVotedStudents(true).finally(() => {
             // Restore button
             setTimeout(() => {
                 this.classList.remove('disabled');
@@ -81,17 +81,7 @@ function fetchResults(targetId = null) {
                 card.style.opacity = '1';
             });
             
-            // Update the stats boxes
-            updateStatCounters(data);
-            
-            if (targetId) {
-                // Update specific target
-                processResultsData(data, targetId);
-            } else {
-                // Update both targets
-                processResultsData(data, 'participation-results');
-                processResultsData(data, 'voting-results');
-            }
+            applyResults(data, targetId);
             
             return data;
         })
@@ -112,6 +102,21 @@ function fetchResults(targetId = null) {
         });
 }
 
+// Render a results object into the stats boxes and result cards
+function applyResults(data, targetId = null) {
+    // Update the stats boxes
+    updateStatCounters(data);
+    
+    if (targetId) {
+        // Update specific target
+        processResultsData(data, targetId);
+    } else {
+        // Update both targets
+        processResultsData(data, 'participation-results');
+        processResultsData(data, 'voting-results');
+    }
+}
+
 // Function to update stats counters
 function updateStatCounters(data) {
     // Update stats counters with animation
@@ -349,8 +354,43 @@ function createVotingPieChart(votes) {
     });
 }
 
-// Function to fetch and display who has voted
-function fetchVotedStudents() {
+// Position in the server's voted log: after a full load only the changes since
+// `sequence` are fetched. A new epoch means the log was reset.
+const VOTED_PAGE_SIZE = 1000;
+const VOTED_STAGGER_LIMIT = 20;
+let votedLog = null;
+// Load in progress; a snapshot and a poll arriving together share it
+let votedLoad = null;
+
+function fetchVotedPage(since) {
+    return fetch(`/voted-students?since=${since}&limit=${VOTED_PAGE_SIZE}`).then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+// Function to fetch and display who has voted. Polls apply only the changes;
+// the button (full = true) reloads the whole list.
+function fetchVotedStudents(full = false) {
+    if (!full && votedLoad) return votedLoad;
+    const load = loadVotedStudents(full);
+    votedLoad = load;
+    const done = () => {
+        if (votedLoad === load) votedLoad = null;
+    };
+    load.then(done, done);
+    return load;
+}
+
+function loadVotedStudents(full) {
+    if (!full && votedLog) {
+        return fetchVotedChanges().catch(error => {
+            console.error('Error fetching voted students:', error);
+        });
+    }
+    
     // Add loading effect
     const votedListElement = document.getElementById('voted-students-list');
     if (votedListElement) {
@@ -363,39 +403,191 @@ function fetchVotedStudents() {
         `;
     }
     
-    return fetch('/voted-students')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            if (!votedListElement) return;
-            
-            if (data.voted_students.length === 0) {
-                votedListElement.innerHTML = '<li class="list-group-item text-center">Noch niemand hat abgestimmt.</li>';
-            } else {
-                // Add with animation
-                votedListElement.innerHTML = '';
-                
-                // Add students with a staggered animation
-                data.voted_students.forEach((student, index) => {
-                    setTimeout(() => {
-                        const li = document.createElement('li');
-                        li.className = 'list-group-item animate__animated animate__fadeInRight';
-                        li.innerHTML = `<i class="fas fa-user-check me-2" style="color: var(--success-color);"></i>${student}`;
-                        votedListElement.appendChild(li);
-                    }, index * 100); // Stagger the animations
-                });
-            }
+    // Page through the log, the list is rendered once at the end
+    const students = [];
+    const loadPages = (since, epoch) => fetchVotedPage(since).then(data => {
+        if (epoch && data.epoch !== epoch) {
+            // The log was reset while paging, start over
+            students.length = 0;
+            return loadPages(0, data.epoch);
+        }
+        const removed = new Set(data.revoked);
+        for (let i = students.length - 1; i >= 0 && removed.size; i--) {
+            if (removed.delete(students[i])) students.splice(i, 1);
+        }
+        students.push(...data.voted_students);
+        const position = { epoch: data.epoch, sequence: data.sequence };
+        return data.complete ? position : loadPages(data.sequence, data.epoch);
+    });
+    
+    return loadPages(0, null)
+        .then(position => {
+            renderVotedStudents(students);
+            votedLog = position;
         })
         .catch(error => {
             console.error('Error fetching voted students:', error);
+            votedLog = null;
             if (votedListElement) {
                 votedListElement.innerHTML = 
                     `<div class="alert alert-danger">Fehler beim Abrufen der Daten: ${error.message}</div>`;
             }
             throw error;
         });
-} 
\ No newline at end of file
+} 
+
+// Apply the changes since the last load to the rendered list
+function fetchVotedChanges() {
+    return fetchVotedPage(votedLog.sequence).then(data => {
+        if (data.epoch !== votedLog.epoch) {
+            votedLog = null;
+            return fetchVotedStudents(true);
+        }
+        data.revoked.forEach(removeVotedStudent);
+        data.voted_students.forEach(appendVotedStudent);
+        votedLog.sequence = data.sequence;
+        if (!data.complete) return fetchVotedChanges();
+    });
+}
+
+// Replace the voted students list
+let votedRenderGeneration = 0;
+const votedItems = new Map();
+
+function renderVotedStudents(students) {
+    const votedListElement = document.getElementById('voted-students-list');
+    if (!votedListElement) return;
+    votedItems.clear();
+    
+    if (students.length === 0) {
+        votedListElement.innerHTML = '<li class="list-group-item text-center">Noch niemand hat abgestimmt.</li>';
+    } else {
+        // Add with animation
+        votedListElement.innerHTML = '';
+        
+        // Add students with a staggered animation, dropping any older render;
+        // long lists are added at once
+        const generation = ++votedRenderGeneration;
+        if (students.length > VOTED_STAGGER_LIMIT) {
+            students.forEach(appendVotedStudent);
+            return;
+        }
+        students.forEach((student, index) => {
+            setTimeout(() => {
+                if (generation === votedRenderGeneration) appendVotedStudent(student);
+            }, index * 100); // Stagger the animations
+        });
+    }
+}
+
+// Add a single student to the voted students list
+function appendVotedStudent(student) {
+    const votedListElement = document.getElementById('voted-students-list');
+    if (!votedListElement) return;
+    
+    // Drop the "nobody voted yet" placeholder
+    const placeholder = votedListElement.querySelector('.text-center');
+    if (placeholder) placeholder.remove();
+    
+    if (votedItems.has(student)) return;
+    const li = document.createElement('li');
+    li.className = 'list-group-item animate__animated animate__fadeInRight';
+    li.innerHTML = `<i class="fas fa-user-check me-2" style="color: var(--success-color);"></i>${student}`;
+    votedListElement.appendChild(li);
+    votedItems.set(student, li);
+}
+
+// Remove a student whose signature was revoked
+function removeVotedStudent(student) {
+    const li = votedItems.get(student);
+    if (!li) return;
+    li.remove();
+    votedItems.delete(student);
+}
+
+// Live updates: consume /results/stream, fall back to polling while it is down
+const POLL_INTERVAL_MS = 10000;
+const RENDER_THROTTLE_MS = 1000;
+let pollTimer = null;
+let liveResults = null;
+let renderTimer = null;
+
+function startLiveUpdates() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    
+    const source = new EventSource('/results/stream');
+    
+    // Current results, sent on every (re)connect. The voted students are
+    // not in it: after a reconnect only the changes since the last position
+    // in the voted log are fetched, the first time the list is paged in
+    source.addEventListener('snapshot', event => {
+        const data = JSON.parse(event.data);
+        liveResults = data.results;
+        stopPolling();
+        applyResults(liveResults);
+        fetchVotedStudents();
+    });
+    
+    // A ballot was accepted: only the candidate's new count is sent
+    source.addEventListener('vote', event => {
+        if (!liveResults) return;
+        const delta = JSON.parse(event.data);
+        liveResults.votes[delta.candidate] = delta.count;
+        liveResults.version = delta.version;
+        scheduleRender();
+    });
+    
+    // A blind signature was issued: new participation and the student's id
+    source.addEventListener('voted', event => {
+        if (!liveResults) return;
+        const delta = JSON.parse(event.data);
+        liveResults.participation = delta.participation;
+        liveResults.total_students = delta.total_students;
+        liveResults.voted_students = delta.voted_students;
+        appendVotedStudent(delta.student_id);
+        scheduleRender();
+    });
+    
+    // A signature was taken back because it could not be delivered
+    source.addEventListener('revoked', event => {
+        if (!liveResults) return;
+        const delta = JSON.parse(event.data);
+        liveResults.participation = delta.participation;
+        liveResults.total_students = delta.total_students;
+        liveResults.voted_students = delta.voted_students;
+        removeVotedStudent(delta.student_id);
+        scheduleRender();
+    });
+    
+    // EventSource reconnects by itself; poll until the next snapshot arrives
+    source.onerror = () => {
+        liveResults = null;
+        startPolling();
+    };
+}
+
+// Coalesce bursts of events into one re-render
+function scheduleRender() {
+    if (renderTimer) return;
+    renderTimer = setTimeout(() => {
+        renderTimer = null;
+        if (liveResults) applyResults(liveResults);
+    }, RENDER_THROTTLE_MS);
+}
+
+function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(function() {
+        fetchResults();
+        fetchVotedStudents();
+    }, POLL_INTERVAL_MS);
+}
+
+function stopPolling() {
+    if (!pollTimer) return;
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
@@ -10,6 +10,39 @@ let studentId = null;
 let clientId = null;
 let originalText = null;
 
+// Big integers travel as decimal strings, or with ?wire=binary as fixed-width
+// base64url, which is shorter and cheaper for the server to parse
+const BINARY_WIRE = new URLSearchParams(window.location.search).get('wire') === 'binary';
+const BINARY_CONTENT_TYPE = 'application/vnd.blind-vote.b64+json';
+
+// Encode a number below p for the server, see BINARY_WIRE
+function encodeBigInt(value) {
+    if (!BINARY_WIRE) return value.toString();
+    // Big-endian bytes, as many as p has
+    const width = Math.ceil(BigInt(publicKey.p).toString(16).length / 2);
+    const hex = value.toString(16).padStart(width * 2, '0');
+    let bytes = '';
+    for (let i = 0; i < hex.length; i += 2) {
+        bytes += String.fromCharCode(parseInt(hex.slice(i, i + 2), 16));
+    }
+    return btoa(bytes).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+}
+
+// Decode a number sent by the server, see BINARY_WIRE
+function decodeBigInt(text) {
+    if (!BINARY_WIRE) return BigInt(text);
+    const bytes = atob(text.replace(/-/g, '+').replace(/_/g, '/'));
+    let hex = '0';
+    for (let i = 0; i < bytes.length; i++) {
+        hex += bytes.charCodeAt(i).toString(16).padStart(2, '0');
+    }
+    return BigInt('0x' + hex);
+}
+
+function wireHeaders() {
+    return {'Content-Type': BINARY_WIRE ? BINARY_CONTENT_TYPE : 'application/json'};
+}
+
 // BigInt version of modular inverse
 function modInverseBigInt(a, m) {
     if (typeof a !== 'bigint') a = BigInt(a);
@@ -107,7 +140,76 @@ function modPow(base, exponent, modulus) {
     return result;
 }
 
-// Hash a message using a simple but effective method
+// SHA-256 round constants (first 32 bits of the fractional parts of the cube
+// roots of the first 64 primes)
+const SHA256_K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+]);
+
+// SHA-256 of a byte array, returned as a hex string.
+// crypto.subtle is only available in secure contexts (HTTPS), so the demo
+// ships its own implementation.
+function sha256Hex(bytes) {
+    const bitLength = bytes.length * 8;
+    const paddedLength = Math.ceil((bytes.length + 9) / 64) * 64;
+    const data = new Uint8Array(paddedLength);
+    data.set(bytes);
+    data[bytes.length] = 0x80;
+    const view = new DataView(data.buffer);
+    view.setUint32(paddedLength - 8, Math.floor(bitLength / 0x100000000));
+    view.setUint32(paddedLength - 4, bitLength >>> 0);
+
+    const h = new Uint32Array([
+        0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+        0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+    ]);
+    const w = new Uint32Array(64);
+    const rotr = (x, n) => (x >>> n) | (x << (32 - n));
+
+    for (let offset = 0; offset < paddedLength; offset += 64) {
+        for (let i = 0; i < 16; i++) {
+            w[i] = view.getUint32(offset + i * 4);
+        }
+        for (let i = 16; i < 64; i++) {
+            const s0 = rotr(w[i - 15], 7) ^ rotr(w[i - 15], 18) ^ (w[i - 15] >>> 3);
+            const s1 = rotr(w[i - 2], 17) ^ rotr(w[i - 2], 19) ^ (w[i - 2] >>> 10);
+            w[i] = w[i - 16] + s0 + w[i - 7] + s1;
+        }
+
+        let [a, b, c, d, e, f, g, hh] = h;
+        for (let i = 0; i < 64; i++) {
+            const S1 = rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25);
+            const ch = (e & f) ^ (~e & g);
+            const t1 = (hh + S1 + ch + SHA256_K[i] + w[i]) >>> 0;
+            const S0 = rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22);
+            const maj = (a & b) ^ (a & c) ^ (b & c);
+            const t2 = (S0 + maj) >>> 0;
+            hh = g;
+            g = f;
+            f = e;
+            e = (d + t1) >>> 0;
+            d = c;
+            c = b;
+            b = a;
+            a = (t1 + t2) >>> 0;
+        }
+
+        h[0] += a; h[1] += b; h[2] += c; h[3] += d;
+        h[4] += e; h[5] += f; h[6] += g; h[7] += hh;
+    }
+
+    return Array.from(h, x => x.toString(16).padStart(8, '0')).join('');
+}
+
+// Hash a message to an integer in [1, p-1], same as hash_to_int on the server:
+// SHA-256 of the UTF-8 bytes, mod (p - 1), plus 1
 function hashMessage(message, p) {
     try {
         // Validate inputs
@@ -126,24 +228,24 @@ function hashMessage(message, p) {
         // Convert p to BigInt
         const pBigInt = BigInt(p);
         
-        // Simple hash function
-        let hash = 0n;
-        for (let i = 0; i < message.length; i++) {
-            const char = message.charCodeAt(i);
-            hash = (hash * 31n + BigInt(char)) % pBigInt;
-        }
-        
-        // Ensure the hash is in range [1, p-1]
-        if (hash === 0n) hash = 1n;
-        
-        return hash;
+        const digest = sha256Hex(new TextEncoder().encode(message));
+        return BigInt('0x' + digest) % (pBigInt - 1n) + 1n;
     } catch (error) {
         console.error('Error in hashMessage:', error);
         throw error;
     }
 }
 
-// Generate a random client ID
+// Signatures are deterministic, so every voter signs "<candidate>#<nonce>"
+// with a random nonce of their own; with the bare candidate name all votes for
+// a candidate would share one signature and only the first would count.
+// crypto.getRandomValues, unlike crypto.subtle, also works without HTTPS
+function generateNonce() {
+    const bytes = new Uint8Array(16);
+    window.crypto.getRandomValues(bytes);
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+}
+
 function generateClientId() {
     return 'client_' + Math.random().toString(36).substring(2, 15);
 }
@@ -179,7 +281,7 @@ function setupEventListeners() {
             originalText = choice;
             
             // Save the raw message for later
-            rawMessage = choice;
+            rawMessage = choice + '#' + generateNonce();
             
             // Store ballot as integer representation
             originalBallot = stringToInt(choice).toString();
@@ -281,13 +383,11 @@ function setupEventListeners() {
         // Send the blinded ballot to the authority
         fetch('/sign-ballot', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: wireHeaders(),
             body: JSON.stringify({
                 student_id: studentId,
                 client_id: clientId,
-                blinded_ballot: blindedBallot.toString()
+                blinded_ballot: encodeBigInt(blindedBallot)
             })
         })
         .then(response => {
@@ -298,7 +398,7 @@ function setupEventListeners() {
         })
         .then(data => {
             // Display the blind signature
-            blindSignature = data.blind_signature;
+            blindSignature = decodeBigInt(data.blind_signature).toString();
             document.getElementById('blind-signature').textContent = blindSignature;
             document.getElementById('blind-signature-container').style.display = 'block';
             
@@ -365,12 +465,10 @@ function setupEventListeners() {
         // Submit the vote
         fetch('/submit-vote', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: wireHeaders(),
             body: JSON.stringify({
                 vote: rawMessage,
-                signature: unblindedSignature,
+                signature: encodeBigInt(BigInt(unblindedSignature)),
                 candidate: originalText // Send the readable candidate name for display
             })
         })
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+
+from app.utils.admission import (
+    Admission,
+    AdmissionRejected,
+    ConcurrencyLimiter,
+    RateLimiter,
+    parse_rate,
+)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_parse_rate(self):
+        """Limits are "rate/burst"; empty or zero disables them"""
+        self.assertEqual(parse_rate("2/10"), (2.0, 10.0))
+        self.assertEqual(parse_rate("5"), (5.0, 5.0))
+        self.assertIsNone(parse_rate(""))
+        self.assertIsNone(parse_rate("0"))
+        with self.assertRaises(ValueError):
+            parse_rate("-1/5")
+
+    def test_burst_then_rate(self):
+        """A key gets its burst at once, then tokens refill at the rate"""
+        limiter = RateLimiter(rate=2, burst=3)
+        self.assertEqual([limiter.acquire("a", now=0) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.acquire("a", now=0), 0.5)
+        # Other keys have their own bucket
+        self.assertEqual(limiter.acquire("b", now=0), 0)
+        self.assertEqual(limiter.acquire("a", now=0.5), 0)
+        self.assertGreater(limiter.acquire("a", now=0.5), 0)
+
+    def test_evicts_least_recently_seen(self):
+        """Only max_keys buckets are kept"""
+        limiter = RateLimiter(rate=1, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.acquire(key, now=0)
+        self.assertEqual(len(limiter), 2)
+        # "a" was evicted and starts with a full bucket again
+        self.assertEqual(limiter.acquire("a", now=0), 0)
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+
+    def test_queue_full_and_timeout(self):
+        """Beyond the limit requests queue; a full queue rejects at once"""
+
+        async def scenario():
+            slots = ConcurrencyLimiter(1, max_queue=1, queue_timeout=0.05)
+            await slots.acquire()
+            waiting = asyncio.ensure_future(slots.acquire())
+            await asyncio.sleep(0)
+            self.assertEqual(slots.queued, 1)
+
+            with self.assertRaises(AdmissionRejected) as full:
+                await slots.acquire()
+            self.assertEqual(full.exception.reason, "queue_full")
+
+            with self.assertRaises(AdmissionRejected) as timeout:
+                await waiting
+            self.assertEqual(timeout.exception.reason, "queue_timeout")
+            self.assertEqual((slots.in_flight, slots.queued), (1, 0))
+
+        asyncio.run(scenario())
+
+    def test_release_hands_over_in_order(self):
+        """A freed slot goes to the longest waiting request"""
+
+        async def scenario():
+            slots = ConcurrencyLimiter(1, max_queue=10, queue_timeout=5)
+            await slots.acquire()
+            order = []
+
+            async def wait(name):
+                await slots.acquire()
+                order.append(name)
+
+            tasks = [asyncio.ensure_future(wait(name)) for name in "abc"]
+            await asyncio.sleep(0)
+            for _ in tasks:
+                slots.release()
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+            self.assertEqual(order, ["a", "b", "c"])
+            self.assertEqual((slots.in_flight, slots.queued), (1, 0))
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_passes_slot_on(self):
+        """A client that disconnects while queued does not leak its slot"""
+
+        async def scenario():
+            slots = ConcurrencyLimiter(1, max_queue=10, queue_timeout=5)
+            await slots.acquire()
+            first = asyncio.ensure_future(slots.acquire())
+            second = asyncio.ensure_future(slots.acquire())
+            await asyncio.sleep(0)
+
+            # The slot is handed to first, which is cancelled before it runs
+            slots.release()
+            first.cancel()
+            await asyncio.sleep(0)
+            await second
+            self.assertTrue(first.cancelled())
+            slots.release()
+            self.assertEqual((slots.in_flight, slots.queued), (0, 0))
+
+        asyncio.run(scenario())
+
+
+class TestAdmission(unittest.TestCase):
+
+    def test_rate_limit_reason_and_retry_after(self):
+        """Each rate limit key is reported separately with a Retry-After"""
+
+        async def scenario():
+            admission = Admission(
+                "sign", 10, limits={"ip": (100, 100), "student": (0.1, 1)}
+            )
+            await admission.acquire(ip="10.0.0.1", student="anna")
+            admission.release()
+            with self.assertRaises(AdmissionRejected) as rejected:
+                await admission.acquire(ip="10.0.0.1", student="anna")
+            self.assertEqual(rejected.exception.reason, "rate_limited_student")
+            self.assertEqual(rejected.exception.retry_after_header, "10")
+
+            # Keys that are not given are not limited
+            await admission.acquire(ip="10.0.0.1")
+            self.assertEqual(admission.slots.in_flight, 1)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from app.utils.assets import IMMUTABLE, AssetFiles, AssetManifest, fingerprinted_name
+
+SCRIPT = b"console.log('Stimmzettel');\n" * 100
+
+
+def call(app, path, method="GET", headers=()):
+    """Run one request against an ASGI app, return (status, headers, body)"""
+    messages = []
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(k.encode(), v.encode()) for k, v in headers],
+        "query_string": b"",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], response_headers, body
+
+
+class TestAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.directory.name, "js"))
+        with open(os.path.join(self.directory.name, "js", "voting.js"), "wb") as f:
+            f.write(SCRIPT)
+        self.manifest = AssetManifest(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fingerprinted_name(self):
+        """The hash goes before the last extension"""
+        self.assertEqual(
+            fingerprinted_name("js/lib/qrcode.min.js", "0123456789abcdef"),
+            "js/lib/qrcode.min.0123456789ab.js",
+        )
+
+    def test_urls(self):
+        """Known files get a fingerprinted URL, unknown ones keep theirs"""
+        url = self.manifest.url("js/voting.js")
+        self.assertRegex(url, r"^/static/js/voting\.[0-9a-f]{12}\.js$")
+        self.assertEqual(self.manifest.url("js/missing.js"), "/static/js/missing.js")
+
+    def test_fingerprinted_file_is_immutable(self):
+        """Fingerprinted names are cached forever and served compressed"""
+        app = AssetFiles(self.manifest)
+        path = self.manifest.url("js/voting.js").removeprefix("/static")
+        status, headers, body = call(app, path, headers=[("accept-encoding", "gzip")])
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["cache-control"], IMMUTABLE)
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertLess(len(body), len(SCRIPT))
+
+    def test_original_name_revalidates(self):
+        """The original name is still served, with an ETag and 304"""
+        app = AssetFiles(self.manifest)
+        status, headers, body = call(app, "/js/voting.js")
+        self.assertEqual((status, body), (200, SCRIPT))
+        self.assertEqual(headers["cache-control"], "no-cache")
+        revalidate = [("if-none-match", headers["etag"])]
+        self.assertEqual(call(app, "/js/voting.js", headers=revalidate)[0], 304)
+
+    def test_unknown_paths_and_methods(self):
+        """Unknown files are 404, writes are 405"""
+        app = AssetFiles(self.manifest)
+        self.assertEqual(call(app, "/js/missing.js")[0], 404)
+        self.assertEqual(call(app, "/js/voting.js", method="POST")[0], 405)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import Future
+from app.utils.backends import MemoryBackend, SQLiteBackend, RedisBackend
+from app.utils.kvserver import KeyValueStore, handle_client
+from app.utils.resp import RespClient
+from app.utils.registry import ISSUED, NOT_AUTHORIZED, ALREADY_VOTED
+
+ROSTER = ["anna", "ben", "carl"]
+
+
+class BackendContract:
+    """Behaviour every state backend has to provide"""
+
+    def create_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_with_backend(self, scenario):
+        async def run():
+            backend = await self.create_backend()
+            try:
+                return await scenario(backend)
+            finally:
+                await backend.close()
+
+        return asyncio.run(run())
+
+    def test_issue_is_check_and_mark(self):
+        """Each eligible student gets exactly one signature"""
+
+        async def scenario(backend):
+            statuses = await asyncio.gather(*(backend.issue("anna") for _ in range(5)))
+            self.assertEqual(statuses.count(ISSUED), 1)
+            self.assertEqual(statuses.count(ALREADY_VOTED), 4)
+            self.assertEqual(await backend.issue("mallory"), NOT_AUTHORIZED)
+
+            await backend.issue("ben")
+            await backend.revoke("anna")
+            self.assertEqual(await backend.voted_ids(), ["ben"])
+            self.assertEqual(await backend.counters(), (0, 1))
+
+        self.run_with_backend(scenario)
+
+    def test_issue_many(self):
+        """Batch issuance reports a status per student in request order"""
+
+        async def scenario(backend):
+            await backend.issue("carl")
+            statuses = await backend.issue_many(["anna", "mallory", "anna", "carl"])
+            self.assertEqual(statuses, [ISSUED, NOT_AUTHORIZED, ALREADY_VOTED, ALREADY_VOTED])
+            self.assertEqual(await backend.voted_ids(), ["carl", "anna"])
+
+        self.run_with_backend(scenario)
+
+    def test_cast_counts_each_signature_once(self):
+        """Ballots are tallied and spent signatures are rejected"""
+
+        async def scenario(backend):
+            ballot = {"vote": "A", "message": "A", "signature": "11"}
+            self.assertEqual(await backend.cast(ballot), (1, 1))
+            self.assertIsNone(await backend.cast(dict(ballot)))
+            # Also while the first ballot with a signature is being stored
+            twice = {"vote": "B", "message": "B", "signature": "13"}
+            counted = await asyncio.gather(
+                backend.cast(twice), backend.cast(dict(twice))
+            )
+            self.assertEqual(sum(c is not None for c in counted), 1)
+            self.assertEqual(
+                await backend.cast({"vote": "A", "message": "A", "signature": "12"}),
+                (3, 2),
+            )
+            self.assertEqual(await backend.results(), (3, {"A": 2, "B": 1}, 0))
+
+        self.run_with_backend(scenario)
+
+    def test_ballots_in_counting_order(self):
+        """Accepted ballots are read back in order, page by page"""
+
+        async def scenario(backend):
+            for signature in ["5", "6", "5", "7"]:
+                await backend.cast({"vote": "A", "message": "A", "signature": signature})
+            ballots = await backend.ballots()
+            self.assertEqual([b["signature"] for b in ballots], ["5", "6", "7"])
+            self.assertEqual(ballots[0], {"vote": "A", "message": "A", "signature": "5"})
+            self.assertEqual(await backend.ballots(1, 1), ballots[1:2])
+            self.assertEqual(await backend.ballots(3), [])
+
+        self.run_with_backend(scenario)
+
+    def test_voted_changes(self):
+        """Pages and deltas of the voted log, including revocations"""
+
+        async def scenario(backend):
+            await backend.issue("anna")
+            await backend.issue_many(["ben", "carl"])
+
+            first = await backend.voted_changes(0, limit=2)
+            self.assertEqual(first["voted_students"], ["anna", "ben"])
+            self.assertFalse(first["complete"])
+            rest = await backend.voted_changes(first["sequence"], limit=2)
+            self.assertEqual(rest["voted_students"], ["carl"])
+            self.assertTrue(rest["complete"])
+            self.assertEqual(rest["epoch"], first["epoch"])
+
+            # Nothing new
+            idle = await backend.voted_changes(rest["sequence"])
+            self.assertEqual(idle["voted_students"], [])
+            self.assertEqual(idle["sequence"], rest["sequence"])
+
+            await backend.revoke("ben")
+            await backend.revoke("carl")
+            await backend.issue("carl")
+            delta = await backend.voted_changes(rest["sequence"])
+            self.assertEqual(delta["revoked"], ["ben", "carl"])
+            self.assertEqual(delta["voted_students"], ["carl"])
+
+            # A client starting now never sees the revoked issuances
+            full = await backend.voted_changes(0)
+            self.assertEqual(full["voted_students"], ["anna", "carl"])
+            self.assertEqual(full["revoked"], [])
+            self.assertEqual(full["voted_students"], await backend.voted_ids())
+
+        self.run_with_backend(scenario)
+
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+
+    async def create_backend(self):
+        return MemoryBackend(ROSTER, journal_dir=os.path.join(self.tmp.name, "journal"))
+
+    def test_state_survives_restart(self):
+        """The journal restores issued signatures and ballots"""
+
+        async def scenario(backend):
+            await backend.issue("carl")
+            await backend.cast({"vote": "B", "message": "B", "signature": "7"})
+
+        self.run_with_backend(scenario)
+
+        async def check(backend):
+            self.assertEqual(await backend.voted_ids(), ["carl"])
+            self.assertEqual(await backend.results(), (1, {"B": 1}, 1))
+            self.assertIsNone(
+                await backend.cast({"vote": "B", "message": "B", "signature": "7"})
+            )
+
+        self.run_with_backend(check)
+
+
+    def test_failed_write_is_undone(self):
+        """What could not be written to the journal is neither issued nor counted"""
+
+        async def scenario(backend):
+            append = backend.journal.append
+
+            def failing_append(record):
+                written = Future()
+                written.set_exception(OSError(28, "No space left on device"))
+                return written
+
+            backend.journal.append = failing_append
+            ballot = {"vote": "A", "message": "A", "signature": "7"}
+            with self.assertRaises(OSError):
+                await backend.cast(ballot)
+            with self.assertRaises(OSError):
+                await backend.issue("anna")
+            with self.assertRaises(OSError):
+                await backend.issue_many(["ben", "carl"])
+            self.assertEqual(await backend.results(), (0, {}, 0))
+            self.assertEqual(await backend.ballots(), [])
+
+            # Once the disk works again, voters can retry
+            backend.journal.append = append
+            self.assertEqual(await backend.cast(ballot), (1, 1))
+            self.assertEqual(await backend.issue_many(["anna", "ben"]), [ISSUED] * 2)
+
+            # A revocation that was not written keeps the student marked
+            backend.journal.append = failing_append
+            with self.assertRaises(OSError):
+                await backend.revoke("anna")
+            self.assertCountEqual(await backend.voted_ids(), ["anna", "ben"])
+
+        self.run_with_backend(scenario)
+
+    def test_revoke_survives_compaction(self):
+        """A revocation whose record starts a compaction is not lost"""
+        journal_dir = os.path.join(self.tmp.name, "journal")
+
+        async def scenario():
+            backend = MemoryBackend(ROSTER, journal_dir=journal_dir, snapshot_every=2)
+            await backend.issue("anna")
+            await backend.revoke("anna")
+            await backend.close()
+
+            backend = MemoryBackend(ROSTER, journal_dir=journal_dir)
+            self.assertEqual(await backend.voted_ids(), [])
+            await backend.close()
+
+        asyncio.run(scenario())
+
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+
+    async def create_backend(self):
+        return SQLiteBackend(ROSTER, os.path.join(self.tmp.name, "election.db"))
+
+
+class TestRedisBackend(BackendContract, unittest.TestCase):
+
+    async def create_backend(self):
+        store = KeyValueStore()
+        server = await asyncio.start_server(
+            lambda r, w: handle_client(store, r, w), "127.0.0.1", 0
+        )
+        self.url = f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}/0"
+        return RedisBackend(ROSTER, self.url)
+
+    def test_workers_race(self):
+        """Workers on their own connections check-and-mark atomically"""
+
+        async def scenario(backend):
+            workers = [RedisBackend(ROSTER, self.url) for _ in range(4)]
+            ballot = {"vote": "A", "message": "A", "signature": "21"}
+            counted = await asyncio.gather(*(w.cast(dict(ballot)) for w in workers))
+            self.assertEqual(sum(c is not None for c in counted), 1)
+            statuses = await asyncio.gather(
+                *(w.issue("anna") for w in workers),
+                *(w.issue_many(["anna", "ben"]) for w in workers),
+            )
+            issued = statuses[:4] + [s for batch in statuses[4:] for s in batch]
+            self.assertEqual(issued.count(ISSUED), 2)
+            self.assertEqual(await backend.voted_ids(), ["anna", "ben"])
+            await asyncio.gather(*(w.revoke("anna") for w in workers))
+            changes = await backend.voted_changes(2)
+            self.assertEqual(changes["revoked"], ["anna"])
+            self.assertEqual(await backend.counters(), (1, 1))
+            for worker in workers:
+                await worker.close()
+
+        self.run_with_backend(scenario)
+
+
+class TestWatch(unittest.TestCase):
+
+    def test_exec_aborts_after_concurrent_write(self):
+        """A transaction runs nothing if a watched key changed since WATCH"""
+
+        async def scenario():
+            store = KeyValueStore()
+            server = await asyncio.start_server(
+                lambda r, w: handle_client(store, r, w), "127.0.0.1", 0
+            )
+            port = server.sockets[0].getsockname()[1]
+            first, second = RespClient(port=port), RespClient(port=port)
+            async with first.watch("key") as conn:
+                self.assertEqual(await conn.execute("EXISTS", "key"), 0)
+                await second.execute("SET", "key", "other")
+                self.assertIsNone(await conn.transaction(("SET", "key", "mine")))
+            self.assertEqual(await first.execute("GET", "key"), b"other")
+
+            async with first.watch("key") as conn:
+                await second.execute("SET", "unrelated", 1)
+                self.assertEqual(
+                    await conn.transaction(("SET", "key", "mine")), ["OK"]
+                )
+            self.assertEqual(await first.execute("LPOS", "missing", "x"), None)
+            await first.execute("RPUSH", "log", "a", "b", "a")
+            self.assertEqual(await first.execute("LPOS", "log", "a", "RANK", -1), 2)
+            await first.close()
+            await second.close()
+            server.close()
+
+        asyncio.run(scenario())
+
+    def test_cancelled_command_drops_connection(self):
+        """A reply left unread by a cancellation never answers a later command"""
+
+        async def scenario():
+            store, replying = KeyValueStore(), asyncio.Event()
+
+            async def slow_client(reader, writer):
+                await replying.wait()
+                await handle_client(store, reader, writer)
+
+            server = await asyncio.start_server(slow_client, "127.0.0.1", 0)
+            client = RespClient(port=server.sockets[0].getsockname()[1])
+            task = asyncio.ensure_future(client.execute("SET", "key", "value"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            replying.set()
+            self.assertIsNone(await client.execute("GET", "other"))
+            await client.close()
+            server.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import unittest
+import app.main as server
+from app.utils.broadcast import Broadcaster, format_sse
+from app.test_tally import make_election
+
+
+def parse_sse(message):
+    """(event, data) of one encoded event"""
+    lines = message.strip().split("\n")
+    return lines[0][len("event: ") :], json.loads(lines[1][len("data: ") :])
+
+
+class TestBroadcaster(unittest.TestCase):
+
+    def test_format(self):
+        """Events are encoded as event and data lines and a blank line"""
+        message = format_sse("vote", {"candidate": "A", "count": 2})
+        self.assertEqual(
+            message, 'event: vote\ndata: {"candidate": "A", "count": 2}\n\n'
+        )
+        self.assertEqual(parse_sse(message), ("vote", {"candidate": "A", "count": 2}))
+
+    def test_fan_out(self):
+        """Every subscriber receives every event in order"""
+
+        async def scenario():
+            broadcaster = Broadcaster()
+            first, second = broadcaster.subscribe(), broadcaster.subscribe()
+            self.assertEqual(broadcaster.subscriber_count, 2)
+            broadcaster.publish("vote", 1)
+            broadcaster.publish("vote", 2)
+            for subscription in (first, second):
+                received = [await subscription.get(1) for _ in range(2)]
+                self.assertEqual([parse_sse(m)[1] for m in received], [1, 2])
+
+            broadcaster.unsubscribe(first)
+            broadcaster.publish("vote", 3)
+            self.assertTrue(first.queue.empty())
+            self.assertEqual(parse_sse(await second.get(1))[1], 3)
+            with self.assertRaises(asyncio.TimeoutError):
+                await second.get(0.01)
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_dropped(self):
+        """A full queue drops the subscriber after its pending events"""
+
+        async def scenario():
+            broadcaster = Broadcaster(max_queue=2)
+            slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+            for value in range(2):
+                broadcaster.publish("vote", value)
+                await fast.get(1)
+            broadcaster.publish("vote", 2)
+            self.assertEqual(broadcaster.subscriber_count, 1)
+            self.assertEqual(parse_sse(await fast.get(1))[1], 2)
+
+            # The slow client gets what was queued, then the end of its stream
+            received = [await slow.get(1) for _ in range(2)]
+            self.assertEqual([parse_sse(m)[1] for m in received], [0, 1])
+            self.assertIsNone(await slow.get(1))
+
+        asyncio.run(scenario())
+
+
+class TestResultsStream(unittest.TestCase):
+
+    def setUp(self):
+        self.election = make_election()
+        server.default_election, server.state = self.election, self.election.state
+
+    def tearDown(self):
+        server.default_election = server.state = None
+
+    def test_snapshot_then_changes(self):
+        """The stream starts with a snapshot and follows votes and revocations"""
+
+        async def scenario():
+            state = self.election.state
+            await state.issue("anna")
+            response = await server.results_stream()
+            self.assertEqual(response.media_type, "text/event-stream")
+            events = response.body_iterator
+
+            event, snapshot = parse_sse(await events.__anext__())
+            self.assertEqual(event, "snapshot")
+            # Only the count, the list is paged from /voted-students
+            self.assertEqual(list(snapshot), ["results"])
+            self.assertEqual(snapshot["results"]["voted_students"], 1)
+
+            await server.revoke_signature(self.election, "anna")
+            event, delta = parse_sse(await events.__anext__())
+            self.assertEqual(event, "revoked")
+            self.assertEqual(delta["student_id"], "anna")
+            self.assertEqual(delta["voted_students"], 0)
+
+            await events.aclose()
+            self.assertEqual(self.election.broadcaster.subscriber_count, 0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
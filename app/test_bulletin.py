@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import json
+import unittest
+from app.utils.backends import MemoryBackend
+from app.utils.bulletin import (
+    BulletinBoard,
+    MerkleTree,
+    leaf_hash,
+    node_hash,
+    verify_inclusion,
+)
+
+
+def reference_root(leaves):
+    """Merkle tree hash as defined in RFC 9162, computed from scratch"""
+    if len(leaves) == 1:
+        return leaves[0]
+    split = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return node_hash(reference_root(leaves[:split]), reference_root(leaves[split:]))
+
+
+class TestMerkleTree(unittest.TestCase):
+
+    def test_root_matches_rfc_definition(self):
+        """Incremental roots equal the recursive definition at every size"""
+        tree, leaves = MerkleTree(), []
+        for i in range(70):
+            leaves.append(leaf_hash("A", "A", i))
+            self.assertEqual(tree.append(leaves[-1]), i)
+            self.assertEqual(tree.root(), reference_root(leaves))
+
+    def test_inclusion_proofs(self):
+        """Every leaf has a proof for the current root, and only for its index"""
+        tree, leaves = MerkleTree(), []
+        for size in range(1, 40):
+            leaves.append(leaf_hash("B", "B", size))
+            tree.append(leaves[-1])
+            root = tree.root()
+            for index in range(size):
+                path = tree.proof(index)
+                self.assertLessEqual(len(path), size.bit_length())
+                leaf = leaves[index]
+                self.assertTrue(verify_inclusion(leaf, index, size, path, root))
+                if size > 1:
+                    other = leaves[(index + 1) % size]
+                    self.assertFalse(verify_inclusion(other, index, size, path, root))
+                    tampered = [path[0][::-1]] + path[1:]
+                    self.assertFalse(
+                        verify_inclusion(leaf, index, size, tampered, root)
+                    )
+        with self.assertRaises(IndexError):
+            tree.proof(39)
+
+
+class TestBulletinBoard(unittest.TestCase):
+
+    def test_leaf_commits_to_message(self):
+        """A leaf is the compact JSON of candidate, message and signature"""
+        data = json.dumps(["Jörg", "Jörg", "42"], ensure_ascii=False)
+        data = data.replace(", ", ",").encode("utf-8")
+        self.assertEqual(
+            leaf_hash("Jörg", "Jörg", 42), hashlib.sha256(b"\x00" + data).digest()
+        )
+        self.assertNotEqual(leaf_hash("A", "A", 42), leaf_hash("A", "B", 42))
+
+    def test_follows_backend(self):
+        """The board catches up with ballots cast since its last sync"""
+
+        async def scenario():
+            backend = MemoryBackend(["anna"])
+            board = BulletinBoard()
+            await board.sync(backend)
+            self.assertEqual(board.root()["tree_size"], 0)
+            for signature in ["11", "12", "13"]:
+                ballot = {"vote": "A", "message": "A", "signature": signature}
+                await backend.cast(ballot)
+            await board.sync(backend)
+            await board.sync(backend)
+            self.assertEqual(len(board), 3)
+
+            # Signatures are looked up by value, like spent signatures
+            proof = board.proof("0012")
+            self.assertEqual(proof["index"], 1)
+            self.assertEqual(proof["leaf"], leaf_hash("A", "A", 12).hex())
+            self.assertEqual(proof["root"], board.root()["root"])
+            self.assertIsNone(board.proof(14))
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
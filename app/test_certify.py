@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from app.utils.backends import MemoryBackend
+from app.utils.certify import certify, find_invalid, is_safe_prime, jacobi
+from app.utils.crypto import generate_keys, message_to_int
+from app.utils.groups import standard_group
+
+
+async def run_inline(fn, *args):
+    return fn(*args)
+
+
+class TestFindInvalid(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        _, cls.private_key = generate_keys(standard_group("ffdhe", 2048))
+
+    def signed(self, message):
+        p, x = self.private_key["p"], self.private_key["x"]
+        h = message_to_int(message, p)
+        return h, pow(h, x, p)
+
+    def test_jacobi(self):
+        """The Jacobi symbol of a prime is Euler's criterion"""
+        for p in (1019, 9973):
+            for a in range(p):
+                euler = pow(a, (p - 1) // 2, p)
+                self.assertEqual(jacobi(a, p), -1 if euler == p - 1 else euler)
+
+    def test_safe_primes(self):
+        """Standard groups are safe primes, the demo group is not"""
+        self.assertTrue(is_safe_prime(self.private_key["p"]))
+        self.assertFalse(is_safe_prime(generate_keys()[1]["p"]))
+
+    def test_batch_finds_every_invalid_pair(self):
+        """Batches find altered, negated and out-of-range signatures"""
+        p = self.private_key["p"]
+        pairs = [self.signed(f"A#{i}") for i in range(12)]
+        pairs[2] = (pairs[2][0], pairs[2][1] * 3 % p)
+        pairs[5] = (pairs[5][0], p - pairs[5][1])
+        pairs[8] = (pairs[8][0], pairs[8][1] + p)
+        pairs[11] = (pairs[11][0], 0)
+        for batch in (True, False):
+            self.assertEqual(
+                find_invalid(pairs, self.private_key, batch), [2, 5, 8, 11]
+            )
+        self.assertEqual(find_invalid(pairs[:2], self.private_key), [])
+
+    def test_certify(self):
+        """Every stored ballot is checked and only valid ones are counted"""
+
+        async def scenario():
+            backend = MemoryBackend(["anna"])
+
+            async def cast(vote, message, signature):
+                ballot = {"vote": vote, "message": message, "signature": signature}
+                await backend.cast(ballot)
+
+            for i in range(30):
+                vote = "AB"[i % 2]
+                _, signature = self.signed(f"{vote}#{i}")
+                if i in (7, 20):
+                    signature += 1
+                await cast(vote, f"{vote}#{i}", str(signature))
+            # Signed, but stored under another name or for no candidate
+            await cast("A", "B#30", str(self.signed("B#30")[1]))
+            await cast("C", "C#31", str(self.signed("C#31")[1]))
+            await cast("A", "A#32", "0")
+
+            result = await certify(
+                backend,
+                self.private_key,
+                run_inline,
+                candidates=["A", "B"],
+                chunk_size=8,
+                job_size=3,
+            )
+            self.assertTrue(result["batch"])
+            self.assertEqual((result["ballots"], result["valid"]), (33, 28))
+            self.assertEqual(
+                [(b["index"], b["reason"]) for b in result["invalid"]],
+                [
+                    (7, "signature"),
+                    (20, "signature"),
+                    (30, "message"),
+                    (31, "message"),
+                    (32, "signature"),
+                ],
+            )
+            self.assertEqual(result["votes"], {"A": 14, "B": 14})
+
+            # Without a candidate list only the mismatched name fails
+            result = await certify(backend, self.private_key, run_inline)
+            self.assertEqual(result["valid"], 29)
+            self.assertEqual(result["votes"]["C"], 1)
+
+            # Only the ballots under a bulletin board root, one at a time
+            result = await certify(
+                backend, self.private_key, run_inline, size=10, batch=False
+            )
+            self.assertEqual((result["ballots"], result["valid"]), (10, 9))
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
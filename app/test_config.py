@@ -0,0 +1,69 @@
+import unittest
+
+from app.utils.config import ConfigError, load_config
+
+ENVIRONMENT = {
+    "COURSE_NAME": "Informatik 1",
+    "VOTING_STUDENTS": "anna, ben,carl,",
+    "CANDIDATES": "A,B",
+}
+
+
+class TestConfig(unittest.TestCase):
+
+    def test_defaults_and_lists(self):
+        """Lists are split and trimmed, unset variables use their defaults"""
+        config = load_config(ENVIRONMENT)
+        self.assertEqual(config.voting_students, ("anna", "ben", "carl"))
+        self.assertEqual(config.candidates, ("A", "B"))
+        self.assertIsNone(config.key_bits)
+        self.assertEqual(config.state_backend, "memory")
+        self.assertEqual(config.rate_limit_student, (0.2, 5.0))
+        self.assertTrue(config.journal_group_commit)
+        self.assertEqual(config.dh_pool_size, 32)
+
+    def test_immutable(self):
+        """Settings cannot be changed after loading"""
+        config = load_config(ENVIRONMENT)
+        with self.assertRaises(AttributeError):
+            config.course_name = "Mathe"
+
+    def test_reports_every_error(self):
+        """All missing and invalid variables are listed in one error"""
+        environment = {
+            "VOTING_STUDENTS": "anna",
+            "CANDIDATES": " , ",
+            "KEY_BITS": "many",
+            "STATE_BACKEND": "postgres",
+            "LOG_LEVEL": "LOUD",
+        }
+        with self.assertRaises(ConfigError) as error:
+            load_config(environment)
+        message = str(error.exception)
+        for name in ("COURSE_NAME", "CANDIDATES", "KEY_BITS", "STATE_BACKEND"):
+            self.assertIn(name, message)
+        self.assertIn("LOG_LEVEL", message)
+        self.assertNotIn("VOTING_STUDENTS", message)
+
+    def test_students_from_one_source(self):
+        """Exactly one of VOTING_STUDENTS and ROSTER_FILE must be set"""
+        config = load_config(
+            {**ENVIRONMENT, "VOTING_STUDENTS": "", "ROSTER_FILE": "students.csv"}
+        )
+        self.assertEqual(config.voting_students, ())
+        self.assertEqual(config.roster_file, "students.csv")
+        self.assertEqual(config.roster_column, "student_id")
+
+        for students, roster_file in [("", ""), ("anna", "students.csv")]:
+            environment = {
+                **ENVIRONMENT,
+                "VOTING_STUDENTS": students,
+                "ROSTER_FILE": roster_file,
+            }
+            with self.assertRaises(ConfigError) as error:
+                load_config(environment)
+            self.assertIn("ROSTER_FILE", str(error.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import unittest
+from starlette.requests import Request
+from app import main as server
+from app.utils.admission import Admission
+from app.utils.crypto import generate_keys, generate_server_dh_pairs
+from app.utils.dh import DHKeyPool, DHSessionStore
+from app.utils.executor import CryptoExecutor, CryptoOverloaded
+from app.test_tally import make_election
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDHSessionStore(unittest.TestCase):
+
+    def test_sessions_expire(self):
+        """A session is gone ttl seconds after it was created"""
+        clock = FakeClock()
+        store = DHSessionStore(ttl=10, clock=clock)
+        store.create(11)
+        clock.now = 6
+        store.create(22)
+        self.assertEqual(len(store), 2)
+        clock.now = 10
+        self.assertEqual(len(store), 1)
+        clock.now = 16
+        self.assertEqual(len(store), 0)
+
+    def test_bounded(self):
+        """Beyond max_sessions the oldest sessions make room"""
+        clock = FakeClock()
+        store = DHSessionStore(max_sessions=2, ttl=10, clock=clock)
+        for key in range(3):
+            clock.now = key
+            store.create(key)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.evictions, 1)
+        # The sessions of t = 1 and t = 2 are left, so one expires at 11
+        clock.now = 11
+        self.assertEqual(len(store), 1)
+
+
+class TestDHKeyPool(unittest.TestCase):
+
+    def setUp(self):
+        self.public_key, _ = generate_keys()
+        self.calls = []
+
+    async def produce(self, count):
+        self.calls.append(count)
+        await asyncio.sleep(0)
+        return generate_server_dh_pairs(self.public_key, count)
+
+    def test_pairs(self):
+        """Pairs are b with B = g^b mod p"""
+        p, g = self.public_key["p"], self.public_key["g"]
+        for b, B in generate_server_dh_pairs(self.public_key, 20):
+            self.assertTrue(1 < b < p - 1)
+            self.assertEqual(B, pow(g, b, p))
+
+    def test_refilled_in_background(self):
+        """Requests take ready pairs and the pool fills up again"""
+
+        async def scenario():
+            pool = DHKeyPool(self.produce, size=6, batch=4)
+            pool.start()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            self.assertEqual(len(pool), 6)
+            self.assertEqual(self.calls, [4, 2])
+
+            pairs = [await pool.take() for _ in range(3)]
+            self.assertEqual(len({b for b, _ in pairs}), 3)
+            self.assertEqual((pool.hits, pool.misses), (3, 0))
+            for _ in range(10):
+                await asyncio.sleep(0)
+            self.assertEqual(len(pool), 6)
+            await pool.stop()
+
+        asyncio.run(scenario())
+
+    def test_empty_pool_computes_pair(self):
+        """Without ready pairs a request computes its own"""
+
+        async def scenario():
+            pool = DHKeyPool(self.produce, size=0)
+            await pool.take()
+            self.assertEqual((pool.hits, pool.misses), (0, 1))
+            self.assertEqual(self.calls, [1])
+
+            async def overloaded(count):
+                raise CryptoOverloaded("full")
+
+            with self.assertRaises(CryptoOverloaded):
+                await DHKeyPool(overloaded).take()
+
+        asyncio.run(scenario())
+
+
+class TestDHExchange(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = {
+            name: getattr(server, name)
+            for name in [
+                "keys", "default_election", "admissions", "crypto_executor",
+                "dh_pool", "dh_sessions",
+            ]
+        }
+        server.default_election = make_election()
+        server.keys = server.default_election.keys
+        server.crypto_executor = CryptoExecutor("inline")
+        server.dh_sessions = DHSessionStore()
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(server, name, value)
+
+    def test_admission_control(self):
+        """/dh-exchange is rate limited per IP like signing and voting"""
+        public_key = server.keys["public_key"]
+        server.admissions = {
+            "dh": Admission("dh", 1, limits={"ip": (0.001, 2)}),
+        }
+
+        async def produce(count):
+            return generate_server_dh_pairs(public_key, count)
+
+        def request(ip):
+            body = json.dumps({"A": str(pow(public_key["g"], 5, public_key["p"]))})
+
+            async def receive():
+                return {"type": "http.request", "body": body.encode()}
+
+            scope = {"type": "http", "method": "POST", "headers": []}
+            return Request(dict(scope, client=(ip, 1)), receive)
+
+        async def scenario():
+            server.dh_pool = DHKeyPool(produce, size=0)
+            first = await server.dh_exchange(request("10.0.0.1"))
+            self.assertIn("session_id", first)
+            self.assertEqual(len(server.dh_sessions), 1)
+            await server.dh_exchange(request("10.0.0.1"))
+            shed = await server.dh_exchange(request("10.0.0.1"))
+            self.assertEqual(shed.status_code, 429)
+            other = await server.dh_exchange(request("10.0.0.2"))
+            self.assertIn("B", other)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from app.utils.elections import (
+    ElectionNotFound,
+    ElectionShards,
+    election_path,
+    load_definition,
+)
+
+
+class FakeState:
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeElection:
+    """Stands in for Election: only what ElectionShards touches"""
+
+    def __init__(self, election_id):
+        self.id = election_id
+        self.state = FakeState()
+        self.users = 0
+        self.last_used = 0
+
+    async def close(self):
+        await self.state.close()
+
+
+class TestElectionShards(unittest.TestCase):
+
+    def setUp(self):
+        self.opened = []
+
+    async def open_election(self, election_id):
+        if election_id == "missing":
+            raise ElectionNotFound(election_id)
+        await asyncio.sleep(0.01)
+        election = FakeElection(election_id)
+        self.opened.append(election)
+        return election
+
+    def test_concurrent_requests_share_one_load(self):
+        """An election is loaded once, however many requests wait for it"""
+
+        async def scenario():
+            shards = ElectionShards(self.open_election)
+            elections = await asyncio.gather(*(shards.acquire("a") for _ in range(5)))
+            self.assertEqual(len(self.opened), 1)
+            self.assertTrue(all(e is self.opened[0] for e in elections))
+            self.assertEqual(self.opened[0].users, 5)
+            with self.assertRaises(ElectionNotFound):
+                await shards.acquire("missing")
+            await shards.close()
+
+        asyncio.run(scenario())
+
+    def test_least_recently_used_is_evicted(self):
+        """Beyond max_active the least recently used idle election is closed"""
+
+        async def scenario():
+            shards = ElectionShards(self.open_election, max_active=2)
+            for election_id in ["a", "b", "a", "c"]:
+                shards.release(await shards.acquire(election_id))
+            await asyncio.sleep(0)
+            self.assertEqual(len(shards), 2)
+            a, b, c = self.opened
+            self.assertTrue(b.state.closed)
+            self.assertFalse(a.state.closed or c.state.closed)
+
+            # Loading it again gives a fresh election
+            shards.release(await shards.acquire("b"))
+            self.assertEqual(len(self.opened), 4)
+            self.assertEqual(shards.evictions, 2)
+            await shards.close()
+            self.assertTrue(all(e.state.closed for e in self.opened))
+
+        asyncio.run(scenario())
+
+    def test_elections_in_use_stay_loaded(self):
+        """Neither the size limit nor idleness evicts an election in use"""
+
+        async def scenario():
+            shards = ElectionShards(self.open_election, max_active=1, idle_seconds=0)
+            a = await shards.acquire("a")
+            b = await shards.acquire("b")
+            self.assertEqual(len(shards), 2)
+            shards.release(a)
+            shards.release(b)
+            c = await shards.acquire("c")
+            await asyncio.sleep(0)
+            self.assertEqual(len(shards), 1)
+            self.assertTrue(a.state.closed and b.state.closed)
+            self.assertFalse(c.state.closed)
+            shards.release(c)
+            await shards.close()
+
+        asyncio.run(scenario())
+
+
+class TestDefinition(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, election_id, definition):
+        path = os.path.join(self.directory, election_id)
+        os.makedirs(path)
+        with open(os.path.join(path, "election.json"), "w") as f:
+            json.dump(definition, f)
+        return path
+
+    def test_election_path(self):
+        """Only well-formed ids with an election.json are elections"""
+        path = self.write("info-1", {})
+        self.assertEqual(election_path(self.directory, "info-1"), path)
+        for election_id in ["info-2", "../info-1", "Info-1", ""]:
+            with self.assertRaises(ElectionNotFound):
+                election_path(self.directory, election_id)
+
+    def test_load_definition(self):
+        """Students come from a list or a roster file, not both"""
+        definition = {
+            "course_name": "Info",
+            "candidates": ["A", " "],
+            "voting_students": ["x"],
+        }
+        path = self.write("a", definition)
+        definition = load_definition(path)
+        self.assertEqual(definition["candidates"], ("A",))
+        self.assertEqual(definition["voting_students"], ("x",))
+        self.assertIsNone(definition["roster_file"])
+
+        path = self.write("b", {"course_name": "Info", "candidates": ["A"]})
+        with self.assertRaises(ValueError):
+            load_definition(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
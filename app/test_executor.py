@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import unittest
+
+from app.utils.executor import CryptoExecutor, CryptoOverloaded, resolve_mode
+
+
+class TestCryptoExecutor(unittest.TestCase):
+
+    def test_modes_compute_same_result(self):
+        """Inline, thread and process mode all return the function result"""
+        for mode in ("inline", "thread", "process"):
+            executor = CryptoExecutor(mode, workers=2)
+            try:
+                result = asyncio.run(executor.run(pow, 7, 12345, 9973))
+            finally:
+                executor.shutdown()
+            self.assertEqual(result, pow(7, 12345, 9973), mode)
+            self.assertEqual(executor.completed, 1)
+            self.assertEqual(executor.pending, 0)
+
+    def test_rejects_when_max_pending_reached(self):
+        """Calls beyond max_pending fail fast instead of queueing"""
+        executor = CryptoExecutor("thread", workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def scenario():
+            blocked = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(CryptoOverloaded):
+                await executor.run(pow, 2, 10, 97)
+            release.set()
+            await blocked
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+
+        stats = executor.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["peak_pending"], 1)
+
+    def test_failures_are_counted_and_raised(self):
+        """Exceptions propagate and do not leak pending slots"""
+        executor = CryptoExecutor("inline")
+        with self.assertRaises(ValueError):
+            asyncio.run(executor.run(int, "not a number"))
+        self.assertEqual(executor.failed, 1)
+        self.assertEqual(executor.pending, 0)
+
+    def test_resolve_auto_mode(self):
+        """auto offloads large keys only; unknown modes are rejected"""
+        self.assertEqual(resolve_mode("auto", 14), "inline")
+        self.assertEqual(resolve_mode("auto", 2048), "process")
+        self.assertEqual(resolve_mode("thread", 2048), "thread")
+        with self.assertRaises(ValueError):
+            resolve_mode("gpu", 2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
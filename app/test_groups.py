@@ -0,0 +1,79 @@
+import os
+import random
+import tempfile
+import unittest
+
+from app.utils.crypto import generate_keys
+from app.utils.groups import (
+    STANDARD_PRIMES,
+    generate_safe_prime,
+    is_probable_prime,
+    load_group,
+    search_window,
+)
+
+
+class TestGroups(unittest.TestCase):
+
+    def test_standard_groups(self):
+        """The RFC groups have the advertised size and are safe primes"""
+        for name, p in STANDARD_PRIMES.items():
+            self.assertEqual(p.bit_length(), int(name[-4:]), name)
+        for name in ("modp2048", "ffdhe2048"):
+            p = STANDARD_PRIMES[name]
+            self.assertTrue(is_probable_prime(p, rounds=2), name)
+            self.assertTrue(is_probable_prime((p - 1) // 2, rounds=2), name)
+
+    def test_miller_rabin(self):
+        """Known primes pass, composites and Carmichael numbers fail"""
+        for n in (2, 3, 5, 9973, 2**127 - 1):
+            self.assertTrue(is_probable_prime(n), n)
+        for n in (1, 4, 9, 561, 41041, 9973 * 9967, 2**128 + 1):
+            self.assertFalse(is_probable_prime(n), n)
+
+    def test_generate_safe_prime(self):
+        """Generated primes have the requested size and are safe"""
+        for bits in (64, 128):
+            p = generate_safe_prime(bits, workers=0)
+            self.assertEqual(p.bit_length(), bits)
+            self.assertTrue(is_probable_prime(p))
+            self.assertTrue(is_probable_prime((p - 1) // 2))
+
+    def test_sieve_keeps_safe_primes(self):
+        """The sieve finds the same first safe prime as testing every candidate"""
+        bits, window = 64, 2048
+        for seed in range(5):
+            q0 = random.Random(seed).getrandbits(bits - 1) | (1 << (bits - 2)) | 1
+            expected = None
+            for k in range(window):
+                q = q0 + 2 * k
+                if is_probable_prime(q) and is_probable_prime(2 * q + 1):
+                    expected = 2 * q + 1
+                    break
+            self.assertEqual(search_window(bits, seed, window), expected)
+
+    def test_load_group(self):
+        """Standard sizes load directly, other sizes are generated once and cached"""
+        with tempfile.TemporaryDirectory() as directory:
+            group = load_group(2048, "ffdhe", directory)
+            self.assertEqual(group["name"], "ffdhe2048")
+            self.assertEqual(os.listdir(directory), [])
+
+            generated = load_group(96, "ffdhe", directory, workers=0)
+            self.assertEqual(generated["p"].bit_length(), 96)
+            self.assertEqual(os.listdir(directory), ["safe-prime-96.json"])
+            self.assertEqual(load_group(96, "generate", directory), generated)
+
+            with self.assertRaises(ValueError):
+                load_group(2048, "dsa", directory)
+
+    def test_generate_keys_for_group(self):
+        """Keys use p and g of the given group"""
+        group = load_group(2048, "modp")
+        public_key, private_key = generate_keys(group)
+        self.assertEqual(public_key["p"], group["p"])
+        self.assertEqual(public_key["y"], pow(2, private_key["x"], group["p"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
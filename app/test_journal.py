@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from app.utils import journal
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_survive_reopen(self):
+        """Appended records are replayed in order"""
+        log = journal.Journal(self.directory)
+        futures = [log.append({"op": "sign", "student_id": f"s{i}"}) for i in range(5)]
+        for future in futures:
+            self.assertTrue(future.result(timeout=5))
+        log.close()
+
+        state, records = journal.load(self.directory)
+        self.assertIsNone(state)
+        self.assertEqual([r["student_id"] for r in records], ["s0", "s1", "s2", "s3", "s4"])
+
+    def test_snapshot_replaces_sealed_segments(self):
+        """Only records after the snapshot are replayed"""
+        log = journal.Journal(self.directory, group_commit=False)
+        log.append({"op": "sign", "student_id": "old"})
+        sealed = log.rotate().result(timeout=5)
+        log.append({"op": "sign", "student_id": "new"}).result(timeout=5)
+        log.write_snapshot({"voted_students": ["old"]}, sealed)
+        log.close()
+
+        state, records = journal.load(self.directory)
+        self.assertEqual(state, {"voted_students": ["old"]})
+        self.assertEqual(records, [{"op": "sign", "student_id": "new"}])
+        self.assertNotIn(sealed, journal.list_segments(self.directory))
+
+    def test_torn_tail_is_ignored(self):
+        """A record cut off by a crash does not prevent recovery"""
+        log = journal.Journal(self.directory)
+        log.append({"op": "sign", "student_id": "ok"}).result(timeout=5)
+        log.close()
+
+        segment = journal.list_segments(self.directory)[-1]
+        with open(os.path.join(self.directory, f"{segment:08d}.log"), "ab") as f:
+            f.write(b'{"op":"sign","stud')
+
+        _, records = journal.load(self.directory)
+        self.assertEqual(records, [{"op": "sign", "student_id": "ok"}])
+
+    def test_failed_write_leaves_no_partial_record(self):
+        """Records after a failed, half written one are still replayed"""
+
+        class TornFile:
+            # Writes half of the data, as on a full disk, then fails
+            def __init__(self, file):
+                self.file = file
+
+            def write(self, data):
+                self.file.write(data[: len(data) // 2])
+                self.file.flush()
+                raise OSError(28, "No space left on device")
+
+            def __getattr__(self, name):
+                return getattr(self.file, name)
+
+        log = journal.Journal(self.directory)
+        log.append({"op": "sign", "student_id": "before"}).result(timeout=5)
+        log._file = TornFile(log._file)
+        with self.assertRaises(OSError):
+            log.append({"op": "sign", "student_id": "failed"}).result(timeout=5)
+        log.append({"op": "sign", "student_id": "after"}).result(timeout=5)
+        log.close()
+
+        _, records = journal.load(self.directory)
+        self.assertEqual([r["student_id"] for r in records], ["before", "after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+import unittest
+import app.main as server
+from app.utils.config import load_config
+from app.test_config import ENVIRONMENT
+
+
+class TestKeyFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        server.config = load_config(ENVIRONMENT)
+
+    def tearDown(self):
+        server.config = None
+        self.tmp.cleanup()
+
+    def test_created_once(self):
+        """A file that already exists is kept, no temporary files remain"""
+        path = os.path.join(self.tmp.name, "keys.json")
+        self.assertTrue(server.create_exclusively(path, "first"))
+        self.assertFalse(server.create_exclusively(path, "second"))
+        with open(path) as f:
+            self.assertEqual(f.read(), "first")
+        self.assertEqual(os.listdir(self.tmp.name), ["keys.json"])
+
+    def test_workers_share_one_key(self):
+        """Workers starting at once all load the key one of them created"""
+        path = os.path.join(self.tmp.name, "data", "keys.json")
+        barrier = threading.Barrier(8)
+        loaded = []
+
+        def start_worker():
+            barrier.wait()
+            loaded.append(server.load_keys(path))
+
+        workers = [threading.Thread(target=start_worker) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(loaded), 8)
+        self.assertTrue(all(keys == loaded[0] for keys in loaded))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+
+from starlette.responses import PlainTextResponse
+
+from app.utils.lifecycle import FAILED, READY, Readiness, ReadinessGate
+
+
+async def call(app, path):
+    """Run one GET request against an ASGI app, return the status code"""
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+class TestLifecycle(unittest.TestCase):
+
+    def test_steps_run_in_order(self):
+        """Warm-up steps run in order and are timed"""
+
+        async def scenario():
+            readiness = Readiness()
+            order = []
+
+            async def step(name):
+                order.append(name)
+
+            readiness.start([(name, lambda n=name: step(n)) for name in "abc"])
+            self.assertFalse(readiness.ready)
+            await readiness.wait()
+            self.assertEqual(readiness.status, READY)
+            self.assertEqual(order, ["a", "b", "c"])
+            self.assertEqual(list(readiness.report()["steps"]), ["a", "b", "c"])
+
+        asyncio.run(scenario())
+
+    def test_failed_step(self):
+        """A failing step stops the warm-up and is reported"""
+
+        async def scenario():
+            readiness = Readiness()
+
+            async def broken():
+                raise ValueError("no keys")
+
+            async def never():
+                self.fail("ran after a failed step")
+
+            readiness.start([("keys", broken), ("pages", never)])
+            await readiness.wait()
+            self.assertEqual(readiness.status, FAILED)
+            self.assertEqual(readiness.error, "keys: no keys")
+            self.assertFalse(readiness.warm)
+
+        asyncio.run(scenario())
+
+    def test_gate(self):
+        """Requests are turned away until warm, probes always pass"""
+
+        async def scenario():
+            readiness = Readiness()
+            started = asyncio.Event()
+
+            async def app(scope, receive, send):
+                await PlainTextResponse("ok")(scope, receive, send)
+
+            gate = ReadinessGate(app, readiness)
+            readiness.start([("wait", started.wait)])
+            self.assertEqual(await call(gate, "/vote"), 503)
+            self.assertEqual(await call(gate, "/readyz"), 200)
+
+            started.set()
+            await readiness.wait()
+            self.assertEqual(await call(gate, "/vote"), 200)
+            # In-flight work may finish while the server shuts down
+            await readiness.stop()
+            self.assertEqual(await call(gate, "/vote"), 200)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import io
+import json
+import logging
+import queue
+import unittest
+
+from app.utils.crypto import SignatureVerifier, generate_keys, hash_to_int
+from app.utils.logs import (
+    DebugSampler,
+    NonBlockingQueueHandler,
+    StructuredFormatter,
+    configure_logging,
+)
+
+
+def make_record(level=logging.DEBUG, event="verify", fields=None):
+    record = logging.LogRecord("app.test", level, __file__, 1, event, (), None)
+    if fields is not None:
+        record.fields = fields
+    return record
+
+
+class TestLogs(unittest.TestCase):
+
+    def test_formatter(self):
+        """Events render as key=value text or as one JSON object"""
+        record = make_record(fields={"hash": 42, "cached": True})
+        text = StructuredFormatter().format(record)
+        self.assertTrue(text.endswith("DEBUG app.test verify hash=42 cached=True"))
+
+        entry = json.loads(StructuredFormatter(json_format=True).format(record))
+        self.assertEqual(entry["event"], "verify")
+        self.assertEqual(entry["level"], "DEBUG")
+        self.assertEqual(entry["hash"], 42)
+
+    def test_debug_sampling(self):
+        """Only every n-th DEBUG record passes, other levels always do"""
+        sampler = DebugSampler(every=10)
+        passed = sum(sampler.filter(make_record()) for _ in range(100))
+        self.assertEqual(passed, 10)
+        self.assertTrue(sampler.filter(make_record(logging.WARNING)))
+
+    def test_full_queue_drops_records(self):
+        """Logging never blocks, records beyond the queue size are counted"""
+        handler = NonBlockingQueueHandler(queue.Queue(2))
+        for _ in range(5):
+            handler.handle(make_record())
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_configure_logging_writes_in_background(self):
+        """Records reach the stream after stop(), and verify logs at DEBUG"""
+        stream = io.StringIO()
+        runtime = configure_logging(level="DEBUG", stream=stream)
+        try:
+            public_key, private_key = generate_keys()
+            verifier = SignatureVerifier(private_key)
+            p = public_key["p"]
+            signature = pow(hash_to_int("A", p), private_key["x"], p)
+            self.assertTrue(verifier.verify("A", signature))
+            self.assertFalse(verifier.verify("A", signature % (p - 1) + 1))
+            logging.getLogger("app.main").info("startup")
+        finally:
+            runtime.stop()
+
+        output = stream.getvalue()
+        self.assertIn("app.utils.crypto verify", output)
+        self.assertIn("valid=True cached=False", output)
+        self.assertIn("valid=False cached=True", output)
+        # A rejected guess must not reveal the real signature
+        self.assertNotIn("expected", output)
+        self.assertEqual(output.count(f"signature={signature} "), 1)
+        self.assertIn("INFO app.main startup", output)
+
+    def test_disabled_debug_writes_nothing(self):
+        """At INFO the verification explanation is skipped"""
+        stream = io.StringIO()
+        runtime = configure_logging(level="INFO", stream=stream)
+        try:
+            _, private_key = generate_keys()
+            SignatureVerifier(private_key).verify("A", 1)
+            SignatureVerifier(private_key).verify("A", 2)
+        finally:
+            runtime.stop()
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_stop_with_full_queue(self):
+        """Shutdown drains a full queue instead of failing"""
+        stream = io.StringIO()
+        runtime = configure_logging(level="INFO", queue_size=2, stream=stream)
+        logger = logging.getLogger("app.test")
+        for i in range(50):
+            logger.info("event", extra={"fields": {"i": i}})
+        dropped = runtime.dropped
+        runtime.stop()
+        self.assertEqual(stream.getvalue().count("event"), 50 - dropped)
+
+    def test_unknown_settings_rejected(self):
+        """Misspelled levels and formats fail at startup"""
+        with self.assertRaises(ValueError):
+            configure_logging(level="VERBOSE")
+        with self.assertRaises(ValueError):
+            configure_logging(log_format="xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+
+from app.utils.metrics import MetricsMiddleware, MetricsRegistry, add_crypto_time
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_render(self):
+        """Counters and gauges render one sample per label set"""
+        rejected = self.registry.counter(
+            "ballots_rejected_total", "Ballots refused", ("reason",)
+        )
+        size = self.registry.gauge("election_ballots_cast", "Ballots in the tally")
+        rejected.inc(reason="invalid_signature")
+        rejected.inc(2, reason="duplicate_signature")
+        size.set(42)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE ballots_rejected_total counter", text)
+        self.assertIn('ballots_rejected_total{reason="duplicate_signature"} 2', text)
+        self.assertIn('ballots_rejected_total{reason="invalid_signature"} 1', text)
+        self.assertIn("election_ballots_cast 42", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Histogram buckets count all observations up to their bound"""
+        latency = self.registry.histogram(
+            "latency_seconds", "Latency", ("route",), buckets=(0.01, 0.1, 1.0)
+        )
+        for value in (0.005, 0.01, 0.05, 0.5, 5.0):
+            latency.observe(value, route="/submit-vote")
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{route="/submit-vote",le="0.01"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="/submit-vote",le="0.1"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/submit-vote",le="1"} 4', text)
+        self.assertIn('latency_seconds_bucket{route="/submit-vote",le="+Inf"} 5', text)
+        self.assertIn('latency_seconds_count{route="/submit-vote"} 5', text)
+        total = text.split('latency_seconds_sum{route="/submit-vote"} ')[1]
+        self.assertAlmostEqual(float(total.split("\n")[0]), 5.565)
+
+    def test_labels_are_validated_and_escaped(self):
+        """Wrong label names fail, label values are escaped"""
+        counter = self.registry.counter("requests_total", "Requests", ("route",))
+        with self.assertRaises(ValueError):
+            counter.inc(path="/")
+        with self.assertRaises(ValueError):
+            counter.inc()
+        counter.inc(route='say "hi"\n')
+        self.assertIn(
+            'requests_total{route="say \\"hi\\"\\n"} 1', self.registry.render()
+        )
+
+    def test_middleware_times_routes(self):
+        """The middleware labels requests with the route template"""
+        duration = self.registry.histogram(
+            "duration", "Duration", ("method", "route", "status")
+        )
+        crypto = self.registry.histogram("crypto", "Crypto", ("route",))
+
+        async def endpoint():
+            pass
+
+        class Route:
+            path = "/elections/{election_id}"
+
+        Route.endpoint = endpoint
+
+        class App:
+            routes = [Route]
+
+        async def inner(scope, receive, send):
+            # What the router does on a match
+            scope["endpoint"] = endpoint
+            add_crypto_time(0.25)
+            await send({"type": "http.response.start", "status": 201})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = MetricsMiddleware(inner, duration, crypto)
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "POST", "app": App}
+        asyncio.run(middleware(scope, None, send))
+
+        self.assertEqual(
+            duration.count(method="POST", route="/elections/{election_id}", status=201),
+            1,
+        )
+        self.assertEqual(crypto.count(route="/elections/{election_id}"), 1)
+        self.assertIn(
+            'crypto_sum{route="/elections/{election_id}"} 0.25', self.registry.render()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
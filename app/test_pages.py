@@ -0,0 +1,53 @@
+import gzip
+import unittest
+
+from app.utils.pages import PrerenderedPage, etag_matches, parse_accept_encoding
+
+HTML = "<html><body>" + "<p>Stimmzettel</p>" * 200 + "</body></html>"
+
+
+class TestPages(unittest.TestCase):
+
+    def test_parse_accept_encoding(self):
+        """Codings are mapped to their q-values, defaulting to 1"""
+        self.assertEqual(
+            parse_accept_encoding("gzip, deflate, br;q=0.9, *;q=0"),
+            {"gzip": 1.0, "deflate": 1.0, "br": 0.9, "*": 0.0},
+        )
+        self.assertEqual(parse_accept_encoding(None), {})
+
+    def test_select_variant(self):
+        """gzip is served when accepted, identity otherwise"""
+        page = PrerenderedPage(HTML)
+        encoding, body, etag = page.select("gzip, deflate")
+        self.assertEqual(encoding, "gzip")
+        self.assertEqual(gzip.decompress(body).decode(), HTML)
+
+        identity = page.select("gzip;q=0")
+        self.assertIsNone(identity[0])
+        self.assertEqual(identity[1], HTML.encode())
+        self.assertEqual(page.select(None)[0], None)
+        self.assertEqual(page.select("*")[0], encoding)
+
+        # Each representation has its own strong ETag
+        self.assertNotEqual(etag, identity[2])
+        self.assertTrue(etag.startswith('"'))
+
+    def test_tiny_pages_stay_uncompressed(self):
+        """Compression is skipped where it would not save anything"""
+        page = PrerenderedPage("ok")
+        self.assertEqual(list(page.variants), [None])
+        self.assertIsNone(page.select("gzip")[0])
+
+    def test_etag_matches(self):
+        """If-None-Match lists and weak validators match"""
+        etag = PrerenderedPage(HTML).select(None)[2]
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(f'"other", W/{etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches('"other"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+
+if __name__ == "__main__":
+    unittest.main()
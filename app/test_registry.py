@@ -0,0 +1,34 @@
+import unittest
+from app.utils.registry import VoterRegistry, ISSUED, NOT_AUTHORIZED, ALREADY_VOTED
+
+
+class TestVoterRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = VoterRegistry(["anna", "ben", "anna", "", "carl"])
+
+    def test_roster_is_deduplicated(self):
+        """Duplicate and empty roster entries are ignored"""
+        self.assertEqual(self.registry.total, 3)
+        self.assertNotIn("", self.registry)
+
+    def test_try_mark(self):
+        """Students can be marked exactly once"""
+        self.assertEqual(self.registry.try_mark("ben"), ISSUED)
+        self.assertEqual(self.registry.try_mark("ben"), ALREADY_VOTED)
+        self.assertEqual(self.registry.try_mark("mallory"), NOT_AUTHORIZED)
+        self.assertTrue(self.registry.has_voted("ben"))
+        self.assertEqual(self.registry.voted_count, 1)
+
+    def test_unmark(self):
+        """Unmarking gives the student their signature back"""
+        self.registry.try_mark("anna")
+        self.registry.try_mark("carl")
+        self.registry.unmark("anna")
+        self.assertEqual(self.registry.voted_ids(), ["carl"])
+        self.assertEqual(self.registry.try_mark("anna"), ISSUED)
+        self.assertEqual(self.registry.voted_ids(), ["carl", "anna"])
+
+
+if __name__ == "__main__":
+    unittest.main()
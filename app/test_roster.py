@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from app.utils import roster
+from app.utils.roster import Roster, normalize_id
+
+
+class TestRoster(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.cache_dir = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_normalize_id(self):
+        """Ids are compared trimmed, case folded and NFKC normalized"""
+        self.assertEqual(normalize_id(" Anna\n"), "anna")
+        self.assertEqual(normalize_id("ＡＮＮＡ"), "anna")
+        self.assertIsNone(normalize_id("  "))
+        self.assertIsNone(normalize_id(["anna"]))
+
+    def test_from_ids(self):
+        """Duplicates collapse and every id gets a dense slot in sorted order"""
+        students = Roster.from_ids(["carl", "Anna", "anna ", "", "ben"])
+        self.assertEqual(len(students), 3)
+        self.assertEqual(list(students), ["anna", "ben", "carl"])
+        self.assertEqual(students.index("ben"), 1)
+        self.assertIsNone(students.index("mallory"))
+        self.assertNotIn(None, students)
+
+    def test_read_ids(self):
+        """CSV by header column or first column, JSON lines and text"""
+        with_header = self.write("a.csv", "name,student_id\nAnna,A1\nBen,b2\n")
+        without_header = self.write("b.csv", "a1,Anna\nb2,Ben\n")
+        json_lines = self.write("c.jsonl", '{"student_id": "A1"}\n\n"b2"\n{}\n')
+        text = self.write("d.txt", "A1\n\n b2 \n")
+        for path in (with_header, without_header, json_lines, text):
+            self.assertEqual(list(roster.read_ids(path)), ["a1", "b2"], path)
+
+    def test_build_merges_sorted_runs(self):
+        """Files larger than one chunk are merged and deduplicated on disk"""
+        rows = "".join(f"Student{i % 70}\n" for i in range(200))
+        path = self.write("students.txt", rows)
+        students, cached = roster.load(path, self.cache_dir, chunk_size=16)
+        self.assertFalse(cached)
+        self.assertEqual(len(students), 70)
+        self.assertEqual(list(students), sorted(f"student{i}" for i in range(70)))
+        self.assertEqual(students[students.index("student42")], "student42")
+        students.close()
+
+    def test_cache_reused_until_source_changes(self):
+        """The binary cache is reused, and rebuilt when the file changes"""
+        path = self.write("students.csv", "student_id\nanna\nben\n")
+        students, cached = roster.load(path, self.cache_dir)
+        students.close()
+        students, cached = roster.load(path, self.cache_dir)
+        self.assertTrue(cached)
+        self.assertIn("ben", students)
+        students.close()
+
+        self.write("students.csv", "student_id\nanna\nben\ncarl\n")
+        os.utime(path, ns=(0, 1))
+        students, cached = roster.load(path, self.cache_dir)
+        self.assertFalse(cached)
+        self.assertIn("carl", students)
+        students.close()
+
+    def test_damaged_cache_is_ignored(self):
+        """A truncated cache file is not used"""
+        path = self.write("students.txt", "anna\nben\n")
+        cache_path = roster.cache_path_for(path, self.cache_dir)
+        roster.build_cache(path, cache_path)
+        with open(cache_path, "r+b") as f:
+            f.truncate(os.path.getsize(cache_path) - 1)
+        self.assertIsNone(roster.open_cache(cache_path, path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+from app.utils.spent import SpentSignatureStore
+
+
+class TestSpentSignatureStore(unittest.TestCase):
+
+    def test_signature_can_only_be_spent_once(self):
+        """A signature is accepted once, then rejected"""
+        store = SpentSignatureStore()
+        self.assertTrue(store.add("1234"))
+        self.assertFalse(store.add("1234"))
+        self.assertEqual(len(store), 1)
+
+    def test_signatures_are_normalized(self):
+        """Re-encoding a signature does not make it fresh again"""
+        store = SpentSignatureStore()
+        self.assertTrue(store.add(42))
+        self.assertFalse(store.add("0042"))
+        self.assertIn(" 42", store)
+
+
+if __name__ == "__main__":
+    unittest.main()
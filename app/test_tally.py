@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import unittest
+from starlette.requests import Request
+from app import main as server
+from app.main import (
+    cast_ballot,
+    issue_signature,
+    issue_signatures,
+    render_results,
+    results_response,
+)
+from app.utils.backends import MemoryBackend
+from app.utils.crypto import SignatureVerifier, generate_keys, hash_to_int
+from app.utils.elections import Election
+from app.utils.executor import CryptoExecutor
+from app.utils.tally import Tally
+
+
+def make_election():
+    public_key, private_key = generate_keys()
+    keys = {"public_key": public_key, "private_key": private_key}
+    state = MemoryBackend(["anna", "ben"])
+    verifier = SignatureVerifier(private_key)
+    return Election(None, "Test", ["A", "B"], ["anna", "ben"], keys, verifier, state)
+
+
+def request(etag=None):
+    headers = [] if etag is None else [(b"if-none-match", etag.encode())]
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+class TestTally(unittest.TestCase):
+
+    def test_record(self):
+        """Every ballot bumps the version and the candidate's count"""
+        tally = Tally()
+        self.assertEqual(tally.record("A"), (1, 1))
+        self.assertEqual(tally.record("B"), (2, 1))
+        self.assertEqual(tally.record("A"), (3, 2))
+        self.assertEqual(tally.total, 3)
+        _, counts = tally.snapshot()
+        counts["A"] = 99
+        self.assertEqual(tally.snapshot(), (3, {"A": 2, "B": 1}))
+
+    def test_concurrent_records(self):
+        """Counts from several threads add up"""
+        tally = Tally()
+
+        def vote():
+            for _ in range(1000):
+                tally.record("A")
+
+        threads = [threading.Thread(target=vote) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(tally.snapshot(), (4000, {"A": 4000}))
+
+
+class TestResults(unittest.TestCase):
+
+    def test_rendered_once_per_change(self):
+        """The body is cached until a ballot or signature changes the counters"""
+
+        async def scenario():
+            election = make_election()
+            etag, body = await render_results(election)
+            self.assertIs((await render_results(election))[1], body)
+
+            await election.state.issue("anna")
+            await election.state.cast({"vote": "A", "message": "A", "signature": "5"})
+            new_etag, new_body = await render_results(election)
+            self.assertNotEqual(new_etag, etag)
+            self.assertIn(b'"votes": {"A": 1}', new_body)
+            self.assertIn(b'"voted_students": 1', new_body)
+
+        asyncio.run(scenario())
+
+    def test_etag_follows_content(self):
+        """Same counters after a restart with other votes give another ETag"""
+
+        async def scenario():
+            first, second = make_election(), make_election()
+            await first.state.cast({"vote": "A", "message": "A", "signature": "5"})
+            await second.state.cast({"vote": "B", "message": "B", "signature": "5"})
+            self.assertEqual(
+                await first.state.counters(), await second.state.counters()
+            )
+            self.assertNotEqual(
+                (await render_results(first))[0], (await render_results(second))[0]
+            )
+
+        asyncio.run(scenario())
+
+    def test_not_modified(self):
+        """A matching If-None-Match gets a 304 without a body"""
+
+        async def scenario():
+            election = make_election()
+            response = await results_response(election, request())
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers["etag"]
+            self.assertEqual(response.headers["cache-control"], "no-cache")
+
+            response = await results_response(election, request(etag))
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.body, b"")
+
+            await election.state.cast({"vote": "A", "message": "A", "signature": "5"})
+            response = await results_response(election, request(etag))
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers["etag"], etag)
+
+        asyncio.run(scenario())
+
+
+class TestCastBallot(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = server.crypto_executor
+        server.crypto_executor = CryptoExecutor("inline")
+
+    def tearDown(self):
+        server.crypto_executor = self.saved
+
+    def test_counted_for_signed_message(self):
+        """Ballots count for their signed message, never for another candidate"""
+
+        async def scenario():
+            election = make_election()
+            private_key = election.keys["private_key"]
+            p, x = private_key["p"], private_key["x"]
+
+            def ballot(message, **fields):
+                signature = pow(hash_to_int(message, p), x, p)
+                return dict(vote=message, signature=str(signature), **fields)
+
+            rejected = [ballot("B#1", candidate="A"), ballot("C#1"), ballot("B")]
+            for data in rejected:
+                response = await cast_ballot(election, data)
+                self.assertEqual(response.status_code, 400)
+
+            # Nonces keep two votes for one candidate apart
+            for data in [ballot("B#1", candidate="B"), ballot("B#2")]:
+                self.assertEqual(await cast_ballot(election, data), {"success": True})
+            _, body = await render_results(election)
+            self.assertIn(b'"votes": {"B": 2}', body)
+
+        asyncio.run(scenario())
+
+    def test_body_must_be_object(self):
+        """Bodies that are not JSON objects get a 400, not a server error"""
+
+        async def scenario():
+            election = make_election()
+            for handler in [cast_ballot, issue_signature, issue_signatures]:
+                for data in [[], "A", 7, None]:
+                    response = await handler(election, data)
+                    self.assertEqual(response.status_code, 400)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
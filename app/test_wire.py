@@ -0,0 +1,57 @@
+import unittest
+from app.utils.groups import standard_group
+from app.utils.wire import IntCodec
+
+
+class TestIntCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Numbers below p survive both encodings at demo and real key sizes"""
+        for p in (9973, standard_group("ffdhe", 2048)["p"]):
+            codec = IntCodec(p)
+            for number in (1, 255, p // 3, p - 1):
+                for binary in (False, True):
+                    encoded = codec.encode(number, binary)
+                    self.assertEqual(codec.decode(encoded, binary), number)
+            self.assertEqual(len(codec.encode(1, True)), codec.b64_length)
+
+    def test_fixed_width(self):
+        """The binary form is the big-endian bytes of p's width in base64url"""
+        codec = IntCodec(9973)
+        self.assertEqual(codec.width, 2)
+        self.assertEqual(codec.encode(1234, True), "BNI")
+        self.assertEqual(IntCodec(2**2048 - 1).b64_length, 342)
+
+    def test_lengths_checked_before_parsing(self):
+        """Oversized, truncated and malformed values are refused"""
+        codec = IntCodec(9973)
+        for value in ["BN", "BNII", "B+I", "BN=", 1234]:
+            with self.assertRaises(ValueError):
+                codec.decode(value, binary=True)
+        with self.assertRaises(ValueError):
+            codec.decode("9" * 5)
+        with self.assertRaises(ValueError):
+            codec.decode("1" * 100_000)
+        with self.assertRaises(TypeError):
+            codec.decode(True)
+        self.assertEqual(codec.decode("0042"), 42)
+        self.assertEqual(codec.decode(42), 42)
+
+    def test_only_numbers_below_p(self):
+        """Floats, signs, separators and numbers outside 0 < n < p are refused"""
+        codec = IntCodec(9973)
+        for value in [3.9, None, [42]]:
+            with self.assertRaises(TypeError):
+                codec.decode(value)
+        malformed = ["+42", "-42", "4_2", " 42", "42\n", "٤٢", ""]
+        for value in malformed + ["0", "9973", 0, -1]:
+            with self.assertRaises(ValueError):
+                codec.decode(value)
+        for value in [codec.encode(0, True), codec.encode(9973, True), "__8"]:
+            with self.assertRaises(ValueError):
+                codec.decode(value, binary=True)
+        self.assertEqual(codec.decode("9972"), 9972)
+
+
+if __name__ == "__main__":
+    unittest.main()
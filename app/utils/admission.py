@@ -0,0 +1,240 @@
+"""Admission control in front of the expensive endpoints.
+
+Every request to /sign-ballot or /submit-vote costs a modular exponentiation.
+Under overload, accepting everything lets the latency of every request grow
+until clients time out and retry, which makes it worse. An Admission decides
+up front, in microseconds, whether a request gets served:
+
+1. Token buckets per client IP and, for signing, per student ID stop a single
+   client from taking the capacity of everyone else.
+2. At most ``concurrency`` admitted requests run at once. Up to ``max_queue``
+   more wait in FIFO order for at most ``queue_timeout`` seconds.
+3. Everything else is refused at once with AdmissionRejected, which the app
+   turns into a 429 with Retry-After.
+
+The admitted requests therefore see a bounded queue and a stable latency,
+while the surplus gets a fast answer it can back off from.
+
+Like CryptoExecutor, all state is only touched from the event loop thread.
+"""
+import asyncio
+import collections
+import math
+import time
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted
+
+    Attributes:
+        reason: "rate_limited_<key>" (e.g. rate_limited_ip), "queue_full" or
+            "queue_timeout"
+        retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"{reason}, retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Retry-After value: whole seconds, at least 1"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def parse_rate(value):
+    """Parse a rate limit setting
+
+    Args:
+        value: "rate/burst" in requests per second, e.g. "2/10"; a single
+            number uses it for both; "" or "0" disables the limit
+
+    Returns:
+        tuple: (rate, burst) or None if disabled
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    rate, _, burst = value.partition("/")
+    rate = float(rate)
+    burst = float(burst) if burst else rate
+    if rate < 0 or burst < 0:
+        raise ValueError(f"Invalid rate limit '{value}'")
+    if rate == 0:
+        return None
+    return rate, max(1.0, burst)
+
+
+class RateLimiter:
+    """Token buckets per key, e.g. per client IP
+
+    Each key may make ``burst`` requests at once and then ``rate`` requests
+    per second. Only the ``max_keys`` most recently seen keys are kept; an
+    evicted key starts over with a full bucket, which errs on the side of
+    serving.
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket size
+            max_keys: Number of buckets kept
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> (tokens, time of the last update)
+        self._buckets = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key, now=None):
+        """Take a token for key
+
+        Returns:
+            float: 0 if a token was taken, else the seconds until one is available
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders at once, with a bounded FIFO queue of waiters
+
+    A released slot is handed directly to the longest waiting request, so a
+    request arriving later cannot overtake the queue.
+    """
+
+    def __init__(self, limit, max_queue=0, queue_timeout=1.0):
+        """
+        Args:
+            limit: Number of concurrent holders
+            max_queue: Number of requests that may wait for a slot
+            queue_timeout: Seconds a request waits before it is rejected
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.peak_queued = 0
+        self._waiters = collections.deque()
+
+    @property
+    def queued(self):
+        """Requests waiting for a slot"""
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait for a slot
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise AdmissionRejected("queue_full", self.queue_timeout)
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.peak_queued = max(self.peak_queued, len(self._waiters))
+        timer = loop.call_later(self.queue_timeout, self._expire, waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Client went away. If the slot was handed over in the meantime,
+            # pass it on.
+            if waiter.done() and not waiter.cancelled():
+                if waiter.exception() is None:
+                    self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            timer.cancel()
+
+    def _expire(self, waiter):
+        if not waiter.done():
+            self._discard(waiter)
+            waiter.set_exception(
+                AdmissionRejected("queue_timeout", self.queue_timeout)
+            )
+
+    def _discard(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self):
+        """Free a slot, handing it to the next waiter if there is one"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class Admission:
+    """Rate limits and a concurrency limit for one endpoint"""
+
+    def __init__(
+        self, name, concurrency, max_queue=0, queue_timeout=1.0, limits=None
+    ):
+        """
+        Args:
+            name: Endpoint name used in metrics, e.g. "sign"
+            concurrency: Requests handled at once
+            max_queue: Requests waiting for a slot before new ones are rejected
+            queue_timeout: Seconds a request may wait for a slot
+            limits: dict of key name -> (rate, burst), e.g.
+                {"ip": (20, 200), "student": (0.2, 5)}
+        """
+        self.name = name
+        self.slots = ConcurrencyLimiter(concurrency, max_queue, queue_timeout)
+        self.limiters = {
+            key: RateLimiter(rate, burst)
+            for key, (rate, burst) in (limits or {}).items()
+        }
+
+    async def acquire(self, **keys):
+        """Admit a request, to be paired with release()
+
+        Args:
+            keys: Values for the rate limits, e.g. ip="10.0.0.1"; limits
+                without a value (or a None value) are not applied
+
+        Raises:
+            AdmissionRejected: With reason "rate_limited_<key>", "queue_full"
+                or "queue_timeout"
+        """
+        now = time.monotonic()
+        for key, limiter in self.limiters.items():
+            value = keys.get(key)
+            if value is None:
+                continue
+            wait = limiter.acquire(value, now)
+            if wait:
+                raise AdmissionRejected(f"rate_limited_{key}", wait)
+        await self.slots.acquire()
+
+    def release(self):
+        self.slots.release()
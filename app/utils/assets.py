@@ -0,0 +1,114 @@
+"""Fingerprinted, precompressed static files.
+
+At startup every file below the static directory is read once, hashed and
+compressed (see PrerenderedPage). It is then served under two names:
+
+- ``/static/js/voting.3f2a9c1b5d7e.js`` with the content hash in the name,
+  cacheable forever (``Cache-Control: immutable``), since a changed file gets a
+  new name;
+- ``/static/js/voting.js`` as before, revalidated with its ETag.
+
+Templates link the fingerprinted name through ``asset_url("js/voting.js")``,
+so browsers fetch each script once and then never ask again, not even for a 304.
+"""
+import hashlib
+import mimetypes
+import os
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from app.utils.pages import PrerenderedPage, page_response
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Hex digits of the SHA-256 content hash in fingerprinted names
+FINGERPRINT_LENGTH = 12
+
+
+def fingerprinted_name(path, digest):
+    """Insert a content hash before the last extension
+
+    Example: js/qrcode.min.js -> js/qrcode.min.<digest>.js
+    """
+    directory, name = os.path.split(path)
+    stem, extension = os.path.splitext(name)
+    return os.path.join(directory, f"{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}")
+
+
+class AssetManifest:
+    """Static files of one directory, precompressed and under fingerprinted names"""
+
+    def __init__(self, directory, url_prefix="/static"):
+        """
+        Args:
+            directory: Directory to serve, e.g. "app/static"
+            url_prefix: Path it is mounted at
+        """
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        # Relative URL path -> (PrerenderedPage, Cache-Control)
+        self.files = {}
+        # Relative URL path of the original -> fingerprinted URL
+        self.urls = {}
+        self._build()
+
+    def _build(self):
+        for root, directories, names in os.walk(self.directory):
+            directories[:] = sorted(d for d in directories if not d.startswith("."))
+            for name in sorted(names):
+                if name.startswith("."):
+                    continue
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    content = f.read()
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                asset = PrerenderedPage(content, media_type)
+                fingerprinted = fingerprinted_name(
+                    path, hashlib.sha256(content).hexdigest()
+                )
+                self.files[path] = (asset, "no-cache")
+                self.files[fingerprinted] = (asset, IMMUTABLE)
+                self.urls[path] = f"{self.url_prefix}/{fingerprinted}"
+
+    def url(self, path):
+        """URL of a static file, fingerprinted if it existed at startup
+
+        Args:
+            path: Path relative to the static directory, e.g. "js/voting.js"
+        """
+        path = path.lstrip("/")
+        return self.urls.get(path, f"{self.url_prefix}/{path}")
+
+
+class AssetFiles:
+    """ASGI app serving an AssetManifest, to be mounted at its url_prefix.
+
+    Paths that are not in the manifest, e.g. files added after startup, are
+    passed to fallback (typically StaticFiles for the same directory). The
+    manifest may be set later; until then everything goes to fallback.
+    """
+
+    def __init__(self, manifest, fallback=None):
+        self.manifest = manifest
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        # Starlette's Mount leaves the path below the mount point in scope["path"]
+        entry = None
+        if self.manifest is not None:
+            entry = self.manifest.files.get(scope["path"].lstrip("/"))
+        if entry is None:
+            if self.fallback is not None:
+                await self.fallback(scope, receive, send)
+                return
+            response = PlainTextResponse("Not Found", status_code=404)
+        elif scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse(
+                "Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"}
+            )
+        else:
+            asset, cache_control = entry
+            response = page_response(Request(scope), asset, cache_control)
+        await response(scope, receive, send)
@@ -0,0 +1,727 @@
+import asyncio
+import json
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from app.utils import journal as journal_log
+from app.utils.registry import (
+    VoterRegistry,
+    ISSUED,
+    NOT_AUTHORIZED,
+    ALREADY_VOTED,
+    voted_changes,
+)
+from app.utils.resp import RespClient
+from app.utils.roster import Roster, normalize_id
+from app.utils.spent import SpentSignatureStore
+from app.utils.tally import Tally
+
+BACKENDS = ("memory", "sqlite", "redis")
+
+
+class StateBackend:
+    """Election state shared by the request handlers.
+
+    Eligibility is answered from the roster held by every worker. Which students
+    have been issued a signature, which signatures are spent and the tally live
+    in the backend. ``issue`` and ``cast`` are atomic check-and-mark operations,
+    so several workers can serve requests against the same backend.
+    """
+
+    def __init__(self, roster):
+        """
+        Args:
+            roster: Roster, or iterable of eligible student ids
+        """
+        if not isinstance(roster, Roster):
+            roster = Roster.from_ids(roster)
+        self._roster = roster
+
+    @property
+    def total(self):
+        """Number of eligible students"""
+        return len(self._roster)
+
+    def is_eligible(self, student_id):
+        return student_id in self._roster
+
+    async def issue(self, student_id):
+        """Mark a student as having received a blind signature
+
+        Returns:
+            str: ISSUED, NOT_AUTHORIZED or ALREADY_VOTED
+        """
+        raise NotImplementedError
+
+    async def issue_many(self, student_ids):
+        """Mark several students in one pass
+
+        Returns:
+            list: Status per student id, as returned by issue
+        """
+        return [await self.issue(student_id) for student_id in student_ids]
+
+    async def revoke(self, student_id):
+        """Undo issue, e.g. when signing failed"""
+        raise NotImplementedError
+
+    async def cast(self, ballot):
+        """Count a ballot unless its signature has already been spent
+
+        Args:
+            ballot: dict with vote (candidate name), message and signature
+
+        Returns:
+            tuple: (tally version, new count for the candidate), or None for a duplicate
+        """
+        raise NotImplementedError
+
+    async def counters(self):
+        """Return (tally version, number of issued signatures)"""
+        raise NotImplementedError
+
+    async def results(self):
+        """Return (tally version, votes per candidate, number of issued signatures)"""
+        raise NotImplementedError
+
+    async def voted_ids(self):
+        """Return the students that have been issued a signature, in order"""
+        raise NotImplementedError
+
+    async def ballots(self, start=0, limit=None):
+        """Return accepted ballots in the order they were counted
+
+        Args:
+            start: Number of ballots to skip
+            limit: Maximum number of ballots (None: all)
+
+        Returns:
+            list: Ballot dicts as passed to cast
+        """
+        raise NotImplementedError
+
+    async def voted_changes(self, since=0, limit=None):
+        """Return what changed in the voted students since a sequence number
+
+        Args:
+            since: sequence of the previous call, 0 for everything
+            limit: Maximum number of log entries to read (None: all)
+
+        Returns:
+            dict: See app.utils.registry.voted_changes
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Process-local state, optionally made durable with a Journal.
+
+    The fastest backend, but only correct with a single worker process.
+    """
+
+    def __init__(self, roster, journal_dir=None, group_commit=True, snapshot_every=10000):
+        # The registry doubles as the roster index
+        self.registry = VoterRegistry(roster)
+        self.spent_signatures = SpentSignatureStore()
+        self.tally = Tally()
+        self.cast_votes = []
+        # Ballots waiting for their journal record to reach the disk, by
+        # signature; they are counted once it has
+        self._pending = {}
+
+        # Sequence numbers restart with the process; a new epoch tells clients
+        self.epoch = secrets.token_hex(8)
+
+        self.journal = None
+        self.snapshot_every = snapshot_every
+        self._compaction = None
+        if journal_dir:
+            self._recover(journal_dir, group_commit)
+
+    def _recover(self, journal_dir, group_commit):
+        snapshot_state, records = journal_log.load(journal_dir)
+        if snapshot_state:
+            for student_id in snapshot_state["voted_students"]:
+                # Journals from before normalized ids may hold other spellings
+                self.registry.try_mark(normalize_id(student_id))
+            for ballot in snapshot_state["cast_votes"]:
+                self._apply_ballot(ballot)
+        for record in records:
+            self._apply_record(record)
+
+        self.journal = journal_log.Journal(journal_dir, group_commit=group_commit)
+        if records:
+            # Fold the replayed records into a snapshot so the next start is fast
+            self.journal.write_snapshot(self.state(), self.journal.rotate().result())
+
+    def _apply_ballot(self, ballot):
+        if not self.spent_signatures.add(ballot["signature"]):
+            return None
+        self.cast_votes.append(ballot)
+        return self.tally.record(ballot["vote"])
+
+    def _apply_record(self, record):
+        """Apply a journal record to the in-memory state (safe to apply twice)"""
+        if record["op"] == "sign":
+            self.registry.try_mark(normalize_id(record["student_id"]))
+        elif record["op"] == "revoke":
+            self.registry.unmark(normalize_id(record["student_id"]))
+        elif record["op"] == "vote":
+            self._apply_ballot({k: v for k, v in record.items() if k != "op"})
+
+    @property
+    def total(self):
+        return self.registry.total
+
+    def is_eligible(self, student_id):
+        return student_id in self.registry
+
+    def state(self):
+        """JSON-serializable copy of the election state for journal snapshots"""
+        return {
+            "voted_students": self.registry.voted_ids(),
+            # Pending ballots are already in the journal segments a snapshot
+            # replaces
+            "cast_votes": self.cast_votes + list(self._pending.values()),
+        }
+
+    async def _persist(self, record):
+        """Append a record to the journal and wait until it is on disk.
+
+        The record is queued as soon as this is awaited, so callers must mark
+        the in-memory state (or reserve it, see cast) right before without
+        awaiting anything in between, and undo that if writing fails.
+        """
+        if self.journal is None:
+            return
+
+        written = self.journal.append(record)
+        if self.journal.records_since_snapshot >= self.snapshot_every and (
+            self._compaction is None or self._compaction.done()
+        ):
+            self._compaction = asyncio.create_task(self._compact())
+
+        await asyncio.wrap_future(written)
+
+    async def _compact(self):
+        """Snapshot the current state and drop the journal segments it covers"""
+        state = self.state()
+        sealed = await asyncio.wrap_future(self.journal.rotate())
+        await asyncio.to_thread(self.journal.write_snapshot, state, sealed)
+
+    async def issue(self, student_id):
+        status = self.registry.try_mark(student_id)
+        if status == ISSUED:
+            try:
+                await self._persist({"op": "sign", "student_id": student_id})
+            except Exception:
+                # Not durable: the student may ask again
+                self.registry.unmark(student_id)
+                raise
+        return status
+
+    async def issue_many(self, student_ids):
+        statuses = [self.registry.try_mark(student_id) for student_id in student_ids]
+        if self.journal is not None:
+            issued = [
+                student_id
+                for student_id, status in zip(student_ids, statuses)
+                if status == ISSUED
+            ]
+            # One group commit for the whole batch
+            written = [
+                self.journal.append({"op": "sign", "student_id": student_id})
+                for student_id in issued
+            ]
+            try:
+                await asyncio.gather(*(asyncio.wrap_future(w) for w in written))
+            except Exception:
+                for student_id in issued:
+                    self.registry.unmark(student_id)
+                raise
+        return statuses
+
+    async def revoke(self, student_id):
+        # Unmarked before the record is queued: a compaction started by this
+        # append snapshots the state and drops the segment with the record
+        unmarked = self.registry.unmark(student_id)
+        try:
+            await self._persist({"op": "revoke", "student_id": student_id})
+        except Exception:
+            if unmarked:
+                self.registry.try_mark(student_id)
+            raise
+
+    async def cast(self, ballot):
+        if self.journal is None:
+            return self._apply_ballot(ballot)
+
+        # The signature is reserved while its record is written and only
+        # spent and counted once the record is on disk, so a failed write
+        # leaves no trace and the voter can submit the ballot again
+        key = self.spent_signatures.normalize(ballot["signature"])
+        if key in self._pending or key in self.spent_signatures:
+            return None
+        self._pending[key] = ballot
+        # A cancelled request does not stop the write, so the ballot is still
+        # counted once it is on disk
+        return await asyncio.shield(self._cast_durably(key, ballot))
+
+    async def _cast_durably(self, key, ballot):
+        try:
+            await self._persist({"op": "vote", **ballot})
+        finally:
+            del self._pending[key]
+        return self._apply_ballot(ballot)
+
+    async def counters(self):
+        return self.tally.version, self.registry.voted_count
+
+    async def results(self):
+        version, votes = self.tally.snapshot()
+        return version, votes, self.registry.voted_count
+
+    async def voted_ids(self):
+        return self.registry.voted_ids()
+
+    async def ballots(self, start=0, limit=None):
+        stop = None if limit is None else start + limit
+        return self.cast_votes[start:stop]
+
+    async def voted_changes(self, since=0, limit=None):
+        entries = self.registry.log_entries(since, limit)
+        return voted_changes(entries, since, limit, self.epoch)
+
+    async def close(self):
+        if self._compaction is not None:
+            await self._compaction
+        if self.journal is not None:
+            self.journal.close()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issued (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS ballots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    signature TEXT NOT NULL UNIQUE,
+    vote TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tally (
+    candidate TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('version', 0), ('voted', 0);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('epoch', abs(random()));
+-- Issuances (revokes NULL) and revocations (revokes = seq of the issuance)
+CREATE TABLE IF NOT EXISTS voted_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    revokes INTEGER
+);
+CREATE INDEX IF NOT EXISTS voted_log_student ON voted_log (student_id);
+CREATE INDEX IF NOT EXISTS voted_log_revokes ON voted_log (revokes);
+"""
+
+
+class SQLiteBackend(StateBackend):
+    """State in a SQLite database in WAL mode, shared by all workers on a host.
+
+    UNIQUE constraints on issued students and spent signatures make the
+    check-and-mark atomic across processes. Queries run in worker threads with
+    one connection per thread so the event loop never waits on a database lock.
+    """
+
+    def __init__(self, roster, path):
+        super().__init__(roster)
+        self.path = path
+        self._local = threading.local()
+        connection = self._connect()
+        connection.executescript(SQLITE_SCHEMA)
+        # Databases from before the voted log: log the issued students once
+        connection.execute(
+            "INSERT INTO voted_log (student_id) SELECT student_id FROM issued "
+            "WHERE NOT EXISTS (SELECT 1 FROM voted_log) ORDER BY seq"
+        )
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the write lock up front, so check-and-mark
+        sequences cannot interleave between workers"""
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _issue(self, student_id):
+        try:
+            with self._transaction() as db:
+                db.execute("INSERT INTO issued (student_id) VALUES (?)", (student_id,))
+                db.execute(
+                    "INSERT INTO voted_log (student_id) VALUES (?)", (student_id,)
+                )
+                db.execute("UPDATE counters SET value = value + 1 WHERE name = 'voted'")
+        except sqlite3.IntegrityError:
+            return ALREADY_VOTED
+        return ISSUED
+
+    def _issue_many(self, student_ids):
+        statuses = []
+        with self._transaction() as db:
+            for student_id in student_ids:
+                if not self.is_eligible(student_id):
+                    statuses.append(NOT_AUTHORIZED)
+                    continue
+                inserted = db.execute(
+                    "INSERT OR IGNORE INTO issued (student_id) VALUES (?)", (student_id,)
+                ).rowcount
+                if inserted:
+                    db.execute(
+                        "INSERT INTO voted_log (student_id) VALUES (?)", (student_id,)
+                    )
+                statuses.append(ISSUED if inserted else ALREADY_VOTED)
+            db.execute(
+                "UPDATE counters SET value = value + ? WHERE name = 'voted'",
+                (statuses.count(ISSUED),),
+            )
+        return statuses
+
+    def _revoke(self, student_id):
+        with self._transaction() as db:
+            deleted = db.execute(
+                "DELETE FROM issued WHERE student_id = ?", (student_id,)
+            ).rowcount
+            db.execute(
+                "UPDATE counters SET value = value - ? WHERE name = 'voted'", (deleted,)
+            )
+            if deleted:
+                db.execute(
+                    "INSERT INTO voted_log (student_id, revokes) "
+                    "SELECT student_id, MAX(seq) FROM voted_log "
+                    "WHERE student_id = ? AND revokes IS NULL",
+                    (student_id,),
+                )
+
+    def _cast(self, ballot):
+        try:
+            with self._transaction() as db:
+                db.execute(
+                    "INSERT INTO ballots (signature, vote, message) VALUES (?, ?, ?)",
+                    (ballot["signature"], ballot["vote"], json.dumps(ballot["message"])),
+                )
+                db.execute(
+                    "INSERT INTO tally (candidate, count) VALUES (?, 1) "
+                    "ON CONFLICT (candidate) DO UPDATE SET count = count + 1",
+                    (ballot["vote"],),
+                )
+                db.execute("UPDATE counters SET value = value + 1 WHERE name = 'version'")
+                (count,) = db.execute(
+                    "SELECT count FROM tally WHERE candidate = ?", (ballot["vote"],)
+                ).fetchone()
+                (version,) = db.execute(
+                    "SELECT value FROM counters WHERE name = 'version'"
+                ).fetchone()
+        except sqlite3.IntegrityError:
+            return None
+        return version, count
+
+    def _counters(self):
+        rows = dict(self._db.execute("SELECT name, value FROM counters"))
+        return rows["version"], rows["voted"]
+
+    def _results(self):
+        db = self._db
+        # One read transaction so votes and counters belong together
+        db.execute("BEGIN")
+        try:
+            votes = dict(db.execute("SELECT candidate, count FROM tally"))
+            version, voted = self._counters()
+        finally:
+            db.execute("COMMIT")
+        return version, votes, voted
+
+    def _voted_ids(self):
+        rows = self._db.execute("SELECT student_id FROM issued ORDER BY seq")
+        return [student_id for (student_id,) in rows]
+
+    def _ballots(self, start, limit):
+        # Ballot seqs have no gaps: a rejected INSERT rolls back its seq
+        rows = self._db.execute(
+            "SELECT vote, message, signature FROM ballots WHERE seq > ? "
+            "ORDER BY seq LIMIT ?",
+            (start, -1 if limit is None else limit),
+        )
+        return [
+            {"vote": vote, "message": json.loads(message), "signature": signature}
+            for vote, message, signature in rows
+        ]
+
+    def _voted_changes(self, since, limit):
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            entries = db.execute(
+                "SELECT seq, student_id, revokes, NOT EXISTS ("
+                "  SELECT 1 FROM voted_log r WHERE r.revokes = l.seq"
+                ") FROM voted_log l WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, -1 if limit is None else limit + 1),
+            ).fetchall()
+            (epoch,) = db.execute(
+                "SELECT value FROM counters WHERE name = 'epoch'"
+            ).fetchone()
+        finally:
+            db.execute("COMMIT")
+        return voted_changes(entries, since, limit, str(epoch))
+
+    async def issue(self, student_id):
+        if not self.is_eligible(student_id):
+            return NOT_AUTHORIZED
+        return await self._run(self._issue, student_id)
+
+    async def issue_many(self, student_ids):
+        return await self._run(self._issue_many, student_ids)
+
+    async def revoke(self, student_id):
+        await self._run(self._revoke, student_id)
+
+    async def cast(self, ballot):
+        return await self._run(self._cast, ballot)
+
+    async def counters(self):
+        return await self._run(self._counters)
+
+    async def results(self):
+        return await self._run(self._results)
+
+    async def voted_ids(self):
+        return await self._run(self._voted_ids)
+
+    async def ballots(self, start=0, limit=None):
+        return await self._run(self._ballots, start, limit)
+
+    async def voted_changes(self, since=0, limit=None):
+        return await self._run(self._voted_changes, since, limit)
+
+
+class RedisBackend(StateBackend):
+    """State in a Redis-compatible server (Redis, Valkey or app.utils.kvserver).
+
+    Every change is one optimistic transaction: WATCH a key of the student or
+    signature, check it, then do all writes in MULTI/EXEC, which writes
+    nothing if another worker touched the watched key in between, and retry.
+    A crash or a dropped connection therefore never leaves a signature spent
+    without its ballot, or a student issued without the log entry.
+
+    Spent signatures are keys spent:<signature>. Issued students are a set,
+    plus a key issued:<student> bumped on every change of the student, so
+    workers only conflict on the same student. The voted log is a list of
+    JSON [student_id, revokes] entries whose position is the sequence number,
+    revoked issuances are kept in a set of their sequence numbers.
+    """
+
+    def __init__(self, roster, url, prefix="election:"):
+        super().__init__(roster)
+        self.client = RespClient.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, name):
+        return self.prefix + name
+
+    def _issue_commands(self, student_ids):
+        """Writes that issue signatures to students not issued yet"""
+        entries = [json.dumps([student_id, None]) for student_id in student_ids]
+        return [
+            ("SADD", self._key("issued"), *student_ids),
+            *(("INCR", self._key("issued:" + s)) for s in student_ids),
+            ("RPUSH", self._key("issued_order"), *student_ids),
+            ("RPUSH", self._key("voted_log"), *entries),
+        ]
+
+    async def issue(self, student_id):
+        if not self.is_eligible(student_id):
+            return NOT_AUTHORIZED
+        while True:
+            async with self.client.watch(self._key("issued:" + student_id)) as conn:
+                if await conn.execute("SISMEMBER", self._key("issued"), student_id):
+                    return ALREADY_VOTED
+                if await conn.transaction(*self._issue_commands([student_id])):
+                    return ISSUED
+
+    async def issue_many(self, student_ids):
+        # Each eligible student once, in request order
+        eligible = list(dict.fromkeys(s for s in student_ids if self.is_eligible(s)))
+        new_ids = []
+        while eligible:
+            markers = [self._key("issued:" + s) for s in eligible]
+            async with self.client.watch(*markers) as conn:
+                issued = await conn.execute(
+                    "SMISMEMBER", self._key("issued"), *eligible
+                )
+                new_ids = [s for s, done in zip(eligible, issued) if not done]
+                if not new_ids:
+                    break
+                if await conn.transaction(*self._issue_commands(new_ids)):
+                    break
+
+        fresh = set(new_ids)
+        statuses = []
+        for student_id in student_ids:
+            if not self.is_eligible(student_id):
+                statuses.append(NOT_AUTHORIZED)
+            elif student_id in fresh:
+                statuses.append(ISSUED)
+                fresh.discard(student_id)
+            else:
+                statuses.append(ALREADY_VOTED)
+        return statuses
+
+    async def revoke(self, student_id):
+        entry = json.dumps([student_id, None])
+        while True:
+            async with self.client.watch(self._key("issued:" + student_id)) as conn:
+                if not await conn.execute("SISMEMBER", self._key("issued"), student_id):
+                    return
+                # The student's latest issuance; revocations are rare, so a
+                # scan of the log is fine
+                index = await conn.execute(
+                    "LPOS", self._key("voted_log"), entry, "RANK", -1
+                )
+                commands = [
+                    ("SREM", self._key("issued"), student_id),
+                    ("INCR", self._key("issued:" + student_id)),
+                    ("LREM", self._key("issued_order"), -1, student_id),
+                ]
+                if index is not None:
+                    seq = index + 1
+                    revocation = json.dumps([student_id, seq])
+                    commands += [
+                        ("RPUSH", self._key("voted_log"), revocation),
+                        ("SADD", self._key("revoked_seqs"), seq),
+                    ]
+                if await conn.transaction(*commands):
+                    return
+
+    async def cast(self, ballot):
+        signature = str(SpentSignatureStore.normalize(ballot["signature"]))
+        spent = self._key("spent:" + signature)
+        record = json.dumps(ballot)
+        while True:
+            async with self.client.watch(spent) as conn:
+                if await conn.execute("EXISTS", spent):
+                    return None
+                replies = await conn.transaction(
+                    ("SET", spent, 1),
+                    ("RPUSH", self._key("ballots"), record),
+                    ("HINCRBY", self._key("tally"), ballot["vote"], 1),
+                    ("INCR", self._key("version")),
+                )
+            if replies:
+                _, _, count, version = replies
+                return version, count
+
+    async def counters(self):
+        version, voted = await self.client.transaction(
+            ("GET", self._key("version")),
+            ("SCARD", self._key("issued")),
+        )
+        return int(version or 0), voted
+
+    async def results(self):
+        fields, version, voted = await self.client.transaction(
+            ("HGETALL", self._key("tally")),
+            ("GET", self._key("version")),
+            ("SCARD", self._key("issued")),
+        )
+        votes = {
+            fields[i].decode(): int(fields[i + 1]) for i in range(0, len(fields), 2)
+        }
+        return int(version or 0), votes, voted
+
+    async def voted_ids(self):
+        members = await self.client.execute("LRANGE", self._key("issued_order"), 0, -1)
+        return [member.decode() for member in members]
+
+    async def ballots(self, start=0, limit=None):
+        stop = -1 if limit is None else start + limit - 1
+        records = await self.client.execute("LRANGE", self._key("ballots"), start, stop)
+        return [json.loads(record) for record in records]
+
+    async def voted_changes(self, since=0, limit=None):
+        since = max(0, since)
+        # The epoch is created by whichever worker asks first
+        await self.client.execute(
+            "SET", self._key("epoch"), secrets.token_hex(8), "NX"
+        )
+        stop = -1 if limit is None else since + limit
+        items, revoked, epoch = await self.client.transaction(
+            ("LRANGE", self._key("voted_log"), since, stop),
+            ("SMEMBERS", self._key("revoked_seqs")),
+            ("GET", self._key("epoch")),
+        )
+        revoked = {int(seq) for seq in revoked}
+        entries = []
+        for seq, item in enumerate(items, start=since + 1):
+            student_id, revokes = json.loads(item)
+            entries.append((seq, student_id, revokes, seq not in revoked))
+        return voted_changes(entries, since, limit, epoch.decode())
+
+    async def close(self):
+        await self.client.close()
+
+
+def create_backend(name, roster, **options):
+    """Create the configured state backend
+
+    Args:
+        name: One of BACKENDS
+        roster: Roster, or iterable of eligible student ids
+        options: journal_dir, group_commit and snapshot_every (memory),
+            sqlite_path (sqlite), redis_url and redis_prefix (redis)
+    """
+    if name == "memory":
+        return MemoryBackend(
+            roster,
+            journal_dir=options.get("journal_dir"),
+            group_commit=options.get("group_commit", True),
+            snapshot_every=options.get("snapshot_every", 10000),
+        )
+    if name == "sqlite":
+        return SQLiteBackend(roster, options["sqlite_path"])
+    if name == "redis":
+        return RedisBackend(
+            roster, options["redis_url"], options.get("redis_prefix", "election:")
+        )
+    raise ValueError(f"Unknown state backend {name!r}, expected one of {BACKENDS}")
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+
+class Subscription:
+    """Queue of pending events for one stream client"""
+
+    def __init__(self, max_queue):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.lagging = False
+
+    async def get(self, timeout=None):
+        """Wait for the next encoded event, or None if the client fell behind.
+
+        Raises:
+            asyncio.TimeoutError: If nothing arrived within timeout seconds
+        """
+        if self.lagging and self.queue.empty():
+            return None
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broadcaster:
+    """In-process fan-out of live election events to all stream subscribers.
+
+    Must be used from the event loop thread. A subscriber that does not keep up
+    is marked as lagging instead of blocking publishers; its stream then closes
+    and the client reconnects to receive a fresh snapshot.
+    """
+
+    def __init__(self, max_queue=256):
+        self._max_queue = max_queue
+        self._subscribers = set()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(self._max_queue)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, event, data):
+        """Queue an event for every subscriber, encoding it only once.
+
+        Args:
+            event: SSE event name
+            data: JSON-serializable payload
+        """
+        if not self._subscribers:
+            return
+
+        message = format_sse(event, data)
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.lagging = True
+                self.unsubscribe(subscription)
+
+
+def format_sse(event, data):
+    """Encode an event in text/event-stream format"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,244 @@
+"""Public bulletin board of the accepted ballots.
+
+Every accepted ballot (candidate, signed message, signature) is a leaf of a
+Merkle tree in
+acceptance order. The root commits to all ballots counted so far; a voter who
+keeps their signature can ask for an inclusion proof and check that their
+ballot is under the published root without downloading the others.
+
+The tree is the one of RFC 9162 (Certificate Transparency): SHA-256, leaves
+hashed as 0x00 || data and inner nodes as 0x01 || left || right, with the
+left subtree of a node always the largest power of two. Proofs and roots are
+interchangeable with any implementation of it, see verify_inclusion.
+
+MerkleTree keeps the hash of every complete subtree, one contiguous bytearray
+per level. Appending a leaf hashes at most one node per level, O(log n); a
+proof reads one stored hash per level and needs no hashing at all.
+"""
+import asyncio
+import hashlib
+import json
+
+from app.utils.spent import SpentSignatureStore
+
+HASH_SIZE = 32
+
+# Ballots read from the state backend per query while catching up
+SYNC_PAGE = 10000
+
+
+def leaf_hash(candidate, message, signature):
+    """Leaf of an accepted ballot
+
+    Args:
+        candidate: Candidate name
+        message: Message the signature was verified against
+        signature: Signature as int, or as the decimal string stored with the
+            ballot (without leading zeros)
+    """
+    # The compact JSON of [candidate, message, "signature"]; the digits need
+    # no escaping, which saves json.dumps most of its work
+    data = '[{},{},"{}"]'.format(
+        json.dumps(candidate, ensure_ascii=False),
+        json.dumps(message, ensure_ascii=False),
+        signature,
+    )
+    return hashlib.sha256(b"\x00" + data.encode("utf-8")).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def verify_inclusion(leaf, index, size, path, root):
+    """Check an inclusion proof (RFC 9162, section 2.1.3.2)
+
+    Args:
+        leaf: Leaf hash, see leaf_hash
+        index: Position of the leaf
+        size: Number of leaves the root was computed over
+        path: Sibling hashes from the leaf up, as returned by MerkleTree.proof
+        root: Root hash for size leaves
+
+    Returns:
+        bool: True if the leaf is at index in the tree with this root
+    """
+    if not 0 <= index < size:
+        return False
+    fn, sn, r = index, size - 1, leaf
+    for sibling in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(sibling, r)
+            while not fn & 1 and fn:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+class MerkleTree:
+    """Append-only Merkle tree with O(log n) appends and proofs"""
+
+    def __init__(self):
+        # levels[k] holds the hashes of the complete subtrees of 2**k leaves
+        self.levels = [bytearray()]
+        self.size = 0
+        # Size the roots below were computed for
+        self._roots_size = None
+        self._roots = {}
+
+    def __len__(self):
+        return self.size
+
+    def _node(self, level, position):
+        start = position * HASH_SIZE
+        return bytes(self.levels[level][start : start + HASH_SIZE])
+
+    def append(self, leaf):
+        """Add a leaf hash and return its index"""
+        index = self.size
+        self.levels[0] += leaf
+        self.size += 1
+        # Each level whose last subtree just became complete feeds the next
+        level, position, node = 0, index, leaf
+        while position & 1:
+            node = node_hash(self._node(level, position - 1), node)
+            level += 1
+            position >>= 1
+            if level == len(self.levels):
+                self.levels.append(bytearray())
+            self.levels[level] += node
+        return index
+
+    def leaf(self, index):
+        return self._node(0, index)
+
+    def _partial_roots(self):
+        """Roots of the subtrees that end at the last leaf, by first leaf
+
+        The complete subtrees at the right edge of the tree (one per set bit
+        of size) are folded from the smallest up; every intermediate result
+        is the root of a subtree some proofs need as a sibling.
+        """
+        if self._roots_size != self.size:
+            roots = {}
+            node, start = None, self.size
+            for level in range(len(self.levels)):
+                if self.size >> level & 1:
+                    start -= 1 << level
+                    peak = self._node(level, start >> level)
+                    node = peak if node is None else node_hash(peak, node)
+                    roots[start] = node
+            self._roots, self._roots_size = roots, self.size
+        return self._roots
+
+    def root(self):
+        """Root hash; the hash of the empty string for an empty tree"""
+        if not self.size:
+            return hashlib.sha256(b"").digest()
+        return self._partial_roots()[0]
+
+    def proof(self, index):
+        """Inclusion proof of a leaf in the current tree
+
+        Returns:
+            list: Sibling hashes from the leaf up, for verify_inclusion
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        roots = self._partial_roots()
+        path = []
+        # Walk down from the root, collecting the sibling of each subtree
+        # the leaf is in, then reverse to list them from the leaf up
+        start, size = 0, self.size
+        while size > 1:
+            split = 1 << ((size - 1).bit_length() - 1)
+            if index < start + split:
+                right = start + split
+                if size - split == split:
+                    path.append(self._node(split.bit_length() - 1, right // split))
+                else:
+                    # The right subtree runs to the last leaf
+                    path.append(roots[right])
+                size = split
+            else:
+                path.append(self._node(split.bit_length() - 1, start // split))
+                start, size = start + split, size - split
+        path.reverse()
+        return path
+
+
+class BulletinBoard:
+    """Merkle tree over the accepted ballots of one election
+
+    The ballots stay in the state backend, the board only keeps their hashes
+    and where each signature is. sync appends what the backend accepted since
+    the last call, so with several workers every worker's board follows the
+    same shared order.
+    """
+
+    def __init__(self):
+        self.tree = MerkleTree()
+        # Leading 16 bytes of SHA-256 of the signature -> leaf index
+        self._positions = {}
+        # Created on first use: boards are also built outside the event loop
+        self._lock = None
+
+    def __len__(self):
+        return len(self.tree)
+
+    @staticmethod
+    def _key(signature):
+        digest = hashlib.sha256(str(signature).encode()).digest()
+        return int.from_bytes(digest[:16], "big")
+
+    def append(self, ballot):
+        """Add an accepted ballot as stored by the state backend"""
+        index = self.tree.append(
+            leaf_hash(ballot["vote"], ballot["message"], ballot["signature"])
+        )
+        self._positions[self._key(ballot["signature"])] = index
+        return index
+
+    async def sync(self, state):
+        """Append the ballots the backend accepted since the last sync"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                ballots = await state.ballots(len(self.tree), SYNC_PAGE)
+                for ballot in ballots:
+                    self.append(ballot)
+                if len(ballots) < SYNC_PAGE:
+                    return
+                # Let other requests run while catching up on many ballots
+                await asyncio.sleep(0)
+
+    def root(self):
+        """{"tree_size": n, "root": hex}"""
+        return {"tree_size": len(self.tree), "root": self.tree.root().hex()}
+
+    def proof(self, signature):
+        """Inclusion proof of the ballot with this signature, or None
+
+        Returns:
+            dict: index, tree_size, leaf, path (hex, from the leaf up) and the
+                root they lead to
+        """
+        # Stored signatures are canonical, "0042" has to be looked up as 42
+        key = self._key(SpentSignatureStore.normalize(signature))
+        index = self._positions.get(key)
+        if index is None:
+            return None
+        return {
+            "index": index,
+            "tree_size": len(self.tree),
+            "leaf": self.tree.leaf(index).hex(),
+            "path": [node.hex() for node in self.tree.proof(index)],
+            "root": self.tree.root().hex(),
+        }
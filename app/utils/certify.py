@@ -0,0 +1,322 @@
+"""Re-verify every ballot when an election closes and certify the tally.
+
+Every ballot was verified when it was cast. Before the result is published,
+certify() checks all stored ballots once more against the private key, so a
+ballot that was altered or slipped into the state backend afterwards is not
+counted, and reports the tally of the ballots that hold. A ballot is counted
+for the candidate its signed message "<candidate>#<nonce>" names: the name
+stored next to it is not signed, so a ballot whose name differs from that
+candidate, or whose message names no candidate, is not counted either.
+
+Checking S == H(m)^x one ballot at a time costs a full exponentiation per
+ballot. Instead the ballots are verified in batches with the randomized
+small-exponent test: for e_i = 2^64 + r_i with random 64-bit r_i,
+
+    prod(S_i^e_i) == (prod(H_i^e_i))^x  (mod p)
+
+holds for a batch with an invalid ballot with probability at most 2^-64, and
+costs one full exponentiation per batch plus two short ones per ballot. A
+batch that fails is split in halves, with the same e_i, until the invalid
+ballots are found.
+The test is only sound in the subgroup of prime order q of a safe prime
+p = 2q + 1; the sign that remains is checked per ballot with the Legendre
+symbol, which needs no exponentiation. Keys whose p is not a safe prime, like
+the demo key, are verified one ballot at a time.
+
+Ballots are read from the backend in chunks, identical ballots and message
+hashes are computed once, and the batches run on the crypto executor, so a
+process pool spreads them over all cores.
+
+Run it once the election is closed, with the same environment as the
+server (with the memory backend, after the server has stopped, so its journal
+is complete):
+
+    python -m app.utils.certify --workers 4
+    python -m app.utils.certify --election informatik-1
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import time
+
+from app.utils.crypto import ballot_candidate, message_to_int
+from app.utils.groups import is_probable_prime
+
+# Ballots read from the state backend per query
+CHUNK_SIZE = 10000
+
+# Ballots per executor job
+JOB_SIZE = 256
+
+# Random bits of the exponents; an invalid batch passes with at most 2^-64
+SECURITY_BITS = 64
+
+
+def jacobi(a, n):
+    """Jacobi symbol (a/n) for odd n > 0; the Legendre symbol for prime n"""
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def is_safe_prime(p, rounds=16):
+    """True if p = 2q + 1 with q prime (p itself is assumed prime)"""
+    return p % 4 == 3 and is_probable_prime((p - 1) // 2, rounds)
+
+
+def find_invalid(pairs, private_key, batch=True):
+    """Indices of the (message hash, signature) pairs with signature != H^x
+
+    Args:
+        pairs: List of (message hash, signature) as ints
+        private_key: Signer's private key
+        batch: Use the small-exponent batch test; p must be a safe prime
+
+    Returns:
+        list: Sorted indices of the invalid pairs
+    """
+    p, x = private_key["p"], private_key["x"]
+    if not batch:
+        return [
+            i for i, (h, s) in enumerate(pairs) if not (0 < s < p and pow(h, x, p) == s)
+        ]
+
+    # The Legendre symbol of H^x is that of H to the x, so a signature with
+    # the wrong sign fails here and the batch test only has to cover the
+    # subgroup of order q
+    invalid, candidates = [], []
+    for i, (h, s) in enumerate(pairs):
+        expected = jacobi(h, p) if x & 1 else 1
+        if 0 < s < p and jacobi(s, p) == expected:
+            candidates.append(i)
+        else:
+            invalid.append(i)
+
+    # h^e and s^e per pair, drawn once: the halves of a failed batch reuse
+    # them, so bisecting only costs multiplications and the final pows
+    terms = {}
+    for i in candidates:
+        h, s = pairs[i]
+        # Never 0, and all SECURITY_BITS bits random
+        e = secrets.randbits(SECURITY_BITS) + (1 << SECURITY_BITS)
+        terms[i] = (pow(h, e, p), pow(s, e, p))
+
+    def check(indices):
+        if len(indices) == 1:
+            h, s = pairs[indices[0]]
+            if pow(h, x, p) != s:
+                invalid.append(indices[0])
+            return
+        h_product, s_product = 1, 1
+        for i in indices:
+            h_term, s_term = terms[i]
+            h_product = h_product * h_term % p
+            s_product = s_product * s_term % p
+        if pow(h_product, x, p) != s_product:
+            middle = len(indices) // 2
+            check(indices[:middle])
+            check(indices[middle:])
+
+    if candidates:
+        check(candidates)
+    return sorted(invalid)
+
+
+async def certify(
+    state,
+    private_key,
+    run,
+    candidates=None,
+    size=None,
+    batch=None,
+    jobs=4,
+    chunk_size=CHUNK_SIZE,
+    job_size=JOB_SIZE,
+):
+    """Re-verify the stored ballots and count the valid ones
+
+    Args:
+        state: StateBackend holding the ballots
+        private_key: Signer's private key
+        run: Coroutine function run(fn, *args) for the verification jobs,
+            e.g. CryptoExecutor.run
+        candidates: Candidates a valid ballot may name (default: any)
+        size: Check the first size ballots, e.g. those under a bulletin
+            board root (default: all)
+        batch: Batch verification on or off (default: on for safe primes)
+        jobs: Jobs submitted at once; at least the executor's workers
+        chunk_size: Ballots read from the backend per query
+        job_size: Ballots per job
+
+    Returns:
+        dict: ballots, valid, invalid (index, signature and reason, either
+            "signature" or "message", of each invalid ballot), votes per
+            candidate, batch, seconds and ballots_per_second
+    """
+    start = time.perf_counter()
+    p = private_key["p"]
+    if batch is None:
+        batch = await run(is_safe_prime, p)
+
+    votes, invalid = {}, []
+    slots = asyncio.Semaphore(jobs)
+    # One task per chunk, counting it once its jobs are done
+    tasks = []
+
+    async def verify(pairs, owners):
+        try:
+            bad = await run(find_invalid, pairs, private_key, batch)
+        finally:
+            slots.release()
+        # owners[k] lists the ballots that sent pair k
+        return [ballot for k in bad for ballot in owners[k]]
+
+    async def count(chunk_start, ballots, chunk_jobs, mismatched):
+        bad = dict.fromkeys(mismatched, "message")
+        for job in chunk_jobs:
+            bad.update(dict.fromkeys(await job, "signature"))
+        for offset, ballot in enumerate(ballots):
+            if offset in bad:
+                invalid.append(
+                    {
+                        "index": chunk_start + offset,
+                        "signature": ballot["signature"],
+                        "reason": bad[offset],
+                    }
+                )
+            else:
+                # Checked against the signed message above
+                votes[ballot["vote"]] = votes.get(ballot["vote"], 0) + 1
+
+    read = 0
+    while size is None or read < size:
+        limit = chunk_size if size is None else min(chunk_size, size - read)
+        ballots = await state.ballots(read, limit)
+        if not ballots:
+            break
+
+        # Identical ballots and repeated messages are only computed once
+        hashes, positions, pairs, owners, mismatched = {}, {}, [], [], []
+        for offset, ballot in enumerate(ballots):
+            message = ballot["message"]
+            # Only the message is signed, the candidate name has to match the
+            # one it names
+            named = ballot_candidate(
+                message, (ballot["vote"],) if candidates is None else candidates
+            )
+            if named != ballot["vote"]:
+                mismatched.append(offset)
+                continue
+            key = json.dumps(message)
+            h = hashes.get(key)
+            if h is None:
+                h = hashes[key] = message_to_int(message, p)
+            s = int(ballot["signature"])
+            position = positions.get((h, s))
+            if position is None:
+                position = positions[(h, s)] = len(pairs)
+                pairs.append((h, s))
+                owners.append([])
+            owners[position].append(offset)
+
+        chunk_jobs = []
+        for first in range(0, len(pairs), job_size):
+            # Reading waits here while jobs slots are busy, so only a few
+            # chunks are ever in memory
+            await slots.acquire()
+            job = verify(
+                pairs[first : first + job_size], owners[first : first + job_size]
+            )
+            chunk_jobs.append(asyncio.ensure_future(job))
+        tasks.append(
+            asyncio.ensure_future(count(read, ballots, chunk_jobs, mismatched))
+        )
+        read += len(ballots)
+        if len(ballots) < limit:
+            break
+
+    await asyncio.gather(*tasks)
+    seconds = time.perf_counter() - start
+    return {
+        "ballots": read,
+        "valid": read - len(invalid),
+        "invalid": sorted(invalid, key=lambda ballot: ballot["index"]),
+        "votes": votes,
+        "batch": batch,
+        "seconds": round(seconds, 3),
+        "ballots_per_second": round(read / seconds, 1) if seconds else None,
+    }
+
+
+def open_election(election_id=None):
+    """The default election, or a hosted one, as the server would open it"""
+    from app import main as server
+    from app.utils.backends import create_backend
+    from app.utils.config import load_config
+
+    server.config = config = load_config()
+    if election_id:
+        election = server.load_election(election_id)
+        return election.keys, election.candidates, election.state
+    roster, _ = server.read_roster()
+    state = create_backend(
+        config.state_backend,
+        roster,
+        journal_dir=config.journal_dir,
+        group_commit=config.journal_group_commit,
+        snapshot_every=config.journal_snapshot_every,
+        sqlite_path=config.sqlite_path,
+        redis_url=config.redis_url,
+        redis_prefix=config.redis_prefix,
+    )
+    return server.load_keys(), config.candidates, state
+
+
+async def run_certify(args):
+    from app.utils.bulletin import BulletinBoard
+    from app.utils.executor import CryptoExecutor
+
+    keys, candidates, state = await asyncio.to_thread(open_election, args.election)
+    executor = CryptoExecutor("process", workers=args.workers)
+    try:
+        # Certify exactly the ballots under the published root
+        board = BulletinBoard()
+        await board.sync(state)
+        result = await certify(
+            state,
+            keys["private_key"],
+            executor.run,
+            candidates=candidates,
+            size=len(board),
+            batch=False if args.no_batch else None,
+            jobs=2 * executor.workers,
+        )
+        result["bulletin_root"] = board.root()["root"]
+        return result
+    finally:
+        executor.shutdown()
+        await state.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--election", default=None, help="hosted election id")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-batch", action="store_true")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run_certify(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
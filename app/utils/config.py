@@ -0,0 +1,157 @@
+"""Configuration from environment variables, parsed and validated once.
+
+load_config() reads every setting of the app (see the table in the README)
+into a Config, an immutable namedtuple. It reports all invalid or missing
+variables at once, so a misconfigured server stops at startup with one
+message instead of failing on the first request that needs a setting.
+"""
+import collections
+import logging
+import os
+
+from app.utils.admission import parse_rate
+from app.utils.backends import BACKENDS
+from app.utils.executor import EXECUTOR_MODES
+from app.utils.logs import LOG_FORMATS
+
+
+class ConfigError(ValueError):
+    """Raised with every problem found in the environment"""
+
+
+def _list(value):
+    # "anna, ben," -> ("anna", "ben")
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ValueError(f"must be at least 1, got {number}")
+    return number
+
+
+def _non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"must not be negative, got {number}")
+    return number
+
+
+def _optional_int(value):
+    # 0 means "not set", e.g. KEY_BITS=0 keeps the demo key
+    return _non_negative_int(value) or None
+
+
+def _seconds(value):
+    seconds = float(value)
+    if seconds <= 0:
+        raise ValueError(f"must be positive, got {value}")
+    return seconds
+
+
+def _flag(value):
+    return value.strip() != "0"
+
+
+def _choice(*options):
+    def parse(value):
+        if value not in options:
+            raise ValueError(f"expected one of {', '.join(options)}, got {value!r}")
+        return value
+
+    return parse
+
+
+def _log_level(value):
+    level = value.upper()
+    if not isinstance(logging.getLevelName(level), int):
+        raise ValueError(f"unknown log level {value!r}")
+    return level
+
+
+# (field, environment variable, default or None if required, parser)
+SETTINGS = [
+    ("course_name", "COURSE_NAME", None, str),
+    # Either VOTING_STUDENTS or ROSTER_FILE names the eligible students
+    ("voting_students", "VOTING_STUDENTS", "", _list),
+    ("roster_file", "ROSTER_FILE", "", str),
+    ("roster_column", "ROSTER_COLUMN", "student_id", str),
+    ("roster_cache_dir", "ROSTER_CACHE_DIR", "data/roster", str),
+    ("elections_dir", "ELECTIONS_DIR", "data/elections", str),
+    ("elections_max_active", "ELECTIONS_MAX_ACTIVE", "64", _positive_int),
+    ("elections_idle_seconds", "ELECTIONS_IDLE_SECONDS", "600", _seconds),
+    ("candidates", "CANDIDATES", None, _list),
+    ("key_bits", "KEY_BITS", "0", _optional_int),
+    ("key_group", "KEY_GROUP", "ffdhe", str),
+    ("params_cache_dir", "PARAMS_CACHE_DIR", "data/params", str),
+    ("verify_cache_size", "VERIFY_CACHE_SIZE", "4096", _non_negative_int),
+    ("crypto_executor", "CRYPTO_EXECUTOR", "auto", _choice("auto", *EXECUTOR_MODES)),
+    ("crypto_workers", "CRYPTO_WORKERS", "0", _optional_int),
+    ("crypto_max_pending", "CRYPTO_MAX_PENDING", "1024", _positive_int),
+    ("sign_batch_limit", "SIGN_BATCH_LIMIT", "10000", _positive_int),
+    ("dh_pool_size", "DH_POOL_SIZE", "32", _non_negative_int),
+    ("dh_session_ttl", "DH_SESSION_TTL", "300", _seconds),
+    ("dh_max_sessions", "DH_MAX_SESSIONS", "10000", _positive_int),
+    ("admission_concurrency", "ADMISSION_CONCURRENCY", "64", _positive_int),
+    (
+        "admission_batch_concurrency",
+        "ADMISSION_BATCH_CONCURRENCY",
+        "2",
+        _positive_int,
+    ),
+    ("admission_max_queue", "ADMISSION_MAX_QUEUE", "256", _non_negative_int),
+    ("admission_queue_timeout", "ADMISSION_QUEUE_TIMEOUT", "2", _seconds),
+    ("rate_limit_ip", "RATE_LIMIT_IP", "20/200", parse_rate),
+    ("rate_limit_student", "RATE_LIMIT_STUDENT", "0.2/5", parse_rate),
+    ("state_backend", "STATE_BACKEND", "memory", _choice(*BACKENDS)),
+    ("journal_dir", "JOURNAL_DIR", "data/journal", str),
+    ("journal_group_commit", "JOURNAL_GROUP_COMMIT", "1", _flag),
+    ("journal_snapshot_every", "JOURNAL_SNAPSHOT_EVERY", "10000", _positive_int),
+    ("sqlite_path", "STATE_SQLITE_PATH", "data/election.db", str),
+    ("redis_url", "STATE_REDIS_URL", "redis://127.0.0.1:6379/0", str),
+    ("redis_prefix", "STATE_REDIS_PREFIX", "election:", str),
+    ("log_level", "LOG_LEVEL", "INFO", _log_level),
+    ("log_format", "LOG_FORMAT", "text", _choice(*LOG_FORMATS)),
+    ("log_debug_sample", "LOG_DEBUG_SAMPLE", "1", _positive_int),
+    ("log_queue_size", "LOG_QUEUE_SIZE", "10000", _positive_int),
+]
+
+Config = collections.namedtuple("Config", [field for field, _, _, _ in SETTINGS])
+
+
+def load_config(environ=None):
+    """Parse the settings from the environment
+
+    Args:
+        environ: Mapping to read instead of os.environ
+
+    Returns:
+        Config: Immutable settings, e.g. config.voting_students
+
+    Raises:
+        ConfigError: Listing every missing or invalid variable
+    """
+    environ = os.environ if environ is None else environ
+    values, errors = {}, []
+    for field, name, default, parse in SETTINGS:
+        value = environ.get(name, default)
+        if value is None:
+            errors.append(f"Environment variable {name} is required")
+            continue
+        try:
+            values[field] = parse(value)
+        except ValueError as e:
+            errors.append(f"Invalid {name}: {e}")
+
+    if "candidates" in values and not values["candidates"]:
+        errors.append("CANDIDATES cannot be empty")
+    if "voting_students" in values and "roster_file" in values:
+        if values["voting_students"] and values["roster_file"]:
+            errors.append("Set either VOTING_STUDENTS or ROSTER_FILE, not both")
+        elif not values["voting_students"] and not values["roster_file"]:
+            errors.append("VOTING_STUDENTS or ROSTER_FILE is required")
+
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return Config(**values)
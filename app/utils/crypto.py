@@ -1,21 +1,36 @@
-import random
+import functools
 import json
+import logging
+import secrets
+import threading
+from collections import OrderedDict
 from hashlib import sha256
 
+logger = logging.getLogger(__name__)
+
 # Diffie-Hellman Blind Signature implementation
 
 
-def generate_keys():
+def generate_keys(group=None):
     """Schlüsselerzeugung für den Signierer
 
+    Args:
+        group: Gruppenparameter p und g (siehe app.utils.groups.load_group),
+            ohne Angabe die Demo-Gruppe mit p = 9973
+
     Returns:
         tuple: (public_key, private_key)
     """
-    p = 9973  # Primzahl < 10.000
-    g = 5  # Erzeuger in GF(p)
+    if group is None:
+        p = 9973  # Primzahl < 10.000
+        g = 5  # Erzeuger in GF(p)
+    else:
+        p = group["p"]
+        g = group["g"]
 
-    # Geheimer Schlüssel des Signierers
-    x = random.randint(2, p - 2)
+    # Geheimer Schlüssel des Signierers, 2 <= x <= p - 2, aus einer
+    # kryptografisch sicheren Quelle (random ist vorhersagbar)
+    x = secrets.randbelow(p - 3) + 2
 
     # Öffentlicher Schlüssel y = g^x mod p
     y = pow(g, x, p)
@@ -26,6 +41,18 @@ def generate_keys():
     )
 
 
+def key_pair_matches(public_key, private_key):
+    """Check that a key pair belongs together: y = g^x mod p
+
+    Returns:
+        bool: True if the private key x produces the public key y
+    """
+    p, g = public_key["p"], public_key["g"]
+    if (private_key["p"], private_key["g"]) != (p, g):
+        return False
+    return pow(g, private_key["x"], p) == public_key["y"]
+
+
 def hash_to_int(message, p):
     """Hash a message to an integer in Zp*
 
@@ -49,6 +76,122 @@ def hash_to_int(message, p):
     return hash_int
 
 
+def message_to_int(message, p):
+    """Map a ballot message to the integer that gets signed
+
+    Strings are hashed with hash_to_int, integers are reduced mod p.
+    """
+    if isinstance(message, str):
+        return hash_to_int(message, p)
+    return int(message) % p
+
+
+def ballot_candidate(message, candidates):
+    """Candidate a signed ballot message is cast for
+
+    Voters sign "<candidate>#<nonce>" with a random nonce of their own:
+    signatures are deterministic, so the bare candidate name would give every
+    voter for a candidate the same signature, and only the first one would
+    count.
+
+    Args:
+        message: Signed message
+        candidates: Candidate names of the election
+
+    Returns:
+        str: The candidate, or None if the message names none or has no nonce
+    """
+    if not isinstance(message, str):
+        return None
+    candidate, separator, nonce = message.rpartition("#")
+    if not separator or not nonce or candidate not in candidates:
+        return None
+    return candidate
+
+
+class FixedBaseTable:
+    """Precomputed powers of a fixed base for fast base^e mod p.
+
+    The exponent is split into windows of ``window`` bits. For window i the
+    table holds base^(d * 2^(window*i)) for every digit d, so an exponentiation
+    is one multiplication per window and no squarings. For a 2048-bit group and
+    4-bit windows that is 512 multiplications instead of roughly 2048 squarings
+    plus the multiplications of a plain pow(), at the cost of about 2 MB per
+    table. Worth it for bases that are used over and over (g and y).
+    """
+
+    def __init__(self, base, p, window=4):
+        """
+        Args:
+            base: Fixed base, e.g. g or y of a key
+            p: Prime modulus
+            window: Bits per window
+        """
+        self.base = base % p
+        self.p = p
+        self.window = window
+        # Exponents are reduced mod p - 1 (Fermat), so they fit in this many bits
+        self.exponent_bits = (p - 1).bit_length()
+
+        self._rows = []
+        row_base = self.base
+        for _ in range(-(-self.exponent_bits // window)):
+            row = [1]
+            for _ in range((1 << window) - 1):
+                row.append(row[-1] * row_base % p)
+            self._rows.append(row)
+            # base^(2^window) relative to this row
+            row_base = row[-1] * row_base % p
+
+    def pow(self, exponent):
+        """Compute base^exponent mod p (negative exponents are allowed)"""
+        p = self.p
+        exponent %= p - 1
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self._rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit] % p
+            exponent >>= self.window
+        return result
+
+
+@functools.lru_cache(maxsize=8)
+def fixed_base_table(base, p, window=4):
+    """FixedBaseTable for base, built once per process
+
+    Crypto workers call this instead of receiving a table with every job;
+    elections in the same standard group share the table for g.
+    """
+    return FixedBaseTable(base, p, window)
+
+
+def precompute_key_tables(public_key, window=4):
+    """Build fixed-base tables for the generator g and the public key y
+
+    Args:
+        public_key: Öffentlicher Schlüssel des Signierers
+        window: Bits per window, see FixedBaseTable
+
+    Returns:
+        dict: FixedBaseTable for "g" and "y"
+    """
+    p = public_key["p"]
+    return {
+        "g": FixedBaseTable(public_key["g"], p, window),
+        "y": FixedBaseTable(public_key["y"], p, window),
+    }
+
+
+def _fixed_pow(tables, name, base, exponent, p):
+    if tables is not None and name in tables:
+        return tables[name].pow(exponent)
+    return pow(base, exponent, p)
+
+
 def generate_dh_params(public_key):
     """Diffie-Hellman Parameter für den Wähler generieren.
 
@@ -62,7 +205,7 @@ def generate_dh_params(public_key):
     g = public_key["g"]
 
     # Wähler wählt Zufallswert a
-    a = random.randint(2, p - 2)
+    a = secrets.randbelow(p - 3) + 2
 
     # Berechne A = g^a mod p
     A = pow(g, a, p)
@@ -92,7 +235,7 @@ def compute_shared_key(dh_params, B, public_key):
     return K
 
 
-def blind_message(message, r, public_key):
+def blind_message(message, r, public_key, tables=None):
     """Blind a message with a random factor r
 
     M' = M * g^r mod p
@@ -101,6 +244,7 @@ def blind_message(message, r, public_key):
         message: Original message (can be string or int)
         r: Random blinding factor
         public_key: Signer's public key
+        tables: Optional result of precompute_key_tables for public_key
 
     Returns:
         int: Blinded message
@@ -109,13 +253,10 @@ def blind_message(message, r, public_key):
     g = public_key["g"]
 
     # Hash message to an integer if it's a string
-    if isinstance(message, str):
-        message_int = hash_to_int(message, p)
-    else:
-        message_int = int(message) % p
+    message_int = message_to_int(message, p)
 
     # Compute g^r mod p
-    g_r = pow(g, r, p)
+    g_r = _fixed_pow(tables, "g", g, r, p)
 
     # Blind the message: M' = M * g^r mod p
     blinded_message = (message_int * g_r) % p
@@ -147,7 +288,54 @@ def sign_blinded_message(blinded_message, private_key):
     return blind_signature
 
 
-def unblind_signature(blind_signature, r, public_key):
+# Below these sizes a process pool costs more in pickling than it saves
+PARALLEL_SIGN_MIN_BITS = 1024
+PARALLEL_SIGN_MIN_BATCH = 64
+
+
+def split_batch(batch, p, workers):
+    """Split a batch of blinded messages into chunks to sign in parallel
+
+    One chunk per worker for large moduli and batches, otherwise a single
+    chunk, since then a process pool costs more than it saves.
+
+    Args:
+        batch: Blinded messages
+        p: Modulus of the signing key
+        workers: Workers of the executor the chunks are run on
+
+    Returns:
+        list: Non-empty chunks that together are batch, in order
+    """
+    if not batch:
+        return []
+    if p.bit_length() < PARALLEL_SIGN_MIN_BITS or len(batch) < PARALLEL_SIGN_MIN_BATCH:
+        return [batch]
+    size = -(-len(batch) // workers)
+    return [batch[i : i + size] for i in range(0, len(batch), size)]
+
+
+def sign_blinded_messages(batch, private_key):
+    """Sign a batch of blinded messages with the same private key
+
+    S'_i = (M'_i)^x mod p
+
+    Runs in the calling process; the server splits large batches with
+    split_batch and signs the chunks on its crypto executor.
+
+    Args:
+        batch: Blinded messages (int or decimal string)
+        private_key: Signer's private key
+
+    Returns:
+        list: Blind signatures in the order of batch
+    """
+    p = private_key["p"]
+    x = private_key["x"]
+    return [pow(int(m), x, p) for m in batch]
+
+
+def unblind_signature(blind_signature, r, public_key, tables=None):
     """Unblind a signature
 
     S = S' * y^(-r) mod p
@@ -156,6 +344,7 @@ def unblind_signature(blind_signature, r, public_key):
         blind_signature: Blinded signature
         r: Random factor used for blinding
         public_key: Signer's public key
+        tables: Optional result of precompute_key_tables for public_key
 
     Returns:
         int: Unblinded signature
@@ -165,7 +354,7 @@ def unblind_signature(blind_signature, r, public_key):
 
     # Compute y^(-r) mod p = (g^x)^(-r) = g^(-x*r) mod p
     # First compute y^r
-    y_r = pow(y, r, p)
+    y_r = _fixed_pow(tables, "y", y, r, p)
 
     # Then compute the modular inverse of y^r
     y_neg_r = mod_inv(y_r, p)
@@ -176,46 +365,151 @@ def unblind_signature(blind_signature, r, public_key):
     return signature
 
 
-def verify_signature(message, signature, public_key):
-    """Verify a signature with the public key
+def verify_signature(message, signature, private_key):
+    """Verify an unblinded signature
 
-    For this demonstration, we'll implement a simplified verification process that
-    allows us to focus on the blind signature concept without requiring the full
-    mathematical verification.
+    Unblinding leaves S = (H * g^r)^x * y^(-r) = H^x mod p, so a signature is
+    valid iff S == H(message)^x mod p. Checking this needs the secret x, i.e. only
+    the signer (here: the election server) can verify its ballots.
 
     Args:
         message: Original message
         signature: Signature
-        public_key: Signer's public key
+        private_key: Signer's private key
 
     Returns:
         bool: True if the signature is valid
-    """
-    p = public_key["p"]
-
-    # Hash message to an integer if it's a string
-    if isinstance(message, str):
-        message_hash = hash_to_int(message, p)
-    else:
-        message_hash = int(message) % p
 
-    # For demonstration purposes, we'll consider the signature valid
-    # This is a simplification for the demo to focus on the blinding process
+    Raises:
+        ValueError: If private_key has no secret exponent x
+    """
+    if "x" not in private_key:
+        raise ValueError("Signature verification requires the private key")
+    p = private_key["p"]
+    signature = int(signature)
+    if not 0 < signature < p:
+        return False
+    message_hash = message_to_int(message, p)
+    expected = pow(message_hash, private_key["x"], p)
+    if logger.isEnabledFor(logging.DEBUG):
+        _log_verification(message_hash, signature, signature == expected, False)
+    return signature == expected
+
+
+def _log_verification(message_hash, signature, valid, cached):
+    # Demo explanation of a verification, see app.utils.logs. The expected
+    # value H(m)^x is a valid signature of m and must never be logged
+    logger.debug(
+        "verify",
+        extra={
+            "fields": {
+                "hash": message_hash,
+                "signature": signature,
+                "valid": valid,
+                "cached": cached,
+            }
+        },
+    )
 
-    # In a real implementation, we would verify that:
-    # g^message_hash = y^signature mod p
 
-    # But for demo/testing purposes, we'll accept all signatures
-    # In a production system, this would be a proper cryptographic verification
+class SignatureVerifier:
+    """verify_signature with an LRU cache of verified messages.
 
-    print(f"DEMO VERIFICATION: Message hash: {message_hash}, Signature: {signature}")
-    print(
-        f"Note: In demo mode, all signatures are considered valid for the original message"
-    )
+    Signatures are deterministic (S = H^x), so the cache maps a message hash to
+    its one valid signature. Every ballot for an already seen message, e.g. the
+    same candidate, is checked with a dict lookup instead of a modular
+    exponentiation. Thread-safe.
+    """
 
-    # For the demo, always return true for the original message
-    # In a real system, we would actually verify the signature cryptographically
-    return True
+    def __init__(self, private_key, cache_size=4096):
+        """
+        Args:
+            private_key: Signer's private key
+            cache_size: Maximum number of cached message hashes (0 disables)
+
+        Raises:
+            ValueError: If private_key has no secret exponent x
+        """
+        if "x" not in private_key:
+            raise ValueError("Signature verification requires the private key")
+        self.p = private_key["p"]
+        self._x = private_key["x"]
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_entries(self):
+        """Number of cached message hashes"""
+        return len(self._cache)
+
+    def _lookup(self, message_hash):
+        with self._lock:
+            expected = self._cache.get(message_hash)
+            if expected is not None:
+                self._cache.move_to_end(message_hash)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return expected
+
+    def _remember(self, message_hash, expected):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[message_hash] = expected
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def expected_signature(self, message_hash):
+        """Return H^x mod p for a message hash, cached"""
+        expected = self._lookup(message_hash)
+        if expected is None:
+            expected = pow(message_hash, self._x, self.p)
+            self._remember(message_hash, expected)
+        return expected
+
+    def verify(self, message, signature):
+        """Same result as verify_signature(message, signature, private_key)"""
+        signature = int(signature)
+        if not 0 < signature < self.p:
+            return False
+        message_hash = message_to_int(message, self.p)
+        expected = self._lookup(message_hash)
+        cached = expected is not None
+        if not cached:
+            expected = pow(message_hash, self._x, self.p)
+            self._remember(message_hash, expected)
+        if logger.isEnabledFor(logging.DEBUG):
+            _log_verification(message_hash, signature, signature == expected, cached)
+        return signature == expected
+
+    async def verify_async(self, message, signature, run):
+        """verify() with the exponentiation of a cache miss awaited via run
+
+        Args:
+            message: Original message
+            signature: Signature
+            run: Coroutine function called as run(pow, base, exponent, modulus),
+                e.g. CryptoExecutor.run
+
+        Returns:
+            bool: True if the signature is valid
+        """
+        signature = int(signature)
+        if not 0 < signature < self.p:
+            return False
+        message_hash = message_to_int(message, self.p)
+        expected = self._lookup(message_hash)
+        cached = expected is not None
+        if not cached:
+            expected = await run(pow, message_hash, self._x, self.p)
+            self._remember(message_hash, expected)
+        if logger.isEnabledFor(logging.DEBUG):
+            _log_verification(message_hash, signature, signature == expected, cached)
+        return signature == expected
 
 
 def mod_inv(a, p):
@@ -227,12 +521,13 @@ def mod_inv(a, p):
 
 
 # DH key exchange protocol - only used by the server
-def generate_server_dh_params(A, public_key):
+def generate_server_dh_params(A, public_key, tables=None):
     """Server generiert seine DH-Parameter und berechnet den gemeinsamen Schlüssel
 
     Args:
         A: Der öffentliche A-Wert des Wählers
         public_key: Öffentlicher Schlüssel des Signierers
+        tables: Optional vorberechnete Tabellen (precompute_key_tables)
 
     Returns:
         dict: B-Wert und berechneter gemeinsamer Schlüssel K
@@ -241,10 +536,10 @@ def generate_server_dh_params(A, public_key):
     g = public_key["g"]
 
     # Server wählt zufälligen Wert b
-    b = random.randint(2, p - 2)
+    b = secrets.randbelow(p - 3) + 2
 
     # Berechne B = g^b mod p
-    B = pow(g, b, p)
+    B = _fixed_pow(tables, "g", g, b, p)
 
     # Berechne gemeinsamen Schlüssel K = A^b mod p
     K = pow(A, b, p)
@@ -252,6 +547,31 @@ def generate_server_dh_params(A, public_key):
     return {"B": B, "K": K}
 
 
+def generate_server_dh_pairs(public_key, count):
+    """Server-Geheimnisse b mit B = g^b mod p auf Vorrat erzeugen
+
+    Mit einem vorab erzeugten Paar bleibt für den Austausch nur noch K = A^b.
+
+    Args:
+        public_key: Öffentlicher Schlüssel des Signierers
+        count: Anzahl der Paare
+
+    Returns:
+        list: (b, B)-Paare
+    """
+    p = public_key["p"]
+    # g ist fest: mit der Tabelle kostet B = g^b nur eine Multiplikation pro
+    # Fenster statt aller Quadrierungen eines pow()
+    table = fixed_base_table(public_key["g"], p)
+    pairs = []
+    for _ in range(count):
+        # secrets statt random: geforkte Krypto-Worker erben denselben
+        # random-Zustand und würden dieselben b ziehen
+        b = secrets.randbelow(p - 3) + 2
+        pairs.append((b, table.pow(b)))
+    return pairs
+
+
 # --------------------------
 # Vollständiger Workflow
 # --------------------------
@@ -293,7 +613,7 @@ def complete_blind_signature_flow(message, public_key, private_key):
     signature = unblind_signature(blind_signature, voter_K, public_key)
 
     # 7. Verifikation
-    is_valid = verify_signature(message, signature, public_key)
+    is_valid = verify_signature(message, signature, private_key)
 
     return {
         "message": message,
@@ -0,0 +1,141 @@
+"""Diffie-Hellman sessions of /dh-exchange.
+
+A DH exchange costs the server two modular exponentiations: B = g^b for a
+fresh secret b, and the shared key K = A^b. The first does not depend on the
+request, so DHKeyPool keeps a supply of ready (b, B) pairs that a background
+task refills whenever the pool runs low, and a request only waits for A^b.
+When requests outrun the refill, a request computes its own pair as before.
+
+The shared keys are kept in a DHSessionStore: at most max_sessions of them,
+each for ttl seconds, so clients that never come back cost nothing after a
+while and a flood of exchanges cannot grow the store without bound. No route
+reads a shared key yet; the sessions are only stored for now.
+"""
+import asyncio
+import collections
+import logging
+import secrets
+import time
+
+from app.utils.executor import CryptoOverloaded
+
+logger = logging.getLogger(__name__)
+
+
+class DHSessionStore:
+    """Shared keys by session id, bounded in number and lifetime
+
+    Every session lives equally long, so insertion order is expiry order and
+    expired or surplus sessions are always dropped from the front.
+    """
+
+    def __init__(self, max_sessions=10000, ttl=300, clock=time.monotonic):
+        """
+        Args:
+            max_sessions: Sessions kept at most; the oldest make room
+            ttl: Seconds a session stays valid
+            clock: Time source, for tests
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        # Session id -> (expiry time, shared key), oldest first
+        self._sessions = collections.OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        self.expire()
+        return len(self._sessions)
+
+    def expire(self):
+        """Drop expired sessions"""
+        now = self.clock()
+        while self._sessions:
+            session_id, (expires, _) = next(iter(self._sessions.items()))
+            if expires > now:
+                break
+            del self._sessions[session_id]
+
+    def create(self, shared_key):
+        """Store a shared key under a new random session id and return the id"""
+        self.expire()
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        session_id = secrets.token_urlsafe(16)
+        self._sessions[session_id] = (self.clock() + self.ttl, shared_key)
+        return session_id
+
+
+class DHKeyPool:
+    """Precomputed (b, g^b mod p) pairs, refilled in the background
+
+    Call start() from the event loop and stop() on shutdown. Every pair is
+    handed out once.
+    """
+
+    def __init__(self, produce, size=32, batch=4):
+        """
+        Args:
+            produce: Coroutine function count -> list of (b, B) pairs, e.g.
+                generate_server_dh_pairs on the crypto executor
+            size: Pairs to keep ready
+            batch: Pairs produced per call, so a refill never holds the
+                executor for long while requests wait
+        """
+        self.produce = produce
+        self.size = size
+        self.batch = batch
+        self._pairs = collections.deque()
+        self._task = None
+        self._low = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def start(self):
+        self._low = asyncio.Event()
+        self._low.set()
+        self._task = asyncio.ensure_future(self._refill())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def take(self):
+        """A fresh (b, B) pair, from the pool if one is ready
+
+        Raises:
+            CryptoOverloaded: If the pool is empty and the executor is full
+        """
+        if self._low is not None:
+            self._low.set()
+        if self._pairs:
+            self.hits += 1
+            return self._pairs.popleft()
+        self.misses += 1
+        (pair,) = await self.produce(1)
+        return pair
+
+    async def _refill(self):
+        while True:
+            await self._low.wait()
+            self._low.clear()
+            while len(self._pairs) < self.size:
+                count = min(self.batch, self.size - len(self._pairs))
+                try:
+                    self._pairs.extend(await self.produce(count))
+                except CryptoOverloaded:
+                    # Requests come first; try again once the queue drains
+                    await asyncio.sleep(0.1)
+                except Exception:
+                    logger.exception("dh_pool_refill_failed")
+                    await asyncio.sleep(1)
+
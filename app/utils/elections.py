@@ -0,0 +1,235 @@
+"""Several elections in one process, each in its own shard.
+
+Every election hosted next to the default one has a directory
+ELECTIONS_DIR/<id>/ with an election.json:
+
+    {"course_name": "Informatik 1", "candidates": ["A", "B"],
+     "voting_students": ["anna", "ben"]}
+
+("roster_file": "students.csv" instead of voting_students reads a roster file
+relative to that directory, see app.utils.roster). The key pair, journal and
+roster cache of the election are created next to it on first use.
+
+An Election holds everything one election needs at runtime: keys, verifier,
+voter registry, tally and results cache. Nothing is shared between elections,
+so requests for different elections never wait for each other's locks.
+
+ElectionShards loads an election on its first request and keeps at most
+max_active of them in memory. Once no request uses it any more, the least
+recently used election beyond that limit, and any election idle for
+idle_seconds, is closed. Its state is in its journal or database and is
+replayed on its next request, so memory grows with the active elections, not
+with the hosted ones.
+"""
+import asyncio
+import collections
+import json
+import os
+import re
+import time
+
+from app.utils.broadcast import Broadcaster
+from app.utils.bulletin import BulletinBoard
+from app.utils.wire import IntCodec
+
+ELECTION_ID = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}\Z")
+DEFINITION_FILE = "election.json"
+
+
+class ElectionNotFound(LookupError):
+    """No election with this id is hosted"""
+
+
+def election_path(directory, election_id):
+    """Directory of a hosted election
+
+    Raises:
+        ElectionNotFound: If the id is malformed or has no election.json
+    """
+    if not directory or not ELECTION_ID.match(election_id):
+        raise ElectionNotFound(election_id)
+    path = os.path.join(directory, election_id)
+    if not os.path.isfile(os.path.join(path, DEFINITION_FILE)):
+        raise ElectionNotFound(election_id)
+    return path
+
+
+def load_definition(path):
+    """Read and check the election.json of an election directory
+
+    Returns:
+        dict: course_name, candidates, voting_students (tuple, may be empty),
+            roster_file (absolute path or None) and roster_column
+
+    Raises:
+        ValueError: If the file is not valid
+    """
+    definition_file = os.path.join(path, DEFINITION_FILE)
+    with open(definition_file, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{definition_file}: {e}") from None
+    if not isinstance(data, dict):
+        raise ValueError(f"{definition_file}: expected an object")
+
+    def strings(name):
+        value = data.get(name, [])
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"{definition_file}: {name} must be a list of strings")
+        return tuple(v.strip() for v in value if v.strip())
+
+    course_name = data.get("course_name")
+    if not isinstance(course_name, str) or not course_name:
+        raise ValueError(f"{definition_file}: course_name is required")
+    candidates = strings("candidates")
+    if not candidates:
+        raise ValueError(f"{definition_file}: candidates cannot be empty")
+    voting_students = strings("voting_students")
+    roster_file = data.get("roster_file")
+    if bool(voting_students) == bool(roster_file):
+        raise ValueError(
+            f"{definition_file}: set either voting_students or roster_file"
+        )
+    return {
+        "course_name": course_name,
+        "candidates": candidates,
+        "voting_students": voting_students,
+        "roster_file": os.path.join(path, roster_file) if roster_file else None,
+        "roster_column": data.get("roster_column", "student_id"),
+    }
+
+
+class Election:
+    """Runtime state of one election
+
+    Attributes:
+        id: Election id, None for the default election configured by the
+            environment
+        keys: {"public_key": ..., "private_key": ...}
+        codec: IntCodec for the big integers in its requests and responses
+        verifier: SignatureVerifier for its ballots
+        state: Its StateBackend
+        results_cache: Last rendered /results body and its ETag, with the
+            counters it was rendered for
+        broadcaster: Live updates for its /results/stream subscribers
+        bulletin: BulletinBoard of its accepted ballots
+    """
+
+    def __init__(
+        self, election_id, course_name, candidates, roster, keys, verifier, state
+    ):
+        self.id = election_id
+        self.course_name = course_name
+        self.candidates = candidates
+        self.roster = roster
+        self.keys = keys
+        self.codec = IntCodec(keys["public_key"]["p"])
+        self.verifier = verifier
+        self.state = state
+        self.results_cache = {"counters": None, "etag": None, "body": None}
+        self.broadcaster = Broadcaster()
+        self.bulletin = BulletinBoard()
+        # Requests currently using the election; it is only closed at 0
+        self.users = 0
+        self.last_used = time.monotonic()
+
+    async def close(self):
+        await self.state.close()
+        self.roster.close()
+
+
+class ElectionShards:
+    """Loads hosted elections on demand and evicts inactive ones
+
+    Use acquire and release around every request for an election.
+    """
+
+    def __init__(self, open_election, max_active=64, idle_seconds=600):
+        """
+        Args:
+            open_election: Coroutine function election_id -> Election; raises
+                ElectionNotFound for unknown ids
+            max_active: Elections kept in memory while not in use
+            idle_seconds: Close an election unused for this long
+        """
+        self.open_election = open_election
+        self.max_active = max_active
+        self.idle_seconds = idle_seconds
+        # Election id -> Election, least recently used first
+        self._active = collections.OrderedDict()
+        self._loading = {}
+        self._closing = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._active)
+
+    async def acquire(self, election_id):
+        """The loaded election, loading it first if needed
+
+        Raises:
+            ElectionNotFound: If there is no such election
+        """
+        election = self._active.get(election_id)
+        while election is None:
+            await self._load(election_id)
+            # Evicted again before this request got to use it: load again
+            election = self._active.get(election_id)
+        self._active.move_to_end(election_id)
+        election.users += 1
+        election.last_used = time.monotonic()
+        self._evict()
+        return election
+
+    def release(self, election):
+        election.users -= 1
+        election.last_used = time.monotonic()
+
+    async def _load(self, election_id):
+        # Concurrent first requests share one load
+        task = self._loading.get(election_id)
+        if task is None:
+            task = asyncio.ensure_future(self._open(election_id))
+            self._loading[election_id] = task
+        await asyncio.shield(task)
+
+    async def _open(self, election_id):
+        try:
+            closing = self._closing.get(election_id)
+            if closing is not None:
+                # Its journal must be closed before it is opened again
+                await asyncio.shield(closing)
+            election = await self.open_election(election_id)
+            self._active[election_id] = election
+            self.loads += 1
+        finally:
+            del self._loading[election_id]
+
+    def _evict(self):
+        now = time.monotonic()
+        for election_id, election in list(self._active.items()):
+            if election.users:
+                continue
+            if (
+                len(self._active) <= self.max_active
+                and now - election.last_used < self.idle_seconds
+            ):
+                break
+            del self._active[election_id]
+            self.evictions += 1
+            task = asyncio.ensure_future(election.close())
+            self._closing[election_id] = task
+            task.add_done_callback(
+                lambda _, election_id=election_id: self._closing.pop(election_id, None)
+            )
+
+    async def close(self):
+        """Close every loaded election, on shutdown"""
+        await asyncio.gather(*self._loading.values(), return_exceptions=True)
+        elections = list(self._active.values())
+        self._active.clear()
+        await asyncio.gather(
+            *(election.close() for election in elections), *self._closing.values()
+        )
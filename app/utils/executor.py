@@ -0,0 +1,171 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_MODES = ("process", "thread", "inline")
+
+# Below this modulus size a modexp takes microseconds and offloading it costs
+# more than it saves
+AUTO_PROCESS_MIN_BITS = 1024
+
+
+class CryptoOverloaded(Exception):
+    """Raised when too many crypto operations are already waiting"""
+
+
+def _timed(fn, args):
+    # time.monotonic is system-wide, so start/end are comparable across processes
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic()
+
+
+def resolve_mode(mode, modulus_bits):
+    """Resolve the "auto" executor mode for a key size
+
+    Args:
+        mode: "auto" or one of EXECUTOR_MODES
+        modulus_bits: Bit length of p
+
+    Returns:
+        str: One of EXECUTOR_MODES
+    """
+    if mode == "auto":
+        return "process" if modulus_bits >= AUTO_PROCESS_MIN_BITS else "inline"
+    return _check_mode(mode)
+
+
+def _check_mode(mode):
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(
+            f"Unknown crypto executor '{mode}', expected auto or one of "
+            f"{', '.join(EXECUTOR_MODES)}"
+        )
+    return mode
+
+
+class CryptoExecutor:
+    """Runs modular exponentiations off the event loop.
+
+    A 2048-bit pow() takes tens of milliseconds and holds the GIL, so running it
+    inside an async handler stalls every other request of the worker. In
+    "process" mode calls go to a process pool sized to the cores; "thread" uses
+    a thread pool (keeps the loop scheduling, but shares the GIL) and "inline"
+    runs them directly, which is the right choice for the toy key.
+
+    Calls beyond the number of workers wait in the pool's queue. Once
+    ``max_pending`` calls are submitted and not finished, ``run`` raises
+    CryptoOverloaded instead of queueing more, so a burst turns into fast
+    rejections rather than unbounded latency. ``stats`` reports queue depth,
+    waiting and run times for monitoring.
+
+    The counters are only touched from the event loop thread.
+    """
+
+    def __init__(self, mode="process", workers=None, max_pending=1024):
+        """
+        Args:
+            mode: "process", "thread" or "inline"
+            workers: Pool size (default: number of CPUs)
+            max_pending: Maximum number of submitted, unfinished calls
+        """
+        self.mode = _check_mode(mode)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._pool = None
+
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    @property
+    def pool(self):
+        """The underlying concurrent.futures executor, None in inline mode"""
+        if self._pool is None and self.mode != "inline":
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="crypto"
+                )
+        return self._pool
+
+    @property
+    def queued(self):
+        """Calls submitted but not yet picked up by a worker"""
+        if self.mode == "inline":
+            return 0
+        return max(0, self.pending - self.workers)
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the executor and return its result
+
+        Args:
+            fn: Picklable (module-level) function in process mode
+            args: Picklable arguments
+
+        Raises:
+            CryptoOverloaded: If max_pending calls are already in progress
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise CryptoOverloaded(f"{self.pending} crypto operations pending")
+
+        submitted = time.monotonic()
+        self.submitted += 1
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            if self.mode == "inline":
+                result, started, finished = _timed(fn, args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, started, finished = await loop.run_in_executor(
+                    self.pool, _timed, fn, args
+                )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        wait = max(0.0, started - submitted)
+        self.wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self.run_seconds += finished - started
+        return result
+
+    def stats(self):
+        """Counters and timings since startup
+
+        Returns:
+            dict: Executor configuration, queue depth and totals
+        """
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queued": self.queued,
+            "peak_pending": self.peak_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_seconds": self.wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+            "run_seconds": self.run_seconds,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,326 @@
+"""Group parameters (p, g) for the signing key.
+
+Standard groups from RFC 3526 ("modp") and RFC 7919 ("ffdhe") load instantly.
+Other sizes get a freshly generated safe prime p = 2q + 1, which is cached on
+disk so it is only generated once:
+
+    python -m app.utils.groups --bits 1536
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# The toy group used when no key size is configured
+DEMO_GROUP = {"name": "demo", "p": 9973, "g": 5}
+
+# Families of standard groups, all with generator 2
+FAMILIES = {"ffdhe": "RFC 7919", "modp": "RFC 3526"}
+
+
+def _hex(digits):
+    return int(digits, 16)
+
+
+STANDARD_PRIMES = {
+    "modp2048": _hex(
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF"
+    ),
+    "modp3072": _hex(
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AAAC42DAD33170D04507A33"
+        "A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7"
+        "ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864"
+        "D87602733EC86A64521F2B18177B200CBBE117577A615D6C770988C0BAD946E2"
+        "08E24FA074E5AB3143DB5BFCE0FD108E4B82D120A93AD2CAFFFFFFFFFFFFFFFF"
+    ),
+    "modp4096": _hex(
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AAAC42DAD33170D04507A33"
+        "A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7"
+        "ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864"
+        "D87602733EC86A64521F2B18177B200CBBE117577A615D6C770988C0BAD946E2"
+        "08E24FA074E5AB3143DB5BFCE0FD108E4B82D120A92108011A723C12A787E6D7"
+        "88719A10BDBA5B2699C327186AF4E23C1A946834B6150BDA2583E9CA2AD44CE8"
+        "DBBBC2DB04DE8EF92E8EFC141FBECAA6287C59474E6BC05D99B2964FA090C3A2"
+        "233BA186515BE7ED1F612970CEE2D7AFB81BDD762170481CD0069127D5B05AA9"
+        "93B4EA988D8FDDC186FFB7DC90A6C08F4DF435C934063199FFFFFFFFFFFFFFFF"
+    ),
+    "ffdhe2048": _hex(
+        "FFFFFFFFFFFFFFFFADF85458A2BB4A9AAFDC5620273D3CF1D8B9C583CE2D3695"
+        "A9E13641146433FBCC939DCE249B3EF97D2FE363630C75D8F681B202AEC4617A"
+        "D3DF1ED5D5FD65612433F51F5F066ED0856365553DED1AF3B557135E7F57C935"
+        "984F0C70E0E68B77E2A689DAF3EFE8721DF158A136ADE73530ACCA4F483A797A"
+        "BC0AB182B324FB61D108A94BB2C8E3FBB96ADAB760D7F4681D4F42A3DE394DF4"
+        "AE56EDE76372BB190B07A7C8EE0A6D709E02FCE1CDF7E2ECC03404CD28342F61"
+        "9172FE9CE98583FF8E4F1232EEF28183C3FE3B1B4C6FAD733BB5FCBC2EC22005"
+        "C58EF1837D1683B2C6F34A26C1B2EFFA886B423861285C97FFFFFFFFFFFFFFFF"
+    ),
+    "ffdhe3072": _hex(
+        "FFFFFFFFFFFFFFFFADF85458A2BB4A9AAFDC5620273D3CF1D8B9C583CE2D3695"
+        "A9E13641146433FBCC939DCE249B3EF97D2FE363630C75D8F681B202AEC4617A"
+        "D3DF1ED5D5FD65612433F51F5F066ED0856365553DED1AF3B557135E7F57C935"
+        "984F0C70E0E68B77E2A689DAF3EFE8721DF158A136ADE73530ACCA4F483A797A"
+        "BC0AB182B324FB61D108A94BB2C8E3FBB96ADAB760D7F4681D4F42A3DE394DF4"
+        "AE56EDE76372BB190B07A7C8EE0A6D709E02FCE1CDF7E2ECC03404CD28342F61"
+        "9172FE9CE98583FF8E4F1232EEF28183C3FE3B1B4C6FAD733BB5FCBC2EC22005"
+        "C58EF1837D1683B2C6F34A26C1B2EFFA886B4238611FCFDCDE355B3B6519035B"
+        "BC34F4DEF99C023861B46FC9D6E6C9077AD91D2691F7F7EE598CB0FAC186D91C"
+        "AEFE130985139270B4130C93BC437944F4FD4452E2D74DD364F2E21E71F54BFF"
+        "5CAE82AB9C9DF69EE86D2BC522363A0DABC521979B0DEADA1DBF9A42D5C4484E"
+        "0ABCD06BFA53DDEF3C1B20EE3FD59D7C25E41D2B66C62E37FFFFFFFFFFFFFFFF"
+    ),
+    "ffdhe4096": _hex(
+        "FFFFFFFFFFFFFFFFADF85458A2BB4A9AAFDC5620273D3CF1D8B9C583CE2D3695"
+        "A9E13641146433FBCC939DCE249B3EF97D2FE363630C75D8F681B202AEC4617A"
+        "D3DF1ED5D5FD65612433F51F5F066ED0856365553DED1AF3B557135E7F57C935"
+        "984F0C70E0E68B77E2A689DAF3EFE8721DF158A136ADE73530ACCA4F483A797A"
+        "BC0AB182B324FB61D108A94BB2C8E3FBB96ADAB760D7F4681D4F42A3DE394DF4"
+        "AE56EDE76372BB190B07A7C8EE0A6D709E02FCE1CDF7E2ECC03404CD28342F61"
+        "9172FE9CE98583FF8E4F1232EEF28183C3FE3B1B4C6FAD733BB5FCBC2EC22005"
+        "C58EF1837D1683B2C6F34A26C1B2EFFA886B4238611FCFDCDE355B3B6519035B"
+        "BC34F4DEF99C023861B46FC9D6E6C9077AD91D2691F7F7EE598CB0FAC186D91C"
+        "AEFE130985139270B4130C93BC437944F4FD4452E2D74DD364F2E21E71F54BFF"
+        "5CAE82AB9C9DF69EE86D2BC522363A0DABC521979B0DEADA1DBF9A42D5C4484E"
+        "0ABCD06BFA53DDEF3C1B20EE3FD59D7C25E41D2B669E1EF16E6F52C3164DF4FB"
+        "7930E9E4E58857B6AC7D5F42D69F6D187763CF1D5503400487F55BA57E31CC7A"
+        "7135C886EFB4318AED6A1E012D9E6832A907600A918130C46DC778F971AD0038"
+        "092999A333CB8B7A1A1DB93D7140003C2A4ECEA9F98D0ACC0A8291CDCEC97DCF"
+        "8EC9B55A7F88A46B4DB5A851F44182E1C68A007E5E655F6AFFFFFFFFFFFFFFFF"
+    ),
+}
+
+# Candidates per search task, and bound of the small primes they are sieved with
+SIEVE_WINDOW = 1 << 14
+SIEVE_LIMIT = 1 << 16
+MIN_GENERATED_BITS = 64
+
+_small_primes = None
+
+
+def small_primes():
+    """Odd primes below SIEVE_LIMIT"""
+    global _small_primes
+    if _small_primes is None:
+        sieve = bytearray(b"\x01") * SIEVE_LIMIT
+        sieve[:2] = b"\x00\x00"
+        for i in range(2, int(SIEVE_LIMIT**0.5) + 1):
+            if sieve[i]:
+                sieve[i * i :: i] = bytes(len(range(i * i, SIEVE_LIMIT, i)))
+        _small_primes = [i for i in range(3, SIEVE_LIMIT) if sieve[i]]
+    return _small_primes
+
+
+def is_probable_prime(n, rounds=32):
+    """Miller-Rabin test with random bases
+
+    Args:
+        n: Odd number to test
+        rounds: Number of bases, the error probability is below 4^-rounds
+
+    Returns:
+        bool: False if n is composite, True if it is prime with high probability
+    """
+    if n < 4:
+        return n in (2, 3)
+    if n % 2 == 0:
+        return False
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for _ in range(rounds):
+        x = pow(random.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def search_window(bits, seed, window=SIEVE_WINDOW):
+    """Look for a safe prime among window consecutive candidates
+
+    Candidates q = q0, q0 + 2, ... are sieved first: every q where q or
+    p = 2q + 1 has a factor below SIEVE_LIMIT is crossed out without a single
+    modular exponentiation. Survivors get a Fermat test of p to base 2, which
+    weeds out almost all of them, and only then Miller-Rabin on q. If q is prime
+    the Fermat test already proves p prime (Pocklington, since 3 does not
+    divide p).
+
+    Args:
+        bits: Bit length of p
+        seed: Seed for the random start q0
+        window: Number of candidates
+
+    Returns:
+        int: A safe prime p, or None if the window has none
+    """
+    rng = random.Random(seed)
+    q0 = rng.getrandbits(bits - 1) | (1 << (bits - 2)) | 1
+
+    sieve = bytearray(b"\x01") * window
+    for s in small_primes():
+        half = (s + 1) // 2  # inverse of 2 mod s
+        # q = q0 + 2k divisible by s
+        start = -q0 * half % s
+        sieve[start::s] = bytes(len(range(start, window, s)))
+        # p = 2q + 1 divisible by s, i.e. q = (s - 1) / 2 mod s
+        start = ((s - 1) // 2 - q0) * half % s
+        sieve[start::s] = bytes(len(range(start, window, s)))
+
+    k = sieve.find(1)
+    while k != -1:
+        q = q0 + 2 * k
+        p = 2 * q + 1
+        if p.bit_length() != bits:
+            return None
+        if pow(2, p - 1, p) == 1 and is_probable_prime(q):
+            return p
+        k = sieve.find(1, k + 1)
+    return None
+
+
+def generate_safe_prime(bits, workers=None, window=SIEVE_WINDOW):
+    """Generate a random safe prime p = 2q + 1 with q prime
+
+    Windows of candidates are searched in parallel in a process pool until one
+    of them contains a safe prime.
+
+    Args:
+        bits: Bit length of p (at least MIN_GENERATED_BITS)
+        workers: Number of processes (default: number of CPUs, 0 or 1 searches
+            in this process)
+        window: Candidates per task
+
+    Returns:
+        int: The safe prime
+    """
+    if bits < MIN_GENERATED_BITS:
+        raise ValueError(f"Generated groups need at least {MIN_GENERATED_BITS} bits")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    seeds = random.SystemRandom()
+
+    if workers <= 1:
+        while True:
+            p = search_window(bits, seeds.getrandbits(64), window)
+            if p is not None:
+                return p
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Two tasks per worker so no worker idles between windows
+        futures = {
+            pool.submit(search_window, bits, seeds.getrandbits(64), window)
+            for _ in range(2 * workers)
+        }
+        while True:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                p = future.result()
+                if p is not None:
+                    return p
+                futures.add(
+                    pool.submit(search_window, bits, seeds.getrandbits(64), window)
+                )
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def standard_group(family, bits):
+    """Return the standard group of a family and size, or None if there is none"""
+    name = f"{family}{bits}"
+    if name not in STANDARD_PRIMES:
+        return None
+    return {"name": name, "p": STANDARD_PRIMES[name], "g": 2}
+
+
+def load_group(bits, family="ffdhe", cache_dir="data/params", workers=None):
+    """Return group parameters of the requested size
+
+    Uses the standard group of family if there is one for bits. Otherwise, or
+    with family "generate", a safe prime is read from cache_dir or generated
+    and stored there.
+
+    Args:
+        bits: Bit length of p
+        family: "ffdhe", "modp" or "generate"
+        cache_dir: Directory for generated parameters
+        workers: Processes for generation, see generate_safe_prime
+
+    Returns:
+        dict: name, p and g
+    """
+    if family != "generate":
+        if family not in FAMILIES:
+            raise ValueError(
+                f"Unknown group family '{family}', expected generate or one of "
+                f"{', '.join(FAMILIES)}"
+            )
+        group = standard_group(family, bits)
+        if group is not None:
+            return group
+
+    path = os.path.join(cache_dir, f"safe-prime-{bits}.json")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            cached = json.load(f)
+        p = int(cached["p"])
+        if p.bit_length() != bits:
+            raise ValueError(f"{path} does not hold a {bits}-bit prime")
+        return {"name": cached["name"], "p": p, "g": cached["g"]}
+
+    start = time.perf_counter()
+    p = generate_safe_prime(bits, workers)
+    seconds = time.perf_counter() - start
+
+    # In a safe-prime group 2 has order q or 2q, either works as generator here
+    group = {"name": f"generated{bits}", "p": p, "g": 2}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**group, "p": str(p), "seconds": round(seconds, 3)}, f)
+    os.replace(tmp_path, path)
+    return group
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bits", type=int, required=True)
+    parser.add_argument("--cache-dir", default="data/params")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    group = load_group(args.bits, "generate", args.cache_dir, args.workers)
+    print(f"{group['name']}: {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
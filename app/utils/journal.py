@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_SUFFIX = ".log"
+
+# Queue entries handled by the writer thread
+_RECORD = "record"
+_ROTATE = "rotate"
+
+
+class Journal:
+    """Append-only write-ahead log of signature issuance and accepted ballots.
+
+    Records are JSON lines written by a background thread. With group commit all
+    records queued while the previous fsync was running are written and synced
+    together, so one fsync acknowledges a whole burst of requests. Without it,
+    every record is synced on its own.
+
+    The log is split into numbered segments. ``rotate`` seals the current segment
+    so a snapshot of the state up to that point can replace it (see
+    ``write_snapshot``), which keeps replay at startup short.
+    """
+
+    def __init__(self, directory, group_commit=True, max_batch=1024):
+        """
+        Args:
+            directory: Directory holding the segments and the snapshot
+            group_commit: Share one fsync between all queued records
+            max_batch: Maximum number of records per fsync
+        """
+        self.directory = directory
+        self.group_commit = group_commit
+        self.max_batch = max_batch if group_commit else 1
+        os.makedirs(directory, exist_ok=True)
+
+        segments = list_segments(directory)
+        self._segment = (segments[-1] + 1) if segments else 1
+        self._file = open(self._segment_path(self._segment), "ab")
+        # Records appended since the last snapshot
+        self.records_since_snapshot = 0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="journal-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{segment:08d}{SEGMENT_SUFFIX}")
+
+    def append(self, record):
+        """Queue a record for writing.
+
+        Args:
+            record: JSON-serializable dict
+
+        Returns:
+            Future: Resolved once the record is on disk
+        """
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        return self._enqueue(_RECORD, line)
+
+    def rotate(self):
+        """Seal the current segment after all records queued so far.
+
+        Returns:
+            Future: Resolves to the number of the sealed segment
+        """
+        return self._enqueue(_ROTATE, None)
+
+    def _enqueue(self, kind, payload):
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Journal is closed")
+            self._queue.append((kind, payload, future))
+            if kind == _RECORD:
+                self.records_since_snapshot += 1
+            else:
+                self.records_since_snapshot = 0
+            self._cond.notify()
+        return future
+
+    def write_snapshot(self, state, segment):
+        """Persist state covering all segments up to segment, then drop them.
+
+        Args:
+            state: JSON-serializable election state
+            segment: Last segment whose records are contained in state
+        """
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"segment": segment, "state": state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        for old in list_segments(self.directory):
+            if old <= segment:
+                os.remove(self._segment_path(old))
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = []
+                while self._queue and len(batch) < self.max_batch:
+                    batch.append(self._queue.popleft())
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        lines, waiting = [], []
+        for kind, payload, future in batch:
+            if kind == _RECORD:
+                lines.append(payload)
+                waiting.append(future)
+                continue
+
+            # Rotation: sync what came before, then switch segments
+            self._sync(lines, waiting)
+            lines, waiting = [], []
+            try:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                sealed = self._segment
+                self._segment += 1
+                self._file = open(self._segment_path(self._segment), "ab")
+                future.set_result(sealed)
+            except OSError as e:
+                future.set_exception(e)
+
+        self._sync(lines, waiting)
+
+    def _sync(self, lines, waiting):
+        if not lines:
+            return
+        offset = None
+        try:
+            if self._file is None:
+                self._file = open(self._segment_path(self._segment), "ab")
+            offset = self._file.tell()
+            self._file.write(b"".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            if offset is not None:
+                self._discard_from(offset)
+            for future in waiting:
+                future.set_exception(e)
+            return
+        for future in waiting:
+            future.set_result(True)
+
+    def _discard_from(self, offset):
+        """Drop a failed write and continue in a new segment
+
+        The failed records may be partly or even completely on disk. They are
+        cut off again where possible; if that fails too, the next records
+        still go to a new segment, so a torn line can only be the last one of
+        a segment, where load ignores it.
+        """
+        path = self._segment_path(self._segment)
+        file, self._file = self._file, None
+        try:
+            # Closing flushes the buffer once more and may fail the same way
+            file.close()
+        except OSError:
+            pass
+        try:
+            os.truncate(path, offset)
+        except OSError:
+            pass
+        self._segment += 1
+
+
+def list_segments(directory):
+    """Return the numbers of all journal segments in directory, ascending"""
+    segments = []
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        if ext == SEGMENT_SUFFIX and stem.isdigit():
+            segments.append(int(stem))
+    return sorted(segments)
+
+
+def load(directory):
+    """Read the snapshot and the records written after it.
+
+    A partially written last line of a segment (crash during a write) is ignored.
+
+    Args:
+        directory: Journal directory
+
+    Returns:
+        tuple: (snapshot state or None, list of records in append order)
+    """
+    if not os.path.isdir(directory):
+        return None, []
+
+    state, covered = None, 0
+    snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "r") as f:
+            snapshot = json.load(f)
+        state, covered = snapshot["state"], snapshot["segment"]
+
+    records = []
+    segments = [s for s in list_segments(directory) if s > covered]
+    for segment in segments:
+        with open(os.path.join(directory, f"{segment:08d}{SEGMENT_SUFFIX}"), "rb") as f:
+            lines = f.read().split(b"\n")
+        for i, line in enumerate(lines):
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Complete records always end with a newline
+                if i != len(lines) - 1:
+                    raise
+    return state, records
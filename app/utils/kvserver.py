@@ -0,0 +1,284 @@
+"""Local Redis-compatible stand-in for the shared state backend.
+
+Implements the handful of commands used by RedisBackend (sets, lists, hashes,
+counters, WATCH and MULTI/EXEC) on top of asyncio, so several workers can share
+state on a machine without a Redis installation. Data lives in memory only.
+
+    python -m app.utils.kvserver --port 6379
+"""
+import argparse
+import asyncio
+
+from app.utils.resp import RespError, encode_reply
+
+
+class KeyValueStore:
+    """Command implementations. Every command runs to completion on the event
+    loop before the next one starts, which makes each of them atomic."""
+
+    # Commands that change their keys, for WATCH
+    WRITES = {
+        "SET", "INCR", "INCRBY", "SADD", "SREM", "RPUSH", "LREM", "HSET",
+        "HINCRBY", "DEL", "FLUSHDB",
+    }
+
+    def __init__(self):
+        self.data = {}
+        # Key -> number of the last write to it; FLUSHDB counts for every key
+        self.versions = {}
+        self.writes = 0
+        self.flushed = 0
+
+    def version(self, key):
+        return max(self.versions.get(key, 0), self.flushed)
+
+    def _typed(self, key, kind):
+        value = self.data.get(key)
+        if value is None:
+            value = kind()
+            self.data[key] = value
+        elif not isinstance(value, kind):
+            raise RespError(
+                "WRONGTYPE Operation against a key holding the wrong kind of value"
+            )
+        return value
+
+    def execute(self, name, args):
+        handler = getattr(self, "cmd_" + name.lower(), None)
+        if handler is None:
+            return RespError(f"ERR unknown command '{name}'")
+        if name in self.WRITES:
+            self.writes += 1
+            if name == "FLUSHDB":
+                self.flushed = self.writes
+            for key in args[:1] if name != "DEL" else args:
+                self.versions[key] = self.writes
+        try:
+            return handler(*args)
+        except TypeError:
+            return RespError(f"ERR wrong number of arguments for '{name}' command")
+        except RespError as e:
+            return e
+
+    def cmd_ping(self, message=b"PONG"):
+        return message
+
+    def cmd_select(self, db):
+        return True
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        return True
+
+    def cmd_exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def cmd_del(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def cmd_get(self, key):
+        value = self.data.get(key)
+        return None if value is None else self._typed(key, bytes)
+
+    def cmd_set(self, key, value, *options):
+        options = {option.upper() for option in options}
+        if options - {b"NX"}:
+            raise RespError("ERR syntax error")
+        if b"NX" in options and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_incrby(self, key, amount):
+        value = int(self.data.get(key, b"0")) + int(amount)
+        self.data[key] = str(value).encode()
+        return value
+
+    def cmd_sadd(self, key, *members):
+        members_set = self._typed(key, set)
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+
+    def cmd_srem(self, key, *members):
+        members_set = self._typed(key, set)
+        before = len(members_set)
+        members_set.difference_update(members)
+        return before - len(members_set)
+
+    def cmd_sismember(self, key, member):
+        return int(member in self._typed(key, set))
+
+    def cmd_smismember(self, key, *members):
+        members_set = self._typed(key, set)
+        return [int(member in members_set) for member in members]
+
+    def cmd_smembers(self, key):
+        return list(self._typed(key, set))
+
+    def cmd_scard(self, key):
+        return len(self._typed(key, set))
+
+    def cmd_rpush(self, key, *values):
+        items = self._typed(key, list)
+        items.extend(values)
+        return len(items)
+
+    def cmd_llen(self, key):
+        return len(self._typed(key, list))
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._typed(key, list)
+        start, stop = int(start), int(stop)
+        if stop < 0:
+            stop += len(items)
+        if start < 0:
+            start = max(0, start + len(items))
+        return items[start : stop + 1]
+
+    def cmd_lpos(self, key, value, *options):
+        """Index of the first match, RANK -1 for the last (only option supported)"""
+        rank = 1
+        if options:
+            if len(options) != 2 or options[0].upper() != b"RANK":
+                raise RespError("ERR syntax error")
+            rank = int(options[1])
+        items = self._typed(key, list)
+        indices = range(len(items)) if rank > 0 else range(len(items) - 1, -1, -1)
+        matches = (i for i in indices if items[i] == value)
+        for _ in range(abs(rank) - 1):
+            next(matches, None)
+        return next(matches, None)
+
+    def cmd_lrem(self, key, count, value):
+        items = self._typed(key, list)
+        count = int(count)
+        removed = 0
+        indices = range(len(items) - 1, -1, -1) if count < 0 else range(len(items))
+        for i in list(indices):
+            if items[i] == value and (count == 0 or removed < abs(count)):
+                items[i] = None
+                removed += 1
+        items[:] = [item for item in items if item is not None]
+        return removed
+
+    def cmd_hset(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise RespError("ERR wrong number of arguments for 'hset' command")
+        fields = self._typed(key, dict)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hget(self, key, field):
+        return self._typed(key, dict).get(field)
+
+    def cmd_hincrby(self, key, field, amount):
+        fields = self._typed(key, dict)
+        value = int(fields.get(field, b"0")) + int(amount)
+        fields[field] = str(value).encode()
+        return value
+
+    def cmd_hgetall(self, key):
+        result = []
+        for field, value in self._typed(key, dict).items():
+            result += [field, value]
+        return result
+
+
+# Reply of an EXEC whose watched keys changed
+ABORTED = object()
+
+
+async def handle_client(store, reader, writer):
+    queued = None
+    # Watched key -> its version at WATCH
+    watched = {}
+    try:
+        while True:
+            command = await read_command(reader)
+            if command is None:
+                break
+            name, args = command[0].decode().upper(), command[1:]
+
+            if name == "WATCH" and queued is None:
+                for key in args:
+                    watched.setdefault(key, store.version(key))
+                reply = "OK"
+            elif name == "UNWATCH" and queued is None:
+                watched = {}
+                reply = "OK"
+            elif name == "MULTI":
+                queued = []
+                reply = "OK"
+            elif name == "EXEC":
+                if queued is None:
+                    reply = RespError("ERR EXEC without MULTI")
+                elif any(store.version(k) != v for k, v in watched.items()):
+                    # A watched key changed: run nothing, reply with a null array
+                    reply = ABORTED
+                else:
+                    reply = [store.execute(n, a) for n, a in queued]
+                queued, watched = None, {}
+            elif name == "DISCARD":
+                queued, watched = None, {}
+                reply = "OK"
+            elif queued is not None:
+                queued.append((name, args))
+                reply = "QUEUED"
+            else:
+                reply = store.execute(name, args)
+
+            if reply is ABORTED:
+                writer.write(b"*-1\r\n")
+            elif reply in ("OK", "QUEUED"):
+                writer.write(b"+%s\r\n" % reply.encode())
+            else:
+                writer.write(encode_reply(reply))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def read_command(reader):
+    """Read one RESP array command, or None on EOF"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, e.g. from telnet
+        return line.split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host, port):
+    store = KeyValueStore()
+    server = await asyncio.start_server(
+        lambda r, w: handle_client(store, r, w), host, port
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    print(f"Serving on {args.host}:{args.port}")
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
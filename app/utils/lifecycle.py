@@ -0,0 +1,128 @@
+"""Startup phases as seen by /healthz and /readyz.
+
+The app starts in two phases. The lifespan hook only loads the configuration,
+which is fast and stops the server if it is invalid. Everything slow - loading
+or generating keys, replaying the journal, connecting to the state backend,
+starting the crypto workers, rendering pages - runs afterwards as warm-up
+steps in the background. Meanwhile the server already answers /healthz, so a
+slow start is not mistaken for a hung process, and ReadinessGate turns every
+other request away with a 503 until /readyz reports ready. Orchestrators and
+load balancers that probe /readyz only route traffic to warm workers.
+"""
+import asyncio
+import logging
+import time
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+STOPPING = "stopping"
+
+
+class Readiness:
+    """Runs the warm-up steps and tracks the lifecycle status
+
+    The status goes from "starting" to "ready", or to "failed" if a step
+    raises, and to "stopping" on shutdown.
+    """
+
+    def __init__(self):
+        self.status = STARTING
+        self.error = None
+        # Step name -> seconds it took, in order
+        self.steps = {}
+        self.started = time.monotonic()
+        self.ready_seconds = None
+        self._task = None
+
+    @property
+    def ready(self):
+        return self.status == READY
+
+    @property
+    def warm(self):
+        """True once all warm-up steps have run, also while stopping"""
+        return self.ready_seconds is not None
+
+    def start(self, steps):
+        """Run the warm-up steps in a background task
+
+        Args:
+            steps: List of (name, coroutine function) pairs, run in order
+        """
+        self.status, self.error, self.steps = STARTING, None, {}
+        self.ready_seconds = None
+        self.started = time.monotonic()
+        self._task = asyncio.ensure_future(self._run(steps))
+
+    async def _run(self, steps):
+        for name, step in steps:
+            start = time.perf_counter()
+            try:
+                await step()
+            except Exception as e:
+                self.status, self.error = FAILED, f"{name}: {e}"
+                logger.exception("warm_up_failed", extra={"fields": {"step": name}})
+                return
+            self.steps[name] = time.perf_counter() - start
+        self.ready_seconds = time.monotonic() - self.started
+        self.status = READY
+        fields = {f"{name}_seconds": round(t, 3) for name, t in self.steps.items()}
+        fields["seconds"] = round(self.ready_seconds, 3)
+        logger.info("ready", extra={"fields": fields})
+
+    async def wait(self):
+        """Wait for the warm-up to finish, successfully or not"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        """Mark the app as stopping and cancel an unfinished warm-up"""
+        self.status = STOPPING
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self):
+        """Body of /readyz"""
+        return {
+            "status": self.status,
+            "error": self.error,
+            "ready_seconds": self.ready_seconds,
+            "steps": {name: round(t, 4) for name, t in self.steps.items()},
+        }
+
+
+class ReadinessGate:
+    """ASGI middleware answering 503 until the app is ready
+
+    Paths in ``allow`` (the probes) are always passed through. Once warm,
+    requests stay admitted while stopping, so in-flight work can drain.
+    """
+
+    def __init__(self, app, readiness, allow=("/healthz", "/readyz")):
+        self.app = app
+        self.readiness = readiness
+        self.allow = frozenset(allow)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or self.readiness.warm
+            or scope["path"] in self.allow
+        ):
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            status_code=503,
+            content={"error": f"Server is {self.readiness.status}, please retry"},
+            headers={"Retry-After": "1"},
+        )
+        await response(scope, receive, send)
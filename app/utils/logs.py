@@ -0,0 +1,180 @@
+"""Structured, non-blocking logging for the crypto and route layers.
+
+Modules log through ``logging.getLogger(__name__)``, i.e. loggers below ``app``
+such as ``app.utils.crypto`` and ``app.main``, with an event name as message and
+its data as fields:
+
+    logger.debug("verify", extra={"fields": {"hash": h, "cached": True}})
+
+configure_logging() routes these loggers into a bounded in-memory queue. The
+calling thread only creates the record and enqueues it; formatting and the
+actual write to stderr happen on a background thread. When the queue is full,
+records are dropped and counted instead of stalling request handling.
+
+Per-ballot debug output (the demo explanation of each signature and
+verification) can be sampled, so that it stays readable under load. Hot paths
+check ``logger.isEnabledFor(logging.DEBUG)`` before building fields, so with the
+default level INFO they pay one cached level check.
+"""
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOG_FORMATS = ("text", "json")
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as "time level logger event key=value ..." or JSON lines"""
+
+    def __init__(self, json_format=False):
+        super().__init__()
+        self.json_format = json_format
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        if self.json_format:
+            entry = {
+                "time": round(record.created, 6),
+                "level": record.levelname,
+                "logger": record.name,
+                "event": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = (
+            f"{self.formatTime(record)} {record.levelname} {record.name} "
+            f"{record.getMessage()}"
+        )
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class DebugSampler(logging.Filter):
+    """Passes every record of level INFO and above, but only 1 in every DEBUG"""
+
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        return next(self._counter) % self.every == 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue.
+
+    Unlike the standard QueueHandler it does not format records in the calling
+    thread; the listener's handler formats them on the background thread.
+    Records therefore must not be shared with other processes.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LoggingRuntime:
+    """Handle of the configured logging pipeline, see configure_logging"""
+
+    def __init__(self, logger, handler, listener):
+        self.logger = logger
+        self.handler = handler
+        self.listener = listener
+
+    @property
+    def dropped(self):
+        """Records discarded because the queue was full"""
+        return self.handler.dropped
+
+    @property
+    def queued(self):
+        """Records waiting for the background writer"""
+        return self.handler.queue.qsize()
+
+    def stop(self):
+        """Write the remaining records and stop the background thread"""
+        self.logger.removeHandler(self.handler)
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+def configure_logging(
+    level="INFO",
+    log_format="text",
+    debug_sample=1,
+    queue_size=10000,
+    stream=None,
+    logger_name="app",
+):
+    """Route the app's loggers through a queue to a background writer
+
+    Args:
+        level: Minimum level name or number, e.g. "DEBUG" for the demo
+            explanation of every signature
+        log_format: "text" or "json" (one JSON object per line)
+        debug_sample: Keep only every n-th DEBUG record
+        queue_size: Maximum number of records waiting to be written
+        stream: Output stream (default: stderr)
+        logger_name: Parent logger to configure
+
+    Returns:
+        LoggingRuntime: Call stop() on shutdown to flush the queue
+
+    Raises:
+        ValueError: If level or log_format is unknown
+    """
+    if isinstance(level, str):
+        numeric = logging.getLevelName(level.upper())
+        if not isinstance(numeric, int):
+            raise ValueError(f"Unknown log level '{level}'")
+        level = numeric
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{log_format}', use one of {LOG_FORMATS}")
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(StructuredFormatter(log_format == "json"))
+
+    handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(DebugSampler(debug_sample))
+    listener = _DrainingQueueListener(handler.queue, output)
+
+    logger = logging.getLogger(logger_name)
+    for existing in list(logger.handlers):
+        if isinstance(existing, NonBlockingQueueHandler):
+            logger.removeHandler(existing)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    # Keep our records out of the root logger and whatever uvicorn set up there
+    logger.propagate = False
+
+    listener.start()
+    return LoggingRuntime(logger, handler, listener)
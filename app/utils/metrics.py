@@ -0,0 +1,247 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A small dependency-free subset of prometheus_client: counters, gauges and
+histograms with labels, rendered by ``MetricsRegistry.render`` for a /metrics
+route. Updates are a dict lookup and an addition. They are not locked, so
+update metrics from the event loop thread only.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Starlette appends "; charset=utf-8" to text media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Upper bounds in seconds, from sub-millisecond handlers to 2048-bit crypto
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _sort_key(item):
+    return tuple(map(str, item[0]))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        try:
+            return tuple(map(labels.__getitem__, self.label_names))
+        except KeyError:
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines += self._samples()
+        return lines
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items(), key=_sort_key)
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. requests or rejections"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, typically set right before a scrape"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Per-bucket counts (last one is +Inf), sum, count
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items(), key=_sort_key):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.label_names, key, ("le", _format_value(float(bound)))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Return all metrics in the Prometheus text format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+# Seconds spent awaiting crypto during the current request (see add_crypto_time)
+_request_crypto = ContextVar("request_crypto", default=None)
+
+
+def add_crypto_time(seconds):
+    """Attribute crypto time to the request being handled, if any"""
+    spent = _request_crypto.get()
+    if spent is not None:
+        spent[0] += seconds
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template.
+
+    Observes the total latency per route and, separately, the part of it the
+    handler spent waiting for crypto (reported via add_crypto_time), so handler
+    time = total - crypto. Routes are labelled with their path template, not
+    the concrete URL, to keep the number of series bounded.
+    """
+
+    def __init__(self, app, duration, crypto_duration, exclude=()):
+        """
+        Args:
+            app: Wrapped ASGI app
+            duration: Histogram with labels method, route and status
+            crypto_duration: Histogram with label route
+            exclude: Route templates not to time, e.g. long-lived streams
+        """
+        self.app = app
+        self.duration = duration
+        self.crypto_duration = crypto_duration
+        self.exclude = set(exclude)
+        self._routes = None
+
+    def _route(self, scope):
+        if self._routes is None:
+            # Starlette stores the matched endpoint in the scope; map it back to
+            # the path template of its route
+            self._routes = {}
+            for route in scope["app"].routes:
+                endpoint = getattr(route, "endpoint", None) or getattr(
+                    route, "app", None
+                )
+                if endpoint is not None:
+                    self._routes[endpoint] = route.path
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        spent = [0.0]
+        token = _request_crypto.set(spent)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_crypto.reset(token)
+            route = self._route(scope)
+            if route not in self.exclude:
+                self.duration.observe(
+                    time.perf_counter() - start,
+                    method=scope["method"],
+                    route=route,
+                    status=status[0],
+                )
+                if spent[0]:
+                    self.crypto_duration.observe(spent[0], route=route)
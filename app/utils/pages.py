@@ -0,0 +1,120 @@
+"""HTML pages rendered once and served from memory.
+
+The index, vote and admin pages only depend on configuration that is fixed
+after startup, so they are rendered once into bytes together with gzip and,
+if the optional ``brotli`` package is installed, brotli compressed variants.
+Every variant has its own strong ETag, so a client revalidating with
+If-None-Match gets a 304 without anything being rendered or compressed.
+"""
+import gzip
+import hashlib
+
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used instead
+    brotli = None
+
+# Starlette appends "; charset=utf-8" to text media types
+HTML_MEDIA_TYPE = "text/html"
+
+# Preferred first
+ENCODINGS = ("br", "gzip")
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value
+
+    Args:
+        header: Header value, e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        dict: e.g. {"gzip": 1.0, "deflate": 1.0, "br": 0.9}
+    """
+    codings = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class PrerenderedPage:
+    """A rendered page or static file with precompressed variants and ETags"""
+
+    def __init__(self, html, media_type=HTML_MEDIA_TYPE):
+        """
+        Args:
+            html: Rendered page or file content as str or bytes
+            media_type: Content-Type of the page
+        """
+        body = html.encode() if isinstance(html, str) else html
+        self.media_type = media_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        # encoding -> (body, ETag); None is the uncompressed page
+        self.variants = {None: (body, f'"{digest}"')}
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                self.variants[encoding] = (data, f'"{digest}-{encoding}"')
+
+    def select(self, accept_encoding):
+        """Pick the variant for a request
+
+        Args:
+            accept_encoding: Accept-Encoding header of the request, or None
+
+        Returns:
+            tuple: (Content-Encoding or None, body bytes, ETag)
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accepted.get(encoding, wildcard) > 0:
+                return (encoding, *self.variants[encoding])
+        return (None, *self.variants[None])
+
+
+def page_response(request, page, cache_control="no-cache"):
+    """Serve a PrerenderedPage in the best accepted encoding, or a 304
+
+    Args:
+        request: Incoming request
+        page: PrerenderedPage to serve
+        cache_control: Cache-Control header; the default no-cache lets browsers
+            keep the page but revalidate it, which costs a 304
+    """
+    encoding, body, etag = page.select(request.headers.get("accept-encoding"))
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=page.media_type, headers=headers)
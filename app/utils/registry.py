@@ -0,0 +1,161 @@
+import threading
+
+from app.utils.roster import Roster
+
+# Result codes of VoterRegistry.try_mark
+ISSUED = "issued"
+NOT_AUTHORIZED = "not_authorized"
+ALREADY_VOTED = "already_voted"
+
+
+class VoterRegistry:
+    """Eligibility index over the voter roster.
+
+    Every student id gets a fixed slot in a bytearray that records whether a blind
+    signature has been issued for it: its position in the sorted Roster.
+    Eligibility and "already voted" are both a single binary search over the
+    roster, and the check-and-mark happens under one lock so two
+    concurrent requests for the same student can never both get a signature.
+
+    Issuances and revocations are also appended to a sequence-numbered log, so
+    readers can fetch only what changed since the last sequence number they saw
+    (see log_entries).
+    """
+
+    def __init__(self, roster):
+        """
+        Args:
+            roster: Roster, or iterable of student ids allowed to vote
+                (normalized; duplicates and empty entries are ignored)
+        """
+        if not isinstance(roster, Roster):
+            roster = Roster.from_ids(roster)
+        self._roster = roster
+
+        self._issued = bytearray(len(roster))
+        # Entry i has sequence number i + 1: (student_id, None) for an issued
+        # signature, (student_id, seq) for the revocation of the issuance at seq
+        self._log = []
+        # Student id -> sequence number of its current issuance, in issuance order
+        self._issued_at = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, student_id):
+        return student_id in self._roster
+
+    @property
+    def total(self):
+        """Number of eligible students"""
+        return len(self._roster)
+
+    @property
+    def voted_count(self):
+        """Number of students that have been issued a blind signature"""
+        return len(self._issued_at)
+
+    def has_voted(self, student_id):
+        slot = self._roster.index(student_id)
+        return slot is not None and self._issued[slot] == 1
+
+    def try_mark(self, student_id):
+        """Atomically check eligibility and mark the student as voted.
+
+        Args:
+            student_id: Student requesting a blind signature
+
+        Returns:
+            str: ISSUED, NOT_AUTHORIZED or ALREADY_VOTED
+        """
+        slot = self._roster.index(student_id)
+        if slot is None:
+            return NOT_AUTHORIZED
+
+        with self._lock:
+            if self._issued[slot]:
+                return ALREADY_VOTED
+            self._issued[slot] = 1
+            self._log.append((student_id, None))
+            self._issued_at[student_id] = len(self._log)
+
+        return ISSUED
+
+    def unmark(self, student_id):
+        """Undo try_mark, e.g. when signing failed after the student was marked
+
+        Returns:
+            bool: True if the student was marked
+        """
+        slot = self._roster.index(student_id)
+        if slot is None:
+            return False
+
+        with self._lock:
+            if not self._issued[slot]:
+                return False
+            self._issued[slot] = 0
+            self._log.append((student_id, self._issued_at.pop(student_id)))
+        return True
+
+    def voted_ids(self):
+        """Return a copy of the voted student ids in issuance order"""
+        with self._lock:
+            return list(self._issued_at)
+
+    def log_entries(self, since=0, limit=None):
+        """Log entries after a sequence number, see voted_changes
+
+        Args:
+            since: Last sequence number already seen
+            limit: Return at most limit + 1 entries (None: all)
+
+        Returns:
+            list: (seq, student_id, revokes, live) in sequence order. revokes is
+                the sequence number of the revoked issuance or None, live tells
+                whether an issuance has not been revoked since.
+        """
+        since = max(0, since)
+        with self._lock:
+            end = len(self._log) if limit is None else since + limit + 1
+            return [
+                (seq, student_id, revokes, self._issued_at.get(student_id) == seq)
+                for seq, (student_id, revokes) in enumerate(
+                    self._log[since:end], start=since + 1
+                )
+            ]
+
+
+def voted_changes(entries, since, limit, epoch):
+    """Summarize voted-log entries for a client that has seen up to since
+
+    Args:
+        entries: Log entries after since as returned by log_entries, at most
+            limit + 1 of them
+        since: Last sequence number the client has seen
+        limit: Page size in log entries, or None for everything
+        epoch: Identifier of the log; a client holding a sequence number from
+            another epoch has to start over from 0
+
+    Returns:
+        dict: voted_students (issued after since and still valid), revoked
+            (issued up to since and revoked after it), sequence (pass as since
+            next time), complete (False if more entries follow) and epoch
+    """
+    complete = limit is None or len(entries) <= limit
+    if not complete:
+        entries = entries[:limit]
+    return {
+        "epoch": epoch,
+        "sequence": entries[-1][0] if entries else max(0, since),
+        "complete": complete,
+        "voted_students": [
+            student_id
+            for _, student_id, revokes, live in entries
+            if revokes is None and live
+        ],
+        # Issuances after since that were revoked again were never sent
+        "revoked": [
+            student_id
+            for _, student_id, revokes, _ in entries
+            if revokes is not None and revokes <= since
+        ],
+    }
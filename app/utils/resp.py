@@ -0,0 +1,186 @@
+import asyncio
+import contextlib
+
+
+class RespError(Exception):
+    """Error reply from a Redis-compatible server"""
+
+
+def encode_command(*args):
+    """Encode a command as a RESP array of bulk strings"""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+def encode_reply(value):
+    """Encode a Python value as a RESP reply"""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        return b"+OK\r\n" if value else b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, (list, tuple)):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(v) for v in value)
+    if not isinstance(value, bytes):
+        value = str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+async def read_reply(reader):
+    """Read one RESP value from an asyncio StreamReader
+
+    Raises:
+        RespError: For error replies (nested errors are returned, not raised)
+    """
+    value = await _read_value(reader)
+    if isinstance(value, RespError):
+        raise value
+    return value
+
+
+async def _read_value(reader):
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await _read_value(reader) for _ in range(length)]
+    raise RespError(f"Protocol error: unexpected reply type {kind!r}")
+
+
+class RespClient:
+    """Minimal asyncio client for Redis-compatible servers.
+
+    One connection, commands are serialized with a lock. ``transaction`` sends a
+    MULTI/EXEC block in a single round trip.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self._reader = None
+        self._writer = None
+        self._loop = None
+        self._lock = None
+
+    @classmethod
+    def from_url(cls, url):
+        """Create a client from a redis://host:port/db URL"""
+        rest = url.split("://", 1)[-1]
+        address, _, db = rest.partition("/")
+        host, _, port = address.partition(":")
+        return cls(host or "127.0.0.1", int(port or 6379), int(db or 0))
+
+    def _connection_lock(self):
+        # Streams belong to the loop that opened them; start over on a new loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._writer = None
+        return self._lock
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.db:
+            self._writer.write(encode_command("SELECT", self.db))
+            await read_reply(self._reader)
+
+    async def execute(self, *args):
+        """Send one command and return its reply"""
+        async with self._connection_lock():
+            return await self._round_trip(encode_command(*args), 0)
+
+    async def transaction(self, *commands):
+        """Run commands atomically with MULTI/EXEC
+
+        Args:
+            commands: Tuples of command arguments
+
+        Returns:
+            list: Replies of the individual commands
+        """
+        async with self._connection_lock():
+            return await self._exec(commands)
+
+    async def _exec(self, commands):
+        payload = [encode_command("MULTI")]
+        payload += [encode_command(*command) for command in commands]
+        payload.append(encode_command("EXEC"))
+        # Skip +OK for MULTI and +QUEUED for every command
+        return await self._round_trip(b"".join(payload), len(commands) + 1)
+
+    @contextlib.asynccontextmanager
+    async def watch(self, *keys):
+        """WATCH keys for a check-and-set
+
+        The connection is held until the block ends. The yielded object runs
+        the checks with execute() and the writes with transaction(), which
+        returns None instead of the replies, and writes nothing, if another
+        client changed a watched key since the WATCH. Retry in that case.
+        """
+        async with self._connection_lock():
+            await self._round_trip(encode_command("WATCH", *keys), 0)
+            watched = WatchedConnection(self)
+            try:
+                yield watched
+            finally:
+                if watched.watching and self._writer is not None:
+                    await self._round_trip(encode_command("UNWATCH"), 0)
+
+    async def _round_trip(self, payload, skip):
+        try:
+            if self._writer is None:
+                await self._connect()
+            self._writer.write(payload)
+            for _ in range(skip):
+                await read_reply(self._reader)
+            return await read_reply(self._reader)
+        except BaseException:
+            # Replies may still be unread, e.g. after an error reply to MULTI
+            # or a cancellation; they would answer the next commands. Drop
+            # the connection and reconnect on the next command
+            await self.close()
+            raise
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class WatchedConnection:
+    """The connection of a RespClient inside watch()"""
+
+    def __init__(self, client):
+        self.client = client
+        self.watching = True
+
+    async def execute(self, *args):
+        return await self.client._round_trip(encode_command(*args), 0)
+
+    async def transaction(self, *commands):
+        # EXEC ends the WATCH, whether it ran the commands or not
+        self.watching = False
+        return await self.client._exec(commands)
@@ -0,0 +1,358 @@
+"""Voter roster: a sorted array of normalized student ids.
+
+A Roster holds all ids UTF-8 encoded, sorted and deduplicated, back to back in
+one blob, plus an array of offsets into it. Looking up a student is a binary
+search that also yields a dense slot number, which VoterRegistry uses to index
+its "has voted" bytearray. One million ids of ten characters take about 18 MB
+this way, against well over 100 MB as Python strings in a dict or set.
+
+Large rosters come from a file (ROSTER_FILE): CSV, JSON lines or plain text
+with one id per line. The file is read as a stream and sorted in chunks of
+``chunk_size`` ids that are merged on disk, so memory stays bounded however
+many rows it has. The result is cached in the binary layout below and
+memory-mapped on later starts, which makes reloading the roster instant as
+long as the source file is unchanged:
+
+    header   magic, id count, source size and mtime (see HEADER)
+    offsets  count + 1 unsigned 64-bit integers, native byte order
+    blob     the encoded ids
+
+The cache is machine-local: it is rebuilt whenever the source file changes.
+"""
+import array
+import csv
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+import unicodedata
+
+MAGIC = b"ROSTER01"
+# magic, number of ids, size and mtime_ns of the source file
+HEADER = struct.Struct("=8sQQq")
+OFFSET = struct.Struct("=Q")
+# Length prefix of an id in the temporary sorted runs
+RUN_LENGTH = struct.Struct("=I")
+
+FORMATS = ("csv", "jsonl", "txt")
+
+# Ids sorted in memory at once while building from a file
+DEFAULT_CHUNK_SIZE = 200_000
+# Ids per write while building the cache
+WRITE_BATCH = 65536
+
+
+def normalize_id(student_id):
+    """Canonical form of a student id, or None if it is not a usable id
+
+    Ids are compared after Unicode NFKC normalization, stripping surrounding
+    whitespace and case folding, so "Anna ", "anna" and "ＡＮＮＡ" are the
+    same student.
+    """
+    if not isinstance(student_id, str):
+        return None
+    return unicodedata.normalize("NFKC", student_id).strip().casefold() or None
+
+
+def _encode(student_id):
+    # Lone surrogates can come in through JSON; keep them comparable
+    return student_id.encode("utf-8", "surrogatepass")
+
+
+class Roster:
+    """Sorted, deduplicated student ids with binary search
+
+    Create one with from_ids (small rosters) or load (files). Lookups expect
+    normalized ids, see normalize_id.
+    """
+
+    def __init__(self, offsets, blob, base=0, source=None):
+        """
+        Args:
+            offsets: Sequence of len + 1 integers; id i is stored at
+                blob[base + offsets[i]:base + offsets[i + 1]]
+            blob: bytes or mmap with the encoded ids in sorted order
+            base: Position of the first id in blob
+            source: Where the roster came from, for logs
+        """
+        self._offsets = offsets
+        self._blob = blob
+        self._base = base
+        self._count = len(offsets) - 1
+        self.source = source
+
+    @classmethod
+    def from_ids(cls, student_ids):
+        """Build a roster in memory, normalizing and deduplicating the ids"""
+        encoded = sorted(
+            {_encode(n) for n in map(normalize_id, student_ids) if n is not None}
+        )
+        offsets = array.array("Q", [0])
+        position = 0
+        for value in encoded:
+            position += len(value)
+            offsets.append(position)
+        return cls(offsets, b"".join(encoded))
+
+    def __len__(self):
+        return self._count
+
+    def index(self, student_id):
+        """Slot of a normalized id in 0..len - 1, or None if not on the roster"""
+        if not isinstance(student_id, str):
+            return None
+        key = _encode(student_id)
+        offsets, blob, base = self._offsets, self._blob, self._base
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            value = blob[base + offsets[middle]:base + offsets[middle + 1]]
+            if value < key:
+                low = middle + 1
+            elif value > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def __contains__(self, student_id):
+        return self.index(student_id) is not None
+
+    def __getitem__(self, slot):
+        if not 0 <= slot < self._count:
+            raise IndexError(slot)
+        start = self._base + self._offsets[slot]
+        end = self._base + self._offsets[slot + 1]
+        return self._blob[start:end].decode("utf-8", "surrogatepass")
+
+    def __iter__(self):
+        for slot in range(self._count):
+            yield self[slot]
+
+    def close(self):
+        """Release the memory map of a roster loaded from a cache file"""
+        if isinstance(self._blob, mmap.mmap):
+            self._offsets.release()
+            self._blob.close()
+
+
+def detect_format(path):
+    """Roster file format from its extension: csv, jsonl or txt"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "txt"
+
+
+def read_ids(path, column="student_id", file_format=None):
+    """Stream the normalized ids of a roster file, row by row
+
+    Args:
+        path: CSV, JSON lines or text file
+        column: CSV column / JSON key holding the id. A CSV file without this
+            column in its header row, or without a header, uses its first
+            column; JSON lines may also be plain strings.
+        file_format: One of FORMATS (default: from the extension)
+
+    Yields:
+        str: Normalized ids, possibly with duplicates
+    """
+    file_format = file_format or detect_format(path)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if file_format == "csv":
+            rows = csv.reader(f)
+            first = next(rows, None)
+            if first is None:
+                return
+            header = [normalize_id(name) for name in first]
+            if normalize_id(column) in header:
+                position = header.index(normalize_id(column))
+            else:
+                position = 0
+                rows = _chain_row(first, rows)
+            for row in rows:
+                if len(row) > position:
+                    student_id = normalize_id(row[position])
+                    if student_id is not None:
+                        yield student_id
+        elif file_format == "jsonl":
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: {e}") from None
+                if isinstance(item, dict):
+                    item = item.get(column)
+                student_id = normalize_id(item)
+                if student_id is not None:
+                    yield student_id
+        else:
+            for line in f:
+                student_id = normalize_id(line)
+                if student_id is not None:
+                    yield student_id
+
+
+def _chain_row(first, rows):
+    yield first
+    yield from rows
+
+
+def _write_run(directory, chunk):
+    """Write a sorted chunk of encoded ids to a temporary file"""
+    run = tempfile.TemporaryFile(dir=directory)
+    for value in sorted(chunk):
+        run.write(RUN_LENGTH.pack(len(value)))
+        run.write(value)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    while True:
+        prefix = run.read(RUN_LENGTH.size)
+        if not prefix:
+            return
+        yield run.read(RUN_LENGTH.unpack(prefix)[0])
+
+
+def build_cache(path, cache_path, column="student_id", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Build the binary roster cache for a roster file
+
+    Memory use is bounded by chunk_size ids: sorted chunks are spilled to
+    temporary files and merged.
+
+    Returns:
+        int: Number of distinct ids
+    """
+    stat = os.stat(path)
+    directory = os.path.dirname(os.path.abspath(cache_path))
+    os.makedirs(directory, exist_ok=True)
+
+    runs, chunk = [], set()
+    try:
+        for student_id in read_ids(path, column):
+            chunk.add(_encode(student_id))
+            if len(chunk) >= chunk_size:
+                runs.append(_write_run(directory, chunk))
+                chunk = set()
+        if runs:
+            if chunk:
+                runs.append(_write_run(directory, chunk))
+            merged = heapq.merge(*(_read_run(run) for run in runs))
+        else:
+            merged = iter(sorted(chunk))
+        chunk = None
+
+        # Offsets go straight to the output, ids to a second file appended at
+        # the end; the count is only known then
+        out = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        with tempfile.TemporaryFile(dir=directory) as blob, out:
+            try:
+                out.write(HEADER.pack(MAGIC, 0, 0, 0))
+                out.write(OFFSET.pack(0))
+                count, position, previous = 0, 0, None
+                # Written in batches, one write per id would dominate
+                offsets, values = array.array("Q"), []
+                for value in merged:
+                    if value == previous:
+                        continue
+                    previous = value
+                    position += len(value)
+                    offsets.append(position)
+                    values.append(value)
+                    if len(values) >= WRITE_BATCH:
+                        out.write(offsets.tobytes())
+                        blob.write(b"".join(values))
+                        count += len(values)
+                        offsets, values = array.array("Q"), []
+                out.write(offsets.tobytes())
+                blob.write(b"".join(values))
+                count += len(values)
+                blob.seek(0)
+                while True:
+                    data = blob.read(1 << 20)
+                    if not data:
+                        break
+                    out.write(data)
+                out.seek(0)
+                out.write(HEADER.pack(MAGIC, count, stat.st_size, stat.st_mtime_ns))
+                out.flush()
+                os.fsync(out.fileno())
+            except BaseException:
+                out.close()
+                os.unlink(out.name)
+                raise
+        os.replace(out.name, cache_path)
+        return count
+    finally:
+        for run in runs:
+            run.close()
+
+
+def open_cache(cache_path, source_path=None):
+    """Memory-map a roster cache
+
+    Args:
+        cache_path: File written by build_cache
+        source_path: If given, the cache must match this file's size and mtime
+
+    Returns:
+        Roster, or None if the cache is missing, stale or damaged
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # ValueError: empty file
+        return None
+    try:
+        magic, count, size, mtime_ns = HEADER.unpack_from(mapped)
+        offsets_end = HEADER.size + (count + 1) * OFFSET.size
+        if magic != MAGIC or len(mapped) < offsets_end:
+            raise ValueError("not a roster cache")
+        if source_path is not None:
+            stat = os.stat(source_path)
+            if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                raise ValueError("stale")
+        with memoryview(mapped) as view:
+            offsets = view[HEADER.size:offsets_end].cast("Q")
+        if len(mapped) - offsets_end != offsets[count]:
+            offsets.release()
+            raise ValueError("truncated")
+    except (ValueError, struct.error):
+        mapped.close()
+        return None
+    return Roster(offsets, mapped, base=offsets_end, source=cache_path)
+
+
+def cache_path_for(path, cache_dir, column="student_id"):
+    """Cache file of a roster file, distinct per source path and column"""
+    key = f"{os.path.abspath(path)}\0{column}".encode()
+    return os.path.join(cache_dir, hashlib.sha256(key).hexdigest()[:16] + ".roster")
+
+
+def load(path, cache_dir, column="student_id", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Load a roster file through its binary cache, building it if needed
+
+    Returns:
+        tuple: (Roster, True if the cache was reused)
+    """
+    cache_path = cache_path_for(path, cache_dir, column)
+    roster = open_cache(cache_path, path)
+    if roster is not None:
+        roster.source = path
+        return roster, True
+    build_cache(path, cache_path, column, chunk_size)
+    roster = open_cache(cache_path, path)
+    if roster is None:
+        raise RuntimeError(f"Roster cache {cache_path} could not be read back")
+    roster.source = path
+    return roster, False
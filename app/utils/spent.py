@@ -0,0 +1,40 @@
+import threading
+
+
+class SpentSignatureStore:
+    """Hash index of signatures that have already been used to cast a vote.
+
+    Signatures are keyed by their integer value, so "0042" and "42" are the same
+    token and a voter cannot reuse a signature by re-encoding it.
+    """
+
+    def __init__(self):
+        self._spent = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(signature):
+        """Normalize a signature (int or decimal string) to its integer value"""
+        return int(signature)
+
+    def __contains__(self, signature):
+        return self.normalize(signature) in self._spent
+
+    def __len__(self):
+        return len(self._spent)
+
+    def add(self, signature):
+        """Mark a signature as spent.
+
+        Args:
+            signature: Signature as int or decimal string
+
+        Returns:
+            bool: True if the signature was fresh, False if it was already spent
+        """
+        key = self.normalize(signature)
+        with self._lock:
+            if key in self._spent:
+                return False
+            self._spent.add(key)
+        return True
@@ -0,0 +1,40 @@
+import threading
+
+
+class Tally:
+    """Running vote count, updated in O(1) whenever a ballot is accepted.
+
+    Every change bumps ``version`` so readers can tell whether anything changed
+    since their last snapshot without comparing the counts themselves.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def total(self):
+        """Number of accepted ballots"""
+        return self._version
+
+    def record(self, candidate):
+        """Count one accepted ballot for candidate
+
+        Returns:
+            tuple: (version, new count for candidate)
+        """
+        with self._lock:
+            count = self._counts.get(candidate, 0) + 1
+            self._counts[candidate] = count
+            self._version += 1
+            return self._version, count
+
+    def snapshot(self):
+        """Return (version, counts) with counts as a copy safe to hand out"""
+        with self._lock:
+            return self._version, dict(self._counts)
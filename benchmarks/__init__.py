@@ -0,0 +1 @@
+# Make benchmarks a proper Python package
@@ -0,0 +1,198 @@
+"""/sign-ballot latency under overload, with and without admission control.
+
+Starts the app once with admission control effectively disabled (no rate
+limits, unbounded concurrency, CRYPTO_MAX_PENDING raised so the executor does
+not shed either) and once with a small concurrency limit and queue. Each time,
+voters arrive at a fixed --rate for --duration seconds, each on its own
+connection, which with a production-size key is more than one core can sign.
+
+A voter that gets a 429 or 503 waits for Retry-After and tries again, at most
+--attempts times; a request taking longer than --timeout counts as timed out,
+as a browser would give up. Reports p50/p99 of the successful requests, how
+many were shed and how many voters got their signature in the end.
+
+Without admission control the queue grows for as long as the overload lasts
+and so does the latency of everyone. With it, the admitted requests keep a
+latency bounded by the queue, and the rest are told right away to come back.
+
+All voters connect from 127.0.0.1, so the per-IP rate limit is disabled in
+both runs.
+
+    python -m benchmarks.bench_admission --rate 40 --duration 10 --bits 2048
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+from app.utils.crypto import hash_to_int
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    benchmark_workdir,
+    percentile,
+    print_table,
+    start_server,
+    stop_server,
+)
+
+PORT = 8805
+
+UNLIMITED = {
+    "ADMISSION_CONCURRENCY": "1000000",
+    "ADMISSION_MAX_QUEUE": "0",
+    "CRYPTO_MAX_PENDING": "1000000",
+}
+
+
+def configurations(args):
+    """(name, server environment) per run"""
+    limited = {
+        "ADMISSION_CONCURRENCY": str(args.concurrency),
+        "ADMISSION_MAX_QUEUE": str(args.queue),
+        "ADMISSION_QUEUE_TIMEOUT": str(args.queue_timeout),
+    }
+    return [("off", UNLIMITED), ("on", limited)]
+
+
+async def run_voter(index, blinded, args, result):
+    """Request a signature for student{index}, retrying after 429/503"""
+    client = HttpClient("127.0.0.1", PORT)
+    body = {"student_id": f"student{index}", "blinded_ballot": str(blinded)}
+    try:
+        for _ in range(args.attempts):
+            start = time.perf_counter()
+            try:
+                status, headers, _ = await asyncio.wait_for(
+                    client.request("POST", "/sign-ballot", body), args.timeout
+                )
+            except asyncio.TimeoutError:
+                result["timed_out"] += 1
+                return
+            except (OSError, asyncio.IncompleteReadError):
+                # Connection reset, e.g. the worker was killed for not answering
+                result["errors"] += 1
+                return
+            elapsed = time.perf_counter() - start
+            if status == 200:
+                result["latencies"].append(elapsed)
+                result["signed"] += 1
+                return
+            if status not in (429, 503):
+                result["errors"] += 1
+                return
+            result["shed"][status] += 1
+            result["shed_latencies"].append(elapsed)
+            await asyncio.sleep(float(headers.get("retry-after", "1")))
+    finally:
+        await client.close()
+
+
+async def drive(args, blinded):
+    result = {
+        "latencies": [],
+        "shed_latencies": [],
+        "shed": {429: 0, 503: 0},
+        "signed": 0,
+        "timed_out": 0,
+        "errors": 0,
+    }
+    start = time.perf_counter()
+
+    async def arrive(index):
+        await asyncio.sleep(max(0.0, start + index / args.rate - time.perf_counter()))
+        await run_voter(index, blinded[index], args, result)
+
+    await asyncio.gather(*(arrive(i) for i in range(len(blinded))))
+    result["elapsed_s"] = time.perf_counter() - start
+    return result
+
+
+def summarize(name, result, voters):
+    latencies = sorted(result["latencies"])
+    shed = sorted(result["shed_latencies"])
+    return (
+        name,
+        f"{result['signed']}/{voters}",
+        f"{percentile(latencies, 50) * 1e3:.0f}",
+        f"{percentile(latencies, 99) * 1e3:.0f}",
+        result["shed"][429],
+        result["shed"][503],
+        f"{percentile(shed, 99) * 1e3:.0f}",
+        result["timed_out"],
+        result["errors"],
+        f"{result['elapsed_s']:.1f}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=40, help="voters per second")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--bits", type=int, default=2048, help="key size: 14 (demo), 2048, 3072, 4096"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="ADMISSION_CONCURRENCY when on"
+    )
+    parser.add_argument("--queue", type=int, default=16, help="ADMISSION_MAX_QUEUE")
+    parser.add_argument(
+        "--queue-timeout", type=float, default=1.0, help="ADMISSION_QUEUE_TIMEOUT"
+    )
+    parser.add_argument("--attempts", type=int, default=10, help="tries per voter")
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="client timeout per request"
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    voters = int(args.rate * args.duration)
+    public_key, private_key = benchmark_keys(args.bits)
+    p, g = public_key["p"], public_key["g"]
+    blinded = [
+        hash_to_int(f"A#{i}", p) * pow(g, random.getrandbits(64) + 2, p) % p
+        for i in range(voters)
+    ]
+    env = {
+        "COURSE_NAME": "Admission benchmark",
+        "VOTING_STUDENTS": ",".join(f"student{i}" for i in range(voters)),
+        "CANDIDATES": "A,B",
+        "JOURNAL_DIR": "",
+        "LOG_LEVEL": "WARNING",
+        "RATE_LIMIT_IP": "",
+        "RATE_LIMIT_STUDENT": "",
+    }
+
+    rows, results = [], {}
+    for name, extra in configurations(args):
+        with tempfile.TemporaryDirectory() as directory:
+            workdir = benchmark_workdir(directory, public_key, private_key)
+            server = start_server({**env, **extra}, port=PORT, cwd=workdir)
+            try:
+                result = asyncio.run(drive(args, blinded))
+            finally:
+                stop_server(server)
+        results[name] = result
+        rows.append(summarize(name, result, voters))
+
+    print(f"{voters} voters at {args.rate:g}/s, {args.bits}-bit key")
+    print_table(
+        [
+            "admission", "signed", "p50 ms", "p99 ms", "429", "503",
+            "shed p99 ms", "timed out", "failed", "elapsed s",
+        ],
+        rows,
+    )
+
+    if args.json:
+        config = {k: v for k, v in vars(args).items() if k != "json"}
+        for result in results.values():
+            result["shed"] = {str(k): v for k, v in result["shed"].items()}
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
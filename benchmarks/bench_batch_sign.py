@@ -0,0 +1,123 @@
+"""Single vs batch blind signing, in-process and over HTTP.
+
+In-process: sign_blinded_message in a loop vs sign_blinded_messages on chunks
+from split_batch, run on a CryptoExecutor as the server does (inline for small
+keys, one chunk per worker of a process pool for large ones). Over HTTP: one
+/sign-ballot request per ballot vs a single /sign-ballot/batch request, against
+the demo key.
+
+    python -m benchmarks.bench_batch_sign --sizes 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+from app.utils.crypto import sign_blinded_message, sign_blinded_messages, split_batch
+from app.utils.executor import CryptoExecutor, resolve_mode
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    print_table,
+    start_server,
+    stop_server,
+)
+
+PORT = 8801
+
+
+async def sign_batch(executor, batch, private_key):
+    chunks = split_batch(batch, private_key["p"], executor.workers)
+    signed = await asyncio.gather(
+        *(executor.run(sign_blinded_messages, chunk, private_key) for chunk in chunks)
+    )
+    return [signature for chunk in signed for signature in chunk]
+
+
+def bench_functions(sizes, key_bits):
+    rows = []
+    for bits in key_bits:
+        _, private_key = benchmark_keys(bits)
+        p = private_key["p"]
+        executor = CryptoExecutor(resolve_mode("auto", p.bit_length()))
+        # Start the pool before the clock runs
+        asyncio.run(sign_batch(executor, [2] * executor.workers, private_key))
+        for size in sizes:
+            batch = [random.randint(1, p - 1) for _ in range(size)]
+
+            start = time.perf_counter()
+            for m in batch:
+                sign_blinded_message(m, private_key)
+            single = time.perf_counter() - start
+
+            start = time.perf_counter()
+            asyncio.run(sign_batch(executor, batch, private_key))
+            batched = time.perf_counter() - start
+
+            rows.append(
+                (bits, size, f"{single:.3f}", f"{batched:.3f}", f"{single / batched:.1f}x")
+            )
+        executor.shutdown()
+    print_table(["key bits", "ballots", "single s", "batch s", "speedup"], rows)
+
+
+async def drive_http(size):
+    client = HttpClient("127.0.0.1", PORT)
+    ids = [f"student{i}" for i in range(2 * size)]
+
+    start = time.perf_counter()
+    for student_id in ids[:size]:
+        await client.request(
+            "POST", "/sign-ballot", {"student_id": student_id, "blinded_ballot": "42"}
+        )
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status, _, body = await client.request(
+        "POST",
+        "/sign-ballot/batch",
+        {"ballots": [{"student_id": s, "blinded_ballot": "42"} for s in ids[size:]]},
+    )
+    batched = time.perf_counter() - start
+    assert status == 200 and len(json.loads(body)["results"]) == size
+
+    await client.close()
+    return single, batched
+
+
+def bench_http(sizes):
+    rows = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                "COURSE_NAME": "Benchmark",
+                "VOTING_STUDENTS": ",".join(f"student{i}" for i in range(2 * size)),
+                "CANDIDATES": "A,B",
+                "JOURNAL_DIR": directory,
+            }
+            server = start_server(env, port=PORT)
+            try:
+                single, batched = asyncio.run(drive_http(size))
+            finally:
+                stop_server(server)
+        rows.append((size, f"{single:.3f}", f"{batched:.3f}", f"{single / batched:.1f}x"))
+    print_table(["ballots", "single requests s", "batch request s", "speedup"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--key-bits", type=int, nargs="+", default=[14, 2048])
+    parser.add_argument("--skip-http", action="store_true")
+    args = parser.parse_args()
+
+    bench_functions(args.sizes, args.key_bits)
+    if not args.skip_http:
+        print()
+        bench_http(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Bulletin board: Merkle tree appends, roots and inclusion proofs at scale.
+
+Appends --ballots ballots to a BulletinBoard and reports the mean time per
+append and how much the resident memory grew, then the time for a root, for
+an inclusion proof by index and by signature, and for checking a proof,
+sampled over the tree at its full size. As a baseline, the time to hash every
+ballot again, as a board without a tree would for every new root.
+
+    python -m benchmarks.bench_bulletin --ballots 1000000
+"""
+import argparse
+import random
+import time
+
+from app.utils.bulletin import BulletinBoard, leaf_hash, verify_inclusion
+from benchmarks.common import print_table, time_per_op
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ballots", type=int, default=1_000_000)
+    parser.add_argument("--bits", type=int, default=2048, help="signature size")
+    parser.add_argument("--samples", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Signatures are only hashed, any numbers of the right size do
+    ballots = []
+    for _ in range(args.ballots):
+        vote = random.choice("AB")
+        signature = str(random.getrandbits(args.bits))
+        ballots.append({"vote": vote, "message": vote, "signature": signature})
+
+    board = BulletinBoard()
+    before = rss_mb()
+    start = time.perf_counter()
+    for ballot in ballots:
+        board.append(ballot)
+    append = (time.perf_counter() - start) / args.ballots
+    board_mb = rss_mb() - before
+
+    picks = [random.randrange(args.ballots) for _ in range(args.samples)]
+    signatures = [ballots[i]["signature"] for i in picks]
+    leaves = [
+        leaf_hash(ballots[i]["vote"], ballots[i]["message"], ballots[i]["signature"])
+        for i in picks
+    ]
+    paths = [board.tree.proof(i) for i in picks]
+    root = board.tree.root()
+
+    def verify(i):
+        verify_inclusion(leaves[i], picks[i], args.ballots, paths[i], root)
+
+    rows = [
+        ("append", append),
+        ("root", time_per_op(lambda i: board.tree.root(), args.samples)),
+        ("proof by index", time_per_op(lambda i: board.tree.proof(picks[i]), 1000)),
+        ("proof by signature", time_per_op(lambda i: board.proof(signatures[i]), 1000)),
+        ("verify proof", time_per_op(verify, args.samples)),
+    ]
+
+    start = time.perf_counter()
+    for ballot in ballots:
+        leaf_hash(ballot["vote"], ballot["message"], ballot["signature"])
+    rows.append(("rehash all (baseline)", time.perf_counter() - start))
+
+    print(
+        f"{args.ballots} ballots, {args.bits}-bit signatures, proofs of "
+        f"{len(paths[0])} hashes, board {board_mb:.0f} MB"
+    )
+    print_table(["operation", "µs"], [(name, f"{t * 1e6:.2f}") for name, t in rows])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Re-verifying all ballots at election close: one by one versus in batches.
+
+Builds --ballots valid (message hash, signature) pairs and a few invalid ones,
+then reports ballots per second for checking each signature with a full
+exponentiation, for the small-exponent batch test in this process, and for
+batches of JOB_SIZE spread over a process pool of 1 up to --workers workers,
+as app.utils.certify runs them.
+
+    python -m benchmarks.bench_certify --bits 2048 --ballots 20000 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from app.utils.certify import JOB_SIZE, find_invalid
+from app.utils.crypto import message_to_int
+from app.utils.executor import CryptoExecutor
+from benchmarks.common import benchmark_keys, print_table
+
+# Distinct signed messages; the other pairs are products of two of them,
+# which are valid signatures of the product hash as well
+BASE_PAIRS = 256
+
+# Invalid pairs mixed into the ballots
+INVALID = 5
+
+
+def make_pairs(private_key, count):
+    p, x = private_key["p"], private_key["x"]
+    base = []
+    for i in range(BASE_PAIRS):
+        h = message_to_int(f"A#{i}", p)
+        base.append((h, pow(h, x, p)))
+    pairs = base[:count]
+    while len(pairs) < count:
+        (h1, s1), (h2, s2) = random.sample(base, 2)
+        pairs.append((h1 * h2 % p, s1 * s2 % p))
+    invalid = sorted(random.sample(range(count), INVALID))
+    for i in invalid:
+        h, s = pairs[i]
+        pairs[i] = (h, s * 2 % p)
+    return pairs, invalid
+
+
+async def run_pool(workers, pairs, private_key):
+    executor = CryptoExecutor("process", workers=workers)
+    try:
+        # Start the workers before the clock runs
+        await asyncio.gather(*(executor.run(abs, 1) for _ in range(workers)))
+        start = time.perf_counter()
+        firsts = range(0, len(pairs), JOB_SIZE)
+        results = await asyncio.gather(
+            *(
+                executor.run(find_invalid, pairs[first : first + JOB_SIZE], private_key)
+                for first in firsts
+            )
+        )
+        seconds = time.perf_counter() - start
+    finally:
+        executor.shutdown()
+    return [first + i for first, bad in zip(firsts, results) for i in bad], seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bits", type=int, default=2048)
+    parser.add_argument("--ballots", type=int, default=20000)
+    parser.add_argument("--single", type=int, default=200, help="ballots one by one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    _, private_key = benchmark_keys(args.bits)
+    pairs, invalid = make_pairs(private_key, args.ballots)
+    rows = []
+
+    def measure(name, check, count):
+        start = time.perf_counter()
+        found = check()
+        add_row(name, count, time.perf_counter() - start)
+        return found
+
+    def add_row(name, count, seconds):
+        rows.append((name, count, f"{seconds:.2f}", f"{count / seconds:.0f}"))
+
+    # One by one is slow, a sample shows the rate
+    sample = pairs[: args.single]
+    measure("one by one", lambda: find_invalid(sample, private_key, False), len(sample))
+    found = measure(
+        "batch, in process", lambda: find_invalid(pairs, private_key), len(pairs)
+    )
+    assert found == invalid, found
+
+    for workers in range(1, args.workers + 1):
+        found, seconds = asyncio.run(run_pool(workers, pairs, private_key))
+        add_row(f"batch, {workers} workers", len(pairs), seconds)
+        assert found == invalid, found
+
+    print(f"{args.bits}-bit key, {INVALID} invalid ballots, jobs of {JOB_SIZE}")
+    print_table(["verification", "ballots", "seconds", "ballots/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
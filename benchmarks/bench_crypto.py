@@ -0,0 +1,289 @@
+"""Microbenchmarks of the primitives in app/utils/crypto.py.
+
+Measures the time per operation of every primitive for each key size, and of
+batch signing for each batch size. Each benchmark runs in rounds of at least
+--min-time seconds; the median round is reported. Results can be written as
+JSON and compared against a stored baseline, flagging every benchmark that got
+slower by more than --threshold.
+
+    python -m benchmarks.bench_crypto
+    python -m benchmarks.bench_crypto --json out.json --fail-on-regression
+    python -m benchmarks.bench_crypto --save-baseline
+
+Baselines are machine specific, record a new one after changing hardware.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from app.utils.crypto import (
+    SignatureVerifier,
+    blind_message,
+    complete_blind_signature_flow,
+    generate_server_dh_params,
+    hash_to_int,
+    mod_inv,
+    precompute_key_tables,
+    sign_blinded_message,
+    sign_blinded_messages,
+    unblind_signature,
+    verify_signature,
+)
+from benchmarks.common import benchmark_keys, print_table
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "crypto.json")
+KEY_SIZES = [14, 2048]
+BATCH_SIZES = [1, 16, 256]
+
+# Distinct inputs cycled through by every benchmark
+INPUTS = 64
+
+
+def measure(fn, min_time, rounds):
+    """Time fn(i) and return the median seconds per call over several rounds
+
+    The number of calls per round is doubled until one round takes min_time.
+    """
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(i)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        iterations *= 2
+
+    samples = [elapsed / iterations]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(i)
+        samples.append((time.perf_counter() - start) / iterations)
+    return statistics.median(samples), iterations
+
+
+def primitive_benchmarks(bits):
+    """(name, fn(i)) for every primitive at one key size"""
+    public_key, private_key = benchmark_keys(bits)
+    p = public_key["p"]
+    tables = precompute_key_tables(public_key)
+
+    messages = [f"Kandidat {i}" for i in range(INPUTS)]
+    rs = [random.randint(2, p - 2) for _ in range(INPUTS)]
+    blinded = [blind_message(m, r, public_key)[0] for m, r in zip(messages, rs)]
+    blind_signatures = [sign_blinded_message(b, private_key) for b in blinded]
+    signatures = [
+        unblind_signature(s, r, public_key) for s, r in zip(blind_signatures, rs)
+    ]
+    values = [random.randint(2, p - 1) for _ in range(INPUTS)]
+    verifier = SignatureVerifier(private_key)
+
+    def at(items, i):
+        return items[i % INPUTS]
+
+    return [
+        ("hash_to_int", lambda i: hash_to_int(at(messages, i), p)),
+        ("blind_message", lambda i: blind_message(at(messages, i), at(rs, i), public_key)),
+        (
+            "blind_message[tables]",
+            lambda i: blind_message(at(messages, i), at(rs, i), public_key, tables),
+        ),
+        ("sign_blinded_message", lambda i: sign_blinded_message(at(blinded, i), private_key)),
+        (
+            "unblind_signature",
+            lambda i: unblind_signature(at(blind_signatures, i), at(rs, i), public_key),
+        ),
+        (
+            "unblind_signature[tables]",
+            lambda i: unblind_signature(
+                at(blind_signatures, i), at(rs, i), public_key, tables
+            ),
+        ),
+        ("mod_inv", lambda i: mod_inv(at(values, i), p)),
+        (
+            "verify_signature",
+            lambda i: verify_signature(at(messages, i), at(signatures, i), private_key),
+        ),
+        (
+            "SignatureVerifier.verify[cached]",
+            lambda i: verifier.verify(at(messages, i), at(signatures, i)),
+        ),
+        (
+            "generate_server_dh_params",
+            lambda i: generate_server_dh_params(at(values, i), public_key),
+        ),
+        (
+            "generate_server_dh_params[tables]",
+            lambda i: generate_server_dh_params(at(values, i), public_key, tables),
+        ),
+        (
+            "complete_blind_signature_flow",
+            lambda i: complete_blind_signature_flow(
+                at(messages, i), public_key, private_key
+            ),
+        ),
+    ]
+
+
+def batch_benchmarks(bits, batch_size):
+    """Batch signing, timed per batch and reported per ballot"""
+    public_key, private_key = benchmark_keys(bits)
+    p = public_key["p"]
+    batches = [
+        [random.randint(2, p - 1) for _ in range(batch_size)] for _ in range(4)
+    ]
+    return [
+        (
+            "sign_blinded_messages",
+            lambda i: sign_blinded_messages(batches[i % 4], private_key),
+        )
+    ]
+
+
+def run_suite(key_sizes, batch_sizes, min_time, rounds, only=None):
+    results = []
+
+    def record(name, bits, batch, fn):
+        if only and not any(pattern in name for pattern in only):
+            return
+        seconds, iterations = measure(fn, min_time, rounds)
+        results.append(
+            {
+                "name": name,
+                "bits": bits,
+                "batch": batch,
+                "ns_per_op": round(seconds / batch * 1e9, 1),
+                "iterations": iterations,
+            }
+        )
+        print(f"  {name} bits={bits} batch={batch}", file=sys.stderr)
+
+    for bits in key_sizes:
+        for name, fn in primitive_benchmarks(bits):
+            record(name, bits, 1, fn)
+        for batch_size in batch_sizes:
+            for name, fn in batch_benchmarks(bits, batch_size):
+                record(name, bits, batch_size, fn)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Annotate results with the change against the baseline
+
+    Returns:
+        list: Results that are slower than the baseline by more than threshold
+    """
+    previous = {
+        (r["name"], r["bits"], r["batch"]): r["ns_per_op"] for r in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["bits"], result["batch"]))
+        if before is None:
+            continue
+        result["baseline_ns_per_op"] = before
+        result["change"] = result["ns_per_op"] / before - 1
+        if result["change"] > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def format_ns(ns):
+    if ns >= 1e6:
+        return f"{ns / 1e6:,.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:,.2f} us"
+    return f"{ns:,.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bits", type=int, nargs="+", default=KEY_SIZES)
+    parser.add_argument("--batch", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="*", help="run benchmarks whose name contains one of these"
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown that counts as regression",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store the results as baseline"
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="exit with status 1 if a regression was found",
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.bits, args.batch, args.min_time, args.rounds, args.only)
+    report = {"environment": environment(), "results": results}
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if baseline.get("environment") != report["environment"]:
+            print(
+                "Note: baseline was recorded in a different environment",
+                file=sys.stderr,
+            )
+
+    rows = []
+    for result in results:
+        change = result.get("change")
+        flag = ""
+        if change is not None:
+            flag = f"{change:+.0%}" + (" REGRESSION" if result in regressions else "")
+        rows.append(
+            (
+                result["name"],
+                result["bits"],
+                result["batch"],
+                format_ns(result["ns_per_op"]),
+                format_ns(result["baseline_ns_per_op"]) if change is not None else "-",
+                flag,
+            )
+        )
+    print_table(["benchmark", "bits", "batch", "per op", "baseline", "change"], rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
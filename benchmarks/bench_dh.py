@@ -0,0 +1,126 @@
+"""/dh-exchange latency and memory with and without the precomputed pool.
+
+Starts the app once with DH_POOL_SIZE=0, where every exchange computes both
+g^b and A^b, and once with a pool of --pool-size precomputed (b, g^b) pairs,
+where a request only waits for A^b. Clients arrive at a fixed --rate, below
+what the server can sustain, so the pool has time to refill between them,
+for --requests exchanges in total. Reports p50/p99 latency, how many
+exchanges the pool served and the growth of the worker's resident memory.
+
+    python -m benchmarks.bench_dh --bits 2048 3072 --rate 10
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from app.utils.crypto import generate_dh_params
+from benchmarks.bench_elections import worker_rss_mb
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    benchmark_workdir,
+    percentile,
+    print_table,
+    start_server,
+    stop_server,
+)
+
+PORT = 8808
+
+
+async def drive(args, values):
+    latencies, failed = [], 0
+    start = time.perf_counter()
+
+    async def exchange(index):
+        nonlocal failed
+        await asyncio.sleep(max(0.0, start + index / args.rate - time.perf_counter()))
+        client = HttpClient("127.0.0.1", PORT)
+        sent = time.perf_counter()
+        body = {"A": values[index]}
+        status, _, _ = await client.request("POST", "/dh-exchange", body)
+        latencies.append(time.perf_counter() - sent)
+        failed += status != 200
+        await client.close()
+
+    await asyncio.gather(*(exchange(i) for i in range(len(values))))
+    return sorted(latencies), failed
+
+
+async def pool_metrics():
+    client = HttpClient("127.0.0.1", PORT)
+    _, _, body = await client.request("GET", "/metrics")
+    await client.close()
+    values = {}
+    for line in body.decode().splitlines():
+        if line.startswith("dh_"):
+            name, value = line.split()
+            values[name] = int(float(value))
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bits", type=int, nargs="+", default=[2048, 3072])
+    parser.add_argument("--rate", type=float, default=10, help="exchanges per second")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=32)
+    args = parser.parse_args()
+
+    rows = []
+    for bits in args.bits:
+        public_key, private_key = benchmark_keys(bits)
+        # Client values do not matter for the server's work, a few will do
+        values = [str(generate_dh_params(public_key)["A"]) for _ in range(16)]
+        values = [random.choice(values) for _ in range(args.requests)]
+        for name, pool_size in [("off", 0), ("on", args.pool_size)]:
+            with tempfile.TemporaryDirectory() as directory:
+                benchmark_workdir(directory, public_key, private_key)
+                env = {
+                    "COURSE_NAME": "DH benchmark",
+                    "VOTING_STUDENTS": "nobody",
+                    "CANDIDATES": "A,B",
+                    "JOURNAL_DIR": "",
+                    "LOG_LEVEL": "WARNING",
+                    "RATE_LIMIT_IP": "",
+                    "DH_POOL_SIZE": str(pool_size),
+                }
+                server = start_server(env, port=PORT, cwd=directory)
+                try:
+                    # Let the pool fill before the first client arrives
+                    time.sleep(2)
+                    base_rss = worker_rss_mb(server)
+                    latencies, failed = asyncio.run(drive(args, values))
+                    rss = worker_rss_mb(server)
+                    counts = asyncio.run(pool_metrics())
+                finally:
+                    stop_server(server)
+            rows.append(
+                (
+                    bits,
+                    name,
+                    len(latencies),
+                    failed,
+                    f"{percentile(latencies, 50) * 1e3:.1f}",
+                    f"{percentile(latencies, 99) * 1e3:.1f}",
+                    counts.get("dh_pool_hits", 0),
+                    counts.get("dh_pool_misses", 0),
+                    counts.get("dh_sessions", 0),
+                    f"{rss - base_rss:.1f}",
+                )
+            )
+
+    print(f"{args.requests} exchanges at {args.rate:g}/s, pool of {args.pool_size}")
+    print_table(
+        [
+            "bits", "pool", "requests", "failed", "p50 ms", "p99 ms", "hits",
+            "misses", "sessions", "worker MB",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Many elections in one process: latency and memory by ELECTIONS_MAX_ACTIVE.
+
+Creates --elections elections in ELECTIONS_DIR, each with --students students
+and its own key, and lets --concurrency voters request blind signatures from
+them. Most traffic goes to a few elections: --hot of them get --hot-share of
+the requests, the rest is spread over all others, as when a handful of
+courses vote at the same time while the others see a straggler now and then.
+
+The run is repeated with every election kept in memory and with at most
+--max-active loaded. Reports p50/p99 of /elections/{id}/sign-ballot, how
+often elections were loaded and evicted, and the resident memory of the
+worker process after the run.
+
+    python -m benchmarks.bench_elections --elections 200 --max-active 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.utils.crypto import generate_keys, hash_to_int
+from app.utils.groups import standard_group
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    benchmark_workdir,
+    percentile,
+    print_table,
+    start_server,
+    stop_server,
+)
+
+PORT = 8807
+
+
+def write_elections(directory, elections, students, bits):
+    """One election directory with definition and key pair per election"""
+    group = standard_group("ffdhe", bits) if bits != 14 else None
+    for e in range(elections):
+        path = os.path.join(directory, f"course{e}")
+        os.makedirs(path)
+        definition = {
+            "course_name": f"Course {e}",
+            "candidates": ["A", "B"],
+            "voting_students": [f"student{i}" for i in range(students)],
+        }
+        with open(os.path.join(path, "election.json"), "w") as f:
+            json.dump(definition, f)
+        public_key, private_key = generate_keys(group)
+        with open(os.path.join(path, "keys.json"), "w") as f:
+            json.dump({"public_key": public_key, "private_key": private_key}, f)
+
+
+def worker_rss_mb(server):
+    """Resident memory of the gunicorn worker in MB"""
+    with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+        worker = int(f.read().split()[0])
+    with open(f"/proc/{worker}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def drive(args, blinded):
+    # Every student votes once: hand out (election, student) pairs up front
+    hot = list(range(args.hot))
+    cold = list(range(args.hot, args.elections))
+    next_student = [0] * args.elections
+    requests = []
+    for _ in range(args.requests):
+        pool = hot if random.random() < args.hot_share or not cold else cold
+        election = random.choice(pool)
+        if next_student[election] < args.students:
+            requests.append((election, next_student[election]))
+            next_student[election] += 1
+
+    latencies, failed = [], 0
+
+    async def voter():
+        nonlocal failed
+        client = HttpClient("127.0.0.1", PORT)
+        while requests:
+            election, student = requests.pop()
+            start = time.perf_counter()
+            status, _, _ = await client.request(
+                "POST",
+                f"/elections/course{election}/sign-ballot",
+                {"student_id": f"student{student}", "blinded_ballot": str(blinded)},
+            )
+            latencies.append(time.perf_counter() - start)
+            failed += status != 200
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(voter() for _ in range(args.concurrency)))
+    return sorted(latencies), failed, time.perf_counter() - start
+
+
+async def election_metrics():
+    client = HttpClient("127.0.0.1", PORT)
+    _, _, body = await client.request("GET", "/metrics")
+    await client.close()
+    values = {}
+    for line in body.decode().splitlines():
+        if line.startswith("elections_"):
+            name, value = line.split()
+            values[name] = float(value)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--elections", type=int, default=200)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--max-active", type=int, default=16)
+    parser.add_argument("--hot", type=int, default=8)
+    parser.add_argument("--hot-share", type=float, default=0.9)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--bits", type=int, default=2048, help="key size: 14 (demo), 2048, 3072, 4096"
+    )
+    args = parser.parse_args()
+
+    # Every signature is for the same message; only the signing time matters
+    blinded = hash_to_int("A#0", 2**61 - 1)
+    rows = []
+    for name, max_active in [
+        ("all loaded", args.elections),
+        (f"max {args.max_active}", args.max_active),
+    ]:
+        with tempfile.TemporaryDirectory() as directory:
+            benchmark_workdir(directory, *benchmark_keys(args.bits))
+            elections_dir = os.path.join(directory, "elections")
+            write_elections(elections_dir, args.elections, args.students, args.bits)
+            env = {
+                "COURSE_NAME": "Elections benchmark",
+                "VOTING_STUDENTS": "nobody",
+                "CANDIDATES": "A,B",
+                "JOURNAL_DIR": "",
+                "LOG_LEVEL": "WARNING",
+                "RATE_LIMIT_IP": "",
+                "RATE_LIMIT_STUDENT": "",
+                "ELECTIONS_DIR": elections_dir,
+                "ELECTIONS_MAX_ACTIVE": str(max_active),
+            }
+            server = start_server(env, port=PORT, cwd=directory)
+            try:
+                base_rss = worker_rss_mb(server)
+                latencies, failed, elapsed = asyncio.run(drive(args, blinded))
+                rss = worker_rss_mb(server)
+                counts = asyncio.run(election_metrics())
+            finally:
+                stop_server(server)
+        rows.append(
+            (
+                name,
+                len(latencies),
+                failed,
+                f"{percentile(latencies, 50) * 1e3:.1f}",
+                f"{percentile(latencies, 99) * 1e3:.1f}",
+                f"{len(latencies) / elapsed:.0f}",
+                int(counts.get("elections_active", 0)),
+                int(counts.get("elections_loads", 0)),
+                int(counts.get("elections_evictions", 0)),
+                f"{rss - base_rss:.0f}",
+            )
+        )
+
+    print(
+        f"{args.elections} elections x {args.students} students, {args.hot} hot "
+        f"({args.hot_share:.0%} of requests), {args.bits}-bit keys"
+    )
+    print_table(
+        [
+            "elections", "requests", "failed", "p50 ms", "p99 ms", "req/s",
+            "active", "loads", "evictions", "worker MB",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
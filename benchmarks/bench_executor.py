@@ -0,0 +1,174 @@
+"""Request latency under concurrent load with crypto inline vs in a process pool.
+
+Starts the app with the toy key and a 2048-bit key, once with
+CRYPTO_EXECUTOR=inline and once with CRYPTO_EXECUTOR=process. Concurrent voters
+run /sign-ballot and /submit-vote while a probe polls /results, which does no
+crypto at all: with inline crypto it waits behind every modexp on the event
+loop, with the process pool it does not.
+
+    python -m benchmarks.bench_executor --voters 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+from app.utils.crypto import hash_to_int
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    benchmark_workdir,
+    percentile,
+    print_table,
+    start_server,
+    stop_server,
+)
+
+PORT = 8802
+KEY_SIZES = [14, 2048]
+MODES = ["inline", "process"]
+PROBE_INTERVAL = 0.05
+
+
+def prepare_ballots(public_key, voters):
+    """Blind one unique message per voter ahead of time.
+
+    Uses 64-bit blinding factors so the client side stays cheap and does not
+    compete with the server for the CPU during the measurement.
+
+    Returns:
+        list: (message, blinded ballot, y^-r mod p)
+    """
+    p, g, y = public_key["p"], public_key["g"], public_key["y"]
+    ballots = []
+    for i in range(voters):
+        message = f"A#{i}"
+        r = random.getrandbits(64) + 2
+        blinded = hash_to_int(message, p) * pow(g, r, p) % p
+        ballots.append((message, blinded, pow(pow(y, r, p), -1, p)))
+    return ballots
+
+
+async def drive(ballots, public_key, concurrency):
+    p = public_key["p"]
+    latencies = {"/sign-ballot": [], "/submit-vote": [], "/results": []}
+    pending = list(range(len(ballots)))
+
+    async def timed(client, method, path, body=None):
+        start = time.perf_counter()
+        status, _, data = await client.request(method, path, body)
+        latencies[path].append(time.perf_counter() - start)
+        return status, data
+
+    async def voter():
+        client = HttpClient("127.0.0.1", PORT)
+        while pending:
+            index = pending.pop()
+            message, blinded, y_inv_r = ballots[index]
+            status, data = await timed(
+                client,
+                "POST",
+                "/sign-ballot",
+                {"student_id": f"student{index}", "blinded_ballot": str(blinded)},
+            )
+            if status != 200:
+                continue
+            signature = int(json.loads(data)["blind_signature"]) * y_inv_r % p
+            await timed(
+                client,
+                "POST",
+                "/submit-vote",
+                {"vote": message, "signature": str(signature), "candidate": "A"},
+            )
+        await client.close()
+
+    done = asyncio.Event()
+
+    async def probe():
+        client = HttpClient("127.0.0.1", PORT)
+        while not done.is_set():
+            await timed(client, "GET", "/results")
+            await asyncio.sleep(PROBE_INTERVAL)
+        await client.close()
+
+    probe_task = asyncio.ensure_future(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(voter() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    client = HttpClient("127.0.0.1", PORT)
+    _, _, body = await client.request("GET", "/crypto-stats")
+    await client.close()
+    return elapsed, latencies, json.loads(body)["executor"]
+
+
+def run(bits, mode, voters, concurrency):
+    public_key, private_key = benchmark_keys(bits)
+    ballots = prepare_ballots(public_key, voters)
+    env = {
+        "COURSE_NAME": "Benchmark",
+        "VOTING_STUDENTS": ",".join(f"student{i}" for i in range(voters)),
+        "CANDIDATES": "A,B",
+        "JOURNAL_DIR": "",
+        "CRYPTO_EXECUTOR": mode,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = benchmark_workdir(directory, public_key, private_key)
+        server = start_server(env, port=PORT, cwd=workdir)
+        try:
+            return asyncio.run(drive(ballots, public_key, concurrency))
+        finally:
+            stop_server(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--bits", type=int, nargs="+", default=KEY_SIZES)
+    args = parser.parse_args()
+
+    rows, stats_rows = [], []
+    for bits in args.bits:
+        for mode in MODES:
+            elapsed, latencies, stats = run(bits, mode, args.voters, args.concurrency)
+            for path, values in latencies.items():
+                values.sort()
+                rows.append(
+                    (
+                        bits,
+                        mode,
+                        path,
+                        len(values),
+                        f"{percentile(values, 50) * 1e3:.1f}",
+                        f"{percentile(values, 95) * 1e3:.1f}",
+                        f"{percentile(values, 99) * 1e3:.1f}",
+                    )
+                )
+            completed = stats["completed"] or 1
+            stats_rows.append(
+                (
+                    bits,
+                    mode,
+                    f"{args.voters / elapsed:,.0f}",
+                    stats["peak_pending"],
+                    stats["rejected"],
+                    f"{stats['wait_seconds'] / completed * 1e3:.2f}",
+                    f"{stats['run_seconds'] / completed * 1e3:.2f}",
+                )
+            )
+
+    print_table(["bits", "mode", "route", "requests", "p50 ms", "p95 ms", "p99 ms"], rows)
+    print()
+    print_table(
+        ["bits", "mode", "voters/s", "peak pending", "rejected", "wait ms", "run ms"],
+        stats_rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
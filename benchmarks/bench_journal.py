@@ -0,0 +1,65 @@
+"""Sustained journal writes/sec with group commit on vs off.
+
+Simulates concurrent request handlers that each append a ballot record and wait
+for it to be durable, as /submit-vote does.
+
+    python -m benchmarks.bench_journal --records 20000 --concurrency 256
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from app.utils.journal import Journal
+from benchmarks.common import print_table
+
+
+async def run(group_commit, records, concurrency, directory):
+    journal = Journal(directory, group_commit=group_commit)
+    queue = asyncio.Queue()
+    for i in range(records):
+        queue.put_nowait(
+            {"op": "vote", "vote": "A", "message": "A", "signature": str(10**600 + i)}
+        )
+
+    async def handler():
+        while not queue.empty():
+            record = queue.get_nowait()
+            await asyncio.wrap_future(journal.append(record))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument(
+        "--dir", help="directory on the disk to measure (default: a temp dir)"
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for group_commit in (True, False):
+        with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+            elapsed = asyncio.run(
+                run(group_commit, args.records, args.concurrency, directory)
+            )
+        rows.append(
+            (
+                "on" if group_commit else "off",
+                args.records,
+                f"{elapsed:.2f}",
+                f"{args.records / elapsed:,.0f}",
+            )
+        )
+
+    print_table(["group commit", "records", "seconds", "writes/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""End-to-end load test of the voting protocol.
+
+Every simulated voter runs the same steps as the browser on its own connection:
+/get-public-key, blinding, /sign-ballot, unblinding and /submit-vote. Voters
+arrive according to an arrival curve spread over --duration seconds, and at most
+--concurrency of them are active at once. Reports p50/p95/p99 latency per
+endpoint, for the whole voter flow, and the throughput.
+
+Like voting.js, every voter signs "<candidate>#<nonce>" with a random nonce,
+spread over --candidates in turn. With the demo key (p = 9973) some of these
+messages hash to the same signature, so a few /submit-vote calls fail as
+"already cast"; the report lists them apart from the errors.
+
+The app is started locally with its own keys and an in-memory state; pass --url
+to load an already running server instead (its roster must contain
+student0..student{N-1} and its candidates must match --candidates).
+
+    python -m benchmarks.bench_load --voters 1000 --curve rush --duration 120
+    python -m benchmarks.bench_load --voters 500 --bits 2048 --json result.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import secrets
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from app.utils.crypto import hash_to_int
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    benchmark_workdir,
+    percentile,
+    print_table,
+    start_server,
+    stop_server,
+)
+
+PORT = 8803
+ENDPOINTS = ["/get-public-key", "/sign-ballot", "/submit-vote"]
+
+
+def arrival_times(curve, voters, duration):
+    """Arrival offsets in seconds, sorted
+
+    Args:
+        curve: burst (everyone at once), uniform (constant rate), ramp (rate
+            grows linearly), rush (rate falls linearly, most voters early), peak
+            (rate rises to the middle and falls again) or poisson (random
+            arrivals at a constant mean rate)
+        voters: Number of voters
+        duration: Length of the arrival window in seconds
+
+    Returns:
+        list: One offset per voter
+    """
+    fractions = [(i + 0.5) / voters for i in range(voters)]
+    if curve == "burst":
+        return [0.0] * voters
+    if curve == "uniform":
+        return [duration * f for f in fractions]
+    if curve == "ramp":
+        return [duration * math.sqrt(f) for f in fractions]
+    if curve == "rush":
+        return [duration * (1 - math.sqrt(1 - f)) for f in fractions]
+    if curve == "peak":
+        # Inverse CDF of a triangular distribution over [0, duration]
+        return [
+            duration * (math.sqrt(f / 2) if f < 0.5 else 1 - math.sqrt((1 - f) / 2))
+            for f in fractions
+        ]
+    if curve == "poisson":
+        times, t = [], 0.0
+        for _ in range(voters):
+            t += random.expovariate(voters / duration) if duration else 0.0
+            times.append(t)
+        return times
+    raise ValueError(f"Unknown arrival curve '{curve}'")
+
+
+CURVES = ["burst", "uniform", "ramp", "rush", "peak", "poisson"]
+
+
+class LoadResult:
+    """Latencies and failures collected during a run"""
+
+    def __init__(self):
+        self.latencies = {path: [] for path in ENDPOINTS + ["voter"]}
+        self.errors = {path: 0 for path in ENDPOINTS}
+        self.counted = 0
+        self.already_cast = 0
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for path, values in self.latencies.items():
+            values.sort()
+            endpoints[path] = {
+                "requests": len(values),
+                "errors": self.errors.get(path, 0),
+                "p50_ms": percentile(values, 50) * 1e3,
+                "p95_ms": percentile(values, 95) * 1e3,
+                "p99_ms": percentile(values, 99) * 1e3,
+            }
+        requests = sum(len(self.latencies[path]) for path in ENDPOINTS)
+        return {
+            "elapsed_s": elapsed,
+            "counted": self.counted,
+            "already_cast": self.already_cast,
+            "voters_per_s": self.counted / elapsed if elapsed else 0.0,
+            "requests_per_s": requests / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def ballot_message(candidates, index):
+    """The message student{index} signs and the candidate it is cast for
+
+    Args:
+        candidates: Candidate names, voters are spread over them in turn
+        index: Number of the voter
+
+    Returns:
+        tuple: (message, candidate), the message in the format of voting.js
+    """
+    candidate = candidates[index % len(candidates)]
+    return f"{candidate}#{secrets.token_hex(16)}", candidate
+
+
+async def run_voter(host, port, index, blinding_bits, ballot, result):
+    """Run the protocol for student{index}, return True if the vote was counted"""
+    client = HttpClient(host, port)
+    start = time.perf_counter()
+
+    async def call(path, body=None):
+        request_start = time.perf_counter()
+        status, _, data = await client.request("POST", path, body)
+        result.latencies[path].append(time.perf_counter() - request_start)
+        if status == 200:
+            return json.loads(data)
+        if status == 403 and json.loads(data).get("error") == "Vote already cast":
+            result.already_cast += 1
+        else:
+            result.errors[path] += 1
+        return None
+
+    try:
+        data = await call("/get-public-key")
+        if data is None:
+            return False
+        public_key = {k: int(v) for k, v in data["public_key"].items()}
+        p, g, y = public_key["p"], public_key["g"], public_key["y"]
+
+        message, candidate = ballot
+        r = random.getrandbits(blinding_bits) + 2
+        blinded = hash_to_int(message, p) * pow(g, r, p) % p
+
+        data = await call(
+            "/sign-ballot",
+            {"student_id": f"student{index}", "blinded_ballot": str(blinded)},
+        )
+        if data is None:
+            return False
+        signature = int(data["blind_signature"]) * pow(pow(y, r, p), -1, p) % p
+
+        data = await call(
+            "/submit-vote",
+            {"vote": message, "signature": str(signature), "candidate": candidate},
+        )
+        if data is None:
+            return False
+        result.latencies["voter"].append(time.perf_counter() - start)
+        return True
+    finally:
+        await client.close()
+
+
+async def drive(host, port, args):
+    result = LoadResult()
+    candidates = args.candidates.split(",")
+    voters, concurrency = args.voters, args.concurrency
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def arrive(index, offset):
+        await asyncio.sleep(max(0.0, start + offset - time.perf_counter()))
+        async with slots:
+            ballot = ballot_message(candidates, index)
+            if await run_voter(
+                host, port, index, args.blinding_bits, ballot, result
+            ):
+                result.counted += 1
+
+    offsets = arrival_times(args.curve, voters, args.duration)
+    await asyncio.gather(*(arrive(i, offset) for i, offset in enumerate(offsets)))
+    return result.summary(time.perf_counter() - start)
+
+
+def run_local(args):
+    public_key, private_key = benchmark_keys(args.bits)
+    env = {
+        "COURSE_NAME": "Load test",
+        "VOTING_STUDENTS": ",".join(f"student{i}" for i in range(args.voters)),
+        "CANDIDATES": args.candidates,
+        "JOURNAL_DIR": "",
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = benchmark_workdir(directory, public_key, private_key)
+        server = start_server(env, workers=args.workers, port=PORT, cwd=workdir)
+        try:
+            return asyncio.run(drive("127.0.0.1", PORT, args))
+        finally:
+            stop_server(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--curve", choices=CURVES, default="burst")
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="arrival window in seconds"
+    )
+    parser.add_argument(
+        "--bits", type=int, default=14, help="key size: 14 (demo), 2048, 3072, 4096"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="server workers")
+    parser.add_argument(
+        "--env",
+        nargs="*",
+        default=[],
+        metavar="NAME=VALUE",
+        help="extra environment for the server, e.g. CRYPTO_EXECUTOR=inline",
+    )
+    parser.add_argument(
+        "--blinding-bits",
+        type=int,
+        default=64,
+        help="size of the client's blinding factor (the browser uses a small r)",
+    )
+    parser.add_argument("--candidates", default="A,B", help="comma separated")
+    parser.add_argument("--url", help="load this server instead of starting one")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        summary = asyncio.run(drive(url.hostname, url.port or 80, args))
+    else:
+        summary = run_local(args)
+
+    rows = [
+        (
+            path,
+            stats["requests"],
+            stats["errors"],
+            f"{stats['p50_ms']:.1f}",
+            f"{stats['p95_ms']:.1f}",
+            f"{stats['p99_ms']:.1f}",
+        )
+        for path, stats in summary["endpoints"].items()
+    ]
+    print_table(["endpoint", "requests", "errors", "p50 ms", "p95 ms", "p99 ms"], rows)
+    print(
+        f"\n{summary['counted']}/{args.voters} votes counted "
+        f"({summary['already_cast']} already cast) in "
+        f"{summary['elapsed_s']:.2f} s: {summary['voters_per_s']:,.1f} voters/s, "
+        f"{summary['requests_per_s']:,.1f} requests/s"
+    )
+
+    if args.json:
+        config = {k: v for k, v in vars(args).items() if k != "json"}
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "results": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""/submit-vote throughput with logging disabled, sampled and fully enabled.
+
+First measures the cost of one SignatureVerifier.verify call in process: with
+debug logging off, with the queue-based logging of app.utils.logs, and with a
+synchronous handler writing every record from the calling thread, which is what
+the former print() calls in verify_signature amounted to. Both are measured
+writing to /dev/null and to a stream that stalls on every write, like a full
+stdout pipe or a slow log collector. On a single core the queue does not make
+logging cheaper, it keeps a stalled stream from stalling the caller.
+
+Then starts the app once per logging configuration and lets concurrent clients
+submit pre-signed ballots. The server's log output goes to a temporary file so
+the terminal does not become the bottleneck. With the demo key some ballots
+hash to the same signature and are rejected as "already cast"; they are logged
+and timed like the others.
+
+    python -m benchmarks.bench_logging --ballots 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from app.utils.crypto import SignatureVerifier, hash_to_int
+from app.utils.logs import StructuredFormatter, configure_logging
+from benchmarks.common import (
+    HttpClient,
+    benchmark_keys,
+    benchmark_workdir,
+    print_table,
+    start_server,
+    stop_server,
+    time_per_op,
+)
+
+PORT = 8804
+
+# Seconds every write to the stalling stream blocks
+STALL_SECONDS = 0.0001
+
+# (name, server environment)
+CONFIGURATIONS = [
+    ("off", {"LOG_LEVEL": "WARNING"}),
+    ("info", {"LOG_LEVEL": "INFO"}),
+    ("debug 1/100", {"LOG_LEVEL": "DEBUG", "LOG_DEBUG_SAMPLE": "100"}),
+    ("debug", {"LOG_LEVEL": "DEBUG"}),
+]
+
+
+def signed_ballots(public_key, private_key, count):
+    """(message, signature) pairs, signed directly with the private key"""
+    p, x = public_key["p"], private_key["x"]
+    return [
+        (f"A#{i}", pow(hash_to_int(f"A#{i}", p), x, p)) for i in range(count)
+    ]
+
+
+class StallingStream:
+    """Text stream that blocks for STALL_SECONDS on every write"""
+
+    def write(self, text):
+        time.sleep(STALL_SECONDS)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def bench_in_process(bits, ops, stream):
+    """Seconds per cached verify call for each logging setup
+
+    Returns:
+        list: (setup, seconds per call)
+    """
+    public_key, private_key = benchmark_keys(bits)
+    ballots = signed_ballots(public_key, private_key, 64)
+    logger = logging.getLogger("app")
+    results = []
+
+    def run():
+        verifier = SignatureVerifier(private_key)
+        for message, signature in ballots:
+            verifier.verify(message, signature)
+        return time_per_op(lambda i: verifier.verify(*ballots[i % 64]), ops)
+
+    runtime = configure_logging(level="WARNING", stream=stream)
+    results.append(("off", run()))
+    runtime.stop()
+
+    # The queue holds every record, so none are dropped during the measurement
+    runtime = configure_logging(
+        level="DEBUG", stream=stream, queue_size=ops + len(ballots)
+    )
+    results.append(("queued", run()))
+    runtime.stop()
+
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(StructuredFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    try:
+        results.append(("synchronous", run()))
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.WARNING)
+    return results
+
+
+async def submit_all(ballots, concurrency):
+    pending = list(range(len(ballots)))
+
+    async def client_loop():
+        client = HttpClient("127.0.0.1", PORT)
+        try:
+            while pending:
+                message, signature = ballots[pending.pop()]
+                await client.request(
+                    "POST",
+                    "/submit-vote",
+                    {"vote": message, "signature": str(signature), "candidate": "A"},
+                )
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def bench_server(bits, ballot_count, concurrency):
+    """(configuration, ballots per second, log bytes written)"""
+    public_key, private_key = benchmark_keys(bits)
+    ballots = signed_ballots(public_key, private_key, ballot_count)
+    rows = []
+    for name, log_env in CONFIGURATIONS:
+        env = {
+            "COURSE_NAME": "Logging benchmark",
+            "VOTING_STUDENTS": "student0",
+            "CANDIDATES": "A,B",
+            "JOURNAL_DIR": "",
+            **log_env,
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            workdir = benchmark_workdir(directory, public_key, private_key)
+            log_path = os.path.join(directory, "server.log")
+            with open(log_path, "w") as log_file:
+                server = start_server(env, port=PORT, cwd=workdir, stderr=log_file)
+                try:
+                    elapsed = asyncio.run(submit_all(ballots, concurrency))
+                finally:
+                    stop_server(server)
+            rows.append((name, ballot_count / elapsed, os.path.getsize(log_path)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ballots", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--bits", type=int, default=14, help="key size: 14 (demo), 2048, 3072, 4096"
+    )
+    parser.add_argument("--ops", type=int, default=50_000, help="in-process calls")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        fast = bench_in_process(args.bits, args.ops, devnull)
+    stalled = bench_in_process(args.bits, args.ops // 10, StallingStream())
+    rows = [
+        (name, f"{fast_s * 1e6:.2f}", f"{stalled_s * 1e6:.2f}")
+        for (name, fast_s), (_, stalled_s) in zip(fast, stalled)
+    ]
+    print("SignatureVerifier.verify, cached, us per call")
+    print_table(["logging", "/dev/null", "stalling stream"], rows)
+
+    rows = [
+        (name, f"{rate:,.0f}", f"{size / 1024:,.0f}")
+        for name, rate, size in bench_server(args.bits, args.ballots, args.concurrency)
+    ]
+    print()
+    print(f"/submit-vote, {args.ballots} ballots, concurrency {args.concurrency}")
+    print_table(["logging", "ballots/s", "log KiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Safe-prime parameter generation time per key size.
+
+Generates safe primes with the sieved search, in a process pool and in a single
+process, and compares small sizes with a naive search (random odd candidates,
+Miller-Rabin on q and p, no sieve). Also shows what startup pays once the
+parameters are cached or when a standard RFC 3526/7919 group is used. Generation
+time varies a lot between runs, so several runs are averaged.
+
+    python -m benchmarks.bench_params --bits 256 512 1024 --runs 3
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from app.utils.groups import generate_safe_prime, is_probable_prime, load_group
+from benchmarks.common import print_table
+
+
+def naive_safe_prime(bits):
+    while True:
+        q = random.getrandbits(bits - 1) | (1 << (bits - 2)) | 1
+        if is_probable_prime(q) and is_probable_prime(2 * q + 1):
+            return 2 * q + 1
+
+
+def timed_runs(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sum(times) / runs, min(times), max(times)
+
+
+def cached_load_ms(bits):
+    with tempfile.TemporaryDirectory() as directory:
+        load_group(bits, "generate", directory)
+        start = time.perf_counter()
+        load_group(bits, "generate", directory)
+        return (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bits", type=int, nargs="+", default=[256, 512, 768, 1024])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="pool size")
+    parser.add_argument(
+        "--naive-max-bits",
+        type=int,
+        default=384,
+        help="largest size for the naive baseline",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for bits in args.bits:
+        pool = timed_runs(lambda: generate_safe_prime(bits, args.workers), args.runs)
+        single = timed_runs(lambda: generate_safe_prime(bits, workers=0), args.runs)
+        if bits <= args.naive_max_bits:
+            naive = f"{timed_runs(lambda: naive_safe_prime(bits), args.runs)[0]:.2f}"
+        else:
+            naive = "-"
+        rows.append(
+            (
+                bits,
+                f"{pool[0]:.2f}",
+                f"{pool[1]:.2f}-{pool[2]:.2f}",
+                f"{single[0]:.2f}",
+                naive,
+                f"{cached_load_ms(bits):.2f}",
+            )
+        )
+    print("Safe-prime generation, seconds")
+    print_table(
+        ["bits", "pool mean", "pool min-max", "1 process", "naive", "cached ms"],
+        rows,
+    )
+
+    rows = []
+    for family in ("ffdhe", "modp"):
+        for bits in (2048, 3072, 4096):
+            start = time.perf_counter()
+            group = load_group(bits, family)
+            rows.append((group["name"], f"{(time.perf_counter() - start) * 1e3:.3f}"))
+    print()
+    print("Standard groups")
+    print_table(["group", "load ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Eligibility check latency of /sign-ballot as the roster grows.
+
+Compares the VoterRegistry against the previous list based checks
+(``student_id not in VOTING_STUDENTS`` / ``student_id in voted_students``).
+
+    python -m benchmarks.bench_registry
+"""
+import argparse
+import random
+
+from app.utils.registry import VoterRegistry
+from benchmarks.common import print_table, time_per_op
+
+ROSTER_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def bench_registry(size, ops):
+    roster = [f"student{i}" for i in range(size)]
+    registry = VoterRegistry(roster)
+    # Half eligible students, half unknown ids
+    ids = [
+        roster[random.randrange(size)] if i % 2 else f"unknown{i}" for i in range(ops)
+    ]
+    return time_per_op(lambda i: registry.try_mark(ids[i]), ops)
+
+
+def bench_list(size, ops):
+    roster = [f"student{i}" for i in range(size)]
+    voted = roster[: size // 2]
+    ids = [roster[random.randrange(size)] for _ in range(ops)]
+
+    def check(i):
+        student_id = ids[i]
+        if student_id not in roster:
+            return
+        if student_id in voted:
+            return
+        voted.append(student_id)
+
+    return time_per_op(check, ops)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=100_000)
+    parser.add_argument(
+        "--list-ops",
+        type=int,
+        default=200,
+        help="operations for the list baseline (it is O(n), keep this small)",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for size in ROSTER_SIZES:
+        registry_us = bench_registry(size, args.ops) * 1e6
+        list_us = bench_list(size, args.list_ops) * 1e6
+        rows.append((size, f"{registry_us:.3f}", f"{list_us:.1f}"))
+
+    print_table(["roster", "registry us/op", "list us/op"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Loading a large voter roster: streamed import and binary cache vs. a set.
+
+Generates a CSV roster of --rows rows (mixed case, surrounding spaces and
+about 10 % duplicates) and compares:
+
+- stream: roster.load without a cache, i.e. streamed parsing, external sort in
+  chunks and writing the binary cache
+- cached: roster.load again, memory-mapping the cache
+- set: reading the whole file, splitting it and building a set of normalized
+  ids and a dict of slots, as VoterRegistry did before
+
+For each it reports the load time, the peak Python memory during the load
+(tracemalloc, measured in a separate pass), the memory the roster keeps and
+the time per eligibility lookup.
+
+    python -m benchmarks.bench_roster --rows 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from app.utils import roster
+from app.utils.roster import normalize_id
+from benchmarks.common import print_table, time_per_op
+
+
+def write_roster(path, rows):
+    """CSV with a header and rows * 0.9 distinct ids, return the distinct count"""
+    distinct = max(1, int(rows * 0.9))
+    with open(path, "w") as f:
+        f.write("name,student_id\n")
+        for i in range(rows):
+            number = i if i < distinct else random.randrange(distinct)
+            student_id = f"Student{number:08d}"
+            if number % 2:
+                student_id = f" {student_id.lower()}"
+            f.write(f"Person {number},{student_id}\n")
+    return distinct
+
+
+def load_set(path):
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().split("\n")[1:]
+    students = {normalize_id(line.split(",")[1]) for line in lines if line}
+    slots = {student_id: slot for slot, student_id in enumerate(students)}
+    return students, slots
+
+
+def measure(load):
+    """(seconds, peak MB, retained MB, result) of load()"""
+    start = time.perf_counter()
+    result = load()
+    seconds = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6, retained / 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=roster.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "students.csv")
+        distinct = write_roster(path, args.rows)
+        cache_dir = os.path.join(directory, "cache")
+        ids = [
+            f"student{random.randrange(distinct):08d}" if i % 2 else f"unknown{i}"
+            for i in range(args.lookups)
+        ]
+
+        def stream():
+            for name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else []:
+                os.unlink(os.path.join(cache_dir, name))
+            students, cached = roster.load(path, cache_dir, chunk_size=args.chunk_size)
+            assert not cached
+            return students
+
+        def cached():
+            students, cached = roster.load(path, cache_dir)
+            assert cached
+            return students
+
+        rows = []
+        for name, load in [("stream", stream), ("cached", cached)]:
+            seconds, peak, retained, students = measure(load)
+            assert len(students) == distinct
+            lookup = time_per_op(lambda i: students.index(ids[i]), args.lookups)
+            students.close()
+            rows.append((name, seconds, peak, retained, lookup))
+
+        seconds, peak, retained, (students, slots) = measure(lambda: load_set(path))
+        assert len(students) == distinct
+        lookup = time_per_op(lambda i: slots.get(ids[i]), args.lookups)
+        rows.append(("set", seconds, peak, retained, lookup))
+
+    print(f"{args.rows} rows, {distinct} distinct ids")
+    print_table(
+        ["load", "seconds", "peak MB", "retained MB", "lookup us"],
+        [
+            (name, f"{s:.2f}", f"{p:.1f}", f"{r:.1f}", f"{t * 1e6:.2f}")
+            for name, s, p, r, t in rows
+        ],
+    )
+    print("The cached roster is memory-mapped; its pages are not counted above.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Double-vote detection cost in /submit-vote as the number of cast ballots grows.
+
+Fills a SpentSignatureStore with N distinct signatures, then measures fresh and
+duplicate submissions. The previous implementation scanned ``cast_votes`` on
+every submission and is measured on a small sample for comparison.
+
+    python -m benchmarks.bench_spent
+"""
+import argparse
+import random
+
+from app.utils.spent import SpentSignatureStore
+from benchmarks.common import print_table, time_per_op
+
+BALLOT_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+
+# Signatures of a 2048-bit group, as the decimal strings clients submit
+SIGNATURE_BITS = 2048
+
+
+def random_signatures(count):
+    return [str(random.getrandbits(SIGNATURE_BITS)) for _ in range(count)]
+
+
+def bench_store(count, ops):
+    store = SpentSignatureStore()
+    signatures = random_signatures(count)
+    for signature in signatures:
+        store.add(signature)
+
+    existing = random.sample(signatures, min(ops, count))
+    fresh = random_signatures(ops)
+    fresh_s = time_per_op(lambda i: store.add(fresh[i]), ops)
+    duplicate_s = time_per_op(lambda i: store.add(existing[i]), len(existing))
+    return fresh_s, duplicate_s
+
+
+def bench_scan(count, ops):
+    cast_votes = [{"vote": "A", "signature": s} for s in random_signatures(count)]
+    fresh = random_signatures(ops)
+
+    def submit(i):
+        for cast_vote in cast_votes:
+            if cast_vote["signature"] == fresh[i]:
+                return
+        cast_votes.append({"vote": "A", "signature": fresh[i]})
+
+    return time_per_op(submit, ops)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument(
+        "--scan-ops",
+        type=int,
+        default=20,
+        help="submissions for the linear scan baseline (it is O(n), keep this small)",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for count in BALLOT_COUNTS:
+        fresh_s, duplicate_s = bench_store(count, args.ops)
+        scan_s = bench_scan(count, args.scan_ops)
+        rows.append(
+            (
+                count,
+                f"{fresh_s * 1e6:.2f}",
+                f"{duplicate_s * 1e6:.2f}",
+                f"{scan_s * 1e6:.0f}",
+                f"{1 / fresh_s:,.0f}",
+            )
+        )
+
+    print_table(
+        ["ballots", "fresh us/op", "duplicate us/op", "scan us/op", "store ops/s"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
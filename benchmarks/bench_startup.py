@@ -0,0 +1,150 @@
+"""Cold start: time until the app answers, is ready, and signs its first ballot.
+
+Starts a single uvicorn process with an existing key (a restart, not the very
+first start) and polls it from the moment the process is spawned:
+
+- import: importing app.main alone, in a separate interpreter
+- answering: first HTTP response to /healthz (any status)
+- ready: first 200 from /readyz; servers without /readyz count as ready when
+  they first answer
+- first sign: latency of the first /sign-ballot after that, which pays for
+  anything not warmed up, e.g. forking the crypto process pool
+
+Every measurement is the median of --runs starts. Run it from another checkout
+to compare versions.
+
+    python -m benchmarks.bench_startup --bits 2048 --students 10000 --runs 5
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from app.utils.crypto import hash_to_int
+from benchmarks.common import benchmark_keys, benchmark_workdir, print_table
+
+PORT = 8806
+
+
+def http_status(method, path, body=None):
+    """Status code of a request, or None if nothing answered"""
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{PORT}{path}",
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={"Content-Type": "application/json"},
+        method=method,
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def measure_import(env, workdir):
+    code = "import time; t = time.perf_counter(); import app.main; "
+    code += "print(time.perf_counter() - t)"
+    output = subprocess.check_output(
+        [sys.executable, "-c", code], env={**os.environ, **env}, cwd=workdir
+    )
+    return float(output.decode().split()[-1])
+
+
+def measure_start(env, workdir, blinded):
+    """Spawn the server and return (answering, ready, first sign) in seconds"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(PORT), "--log-level", "warning",
+        ],
+        env={**os.environ, **env},
+        cwd=workdir,
+        start_new_session=True,
+    )
+    try:
+        answering = ready = None
+        while ready is None:
+            if process.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+            status = http_status("GET", "/readyz")
+            now = time.perf_counter() - start
+            if status is not None and answering is None:
+                answering = now
+            if status in (200, 404):
+                ready = now
+            else:
+                time.sleep(0.005)
+
+        sign_start = time.perf_counter()
+        status = http_status(
+            "POST",
+            "/sign-ballot",
+            {"student_id": "student0", "blinded_ballot": str(blinded)},
+        )
+        if status != 200:
+            raise RuntimeError(f"/sign-ballot answered {status}")
+        return answering, ready, time.perf_counter() - sign_start
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--bits", type=int, default=2048, help="key size: 14 (demo), 2048, 3072, 4096"
+    )
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    public_key, private_key = benchmark_keys(args.bits)
+    blinded = hash_to_int("A#0", public_key["p"])
+    env = {
+        "COURSE_NAME": "Startup benchmark",
+        "VOTING_STUDENTS": ",".join(f"student{i}" for i in range(args.students)),
+        "CANDIDATES": "A,B",
+        "JOURNAL_DIR": "",
+        "LOG_LEVEL": "WARNING",
+    }
+    samples = {"import": [], "answering": [], "ready": [], "first sign": []}
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = benchmark_workdir(directory, public_key, private_key)
+        for _ in range(args.runs):
+            samples["import"].append(measure_import(env, workdir))
+            answering, ready, first_sign = measure_start(env, workdir, blinded)
+            samples["answering"].append(answering)
+            samples["ready"].append(ready)
+            samples["first sign"].append(first_sign)
+
+    print(f"{args.bits}-bit key, {args.students} students, median of {args.runs}")
+    print_table(
+        ["phase", "median ms", "min ms", "max ms"],
+        [
+            (
+                phase,
+                f"{statistics.median(values) * 1e3:.0f}",
+                f"{min(values) * 1e3:.0f}",
+                f"{max(values) * 1e3:.0f}",
+            )
+            for phase, values in samples.items()
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Signature verification and fixed-base exponentiation throughput.
+
+Verifies unblinded signatures for the toy demo key (p = 9973) and a 2048-bit
+MODP group: with the plain verify_signature function, with SignatureVerifier
+when every ballot has a new message (cold) and when ballots repeat a few
+already cached messages, e.g. one per candidate. Also compares g^r / y^r with the precomputed
+fixed-base tables against pow(), as used for blinding, unblinding and DH.
+
+    python -m benchmarks.bench_verify
+"""
+import argparse
+import random
+import time
+
+from app.utils.crypto import (
+    FixedBaseTable,
+    SignatureVerifier,
+    hash_to_int,
+    precompute_key_tables,
+    verify_signature,
+)
+from benchmarks.common import benchmark_keys, print_table, time_per_op
+
+KEY_SIZES = [14, 2048]
+
+
+def signed_ballots(private_key, messages):
+    p, x = private_key["p"], private_key["x"]
+    return [(m, pow(hash_to_int(m, p), x, p)) for m in messages]
+
+
+def bench_verification(bits, ops, candidates):
+    public_key, private_key = benchmark_keys(bits)
+
+    unique = signed_ballots(private_key, [f"ballot-{i}" for i in range(ops)])
+    repeated = signed_ballots(private_key, [f"candidate-{i}" for i in range(candidates)])
+
+    plain_s = time_per_op(
+        lambda i: verify_signature(unique[i][0], unique[i][1], private_key), ops
+    )
+
+    verifier = SignatureVerifier(private_key, cache_size=ops)
+    cold_s = time_per_op(lambda i: verifier.verify(*unique[i]), ops)
+
+    verifier = SignatureVerifier(private_key)
+    for ballot in repeated:
+        verifier.verify(*ballot)
+    cached_s = time_per_op(
+        lambda i: verifier.verify(*repeated[i % candidates]), ops
+    )
+    return plain_s, cold_s, cached_s
+
+
+def bench_fixed_base(bits, ops):
+    public_key, _ = benchmark_keys(bits)
+    p, g = public_key["p"], public_key["g"]
+
+    start = time.perf_counter()
+    tables = precompute_key_tables(public_key)
+    build_s = time.perf_counter() - start
+
+    exponents = [random.randint(2, p - 2) for _ in range(ops)]
+    pow_s = time_per_op(lambda i: pow(g, exponents[i], p), ops)
+    table_s = time_per_op(lambda i: tables["g"].pow(exponents[i]), ops)
+    return build_s, pow_s, table_s
+
+
+def table_size(bits):
+    public_key, _ = benchmark_keys(bits)
+    table = FixedBaseTable(public_key["g"], public_key["p"])
+    entries = sum(len(row) for row in table._rows)
+    return entries * ((public_key["p"].bit_length() + 7) // 8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument(
+        "--toy-ops",
+        type=int,
+        default=50_000,
+        help="iterations for the 14-bit demo key",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=5,
+        help="distinct messages in the cached run",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for bits in KEY_SIZES:
+        ops = args.toy_ops if bits < 1024 else args.ops
+        plain_s, cold_s, cached_s = bench_verification(bits, ops, args.candidates)
+        rows.append(
+            (
+                bits,
+                f"{1 / plain_s:,.0f}",
+                f"{1 / cold_s:,.0f}",
+                f"{1 / cached_s:,.0f}",
+            )
+        )
+    print("Verifications per second")
+    print_table(["bits", "verify_signature", "verifier cold", "verifier cached"], rows)
+
+    rows = []
+    for bits in KEY_SIZES:
+        ops = args.toy_ops if bits < 1024 else args.ops
+        build_s, pow_s, table_s = bench_fixed_base(bits, ops)
+        rows.append(
+            (
+                bits,
+                f"{build_s * 1e3:.1f}",
+                f"{table_size(bits) / 1024:,.0f}",
+                f"{pow_s * 1e6:,.1f}",
+                f"{table_s * 1e6:,.1f}",
+                f"{pow_s / table_s:.1f}x",
+            )
+        )
+    print()
+    print("Fixed-base g^r (tables for g and y)")
+    print_table(
+        ["bits", "build ms (g+y)", "KiB/table", "pow us", "table us", "speedup"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Decimal vs base64url wire encoding of ballot numbers, by key size.
+
+For numbers below p of --bits bits, measures encoding and decoding of one
+field in both formats, parsing a whole /sign-ballot request body with it, the
+size of the field, and how long it takes to refuse a field of --oversized
+characters (a decimal string of that length would take seconds to convert
+without the length check).
+
+    python -m benchmarks.bench_wire --bits 2048 3072 4096 8192
+"""
+import argparse
+import json
+import random
+
+from app.utils.wire import IntCodec
+from benchmarks.common import print_table, time_per_op
+
+
+def body(codec, number, binary):
+    return json.dumps(
+        {"student_id": "student1", "blinded_ballot": codec.encode(number, binary)}
+    )
+
+
+def refuse_time(codec, value, binary, iterations):
+    def refuse(_):
+        try:
+            codec.decode(value, binary)
+        except ValueError:
+            pass
+
+    return time_per_op(refuse, iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bits", type=int, nargs="+", default=[2048, 3072, 4096])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--oversized", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = []
+    for bits in args.bits:
+        p = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+        codec = IntCodec(p)
+        numbers = [random.randrange(p) for _ in range(64)]
+        for name, binary in [("decimal", False), ("base64url", True)]:
+            fields = [codec.encode(n, binary) for n in numbers]
+            bodies = [body(codec, n, binary) for n in numbers]
+            encode = time_per_op(
+                lambda i: codec.encode(numbers[i % 64], binary), args.iterations
+            )
+            decode = time_per_op(
+                lambda i: codec.decode(fields[i % 64], binary), args.iterations
+            )
+            parse = time_per_op(
+                lambda i: codec.decode(
+                    json.loads(bodies[i % 64])["blinded_ballot"], binary
+                ),
+                args.iterations,
+            )
+            oversized = ("9" if not binary else "A") * args.oversized
+            refuse = refuse_time(codec, oversized, binary, args.iterations)
+            rows.append(
+                (
+                    bits,
+                    name,
+                    max(len(f) for f in fields),
+                    f"{encode * 1e6:.2f}",
+                    f"{decode * 1e6:.2f}",
+                    f"{parse * 1e6:.2f}",
+                    f"{refuse * 1e6:.2f}",
+                )
+            )
+
+    print_table(
+        [
+            "bits", "format", "chars", "encode µs", "decode µs", "request µs",
+            "refuse µs",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Multi-worker throughput of /sign-ballot + /submit-vote per state backend.
+
+Starts the app under gunicorn with 1..N uvicorn workers against each shared
+backend (the memory backend only runs with one worker) and lets concurrent
+voters run the signing and voting steps.
+
+    python -m benchmarks.bench_workers --voters 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.utils.crypto import blind_message, unblind_signature
+from app.utils.resp import RespClient
+from benchmarks.common import HttpClient, print_table, start_server, stop_server
+
+PORT = 8800
+KV_PORT = 6390
+
+
+async def vote(client, public_key, student_id, index):
+    """Run the signing and voting steps for one voter, return True if counted"""
+    message = f"A#{index}"
+    r = random.randint(2, public_key["p"] - 2)
+    blinded, _ = blind_message(message, r, public_key)
+
+    status, _, body = await client.request(
+        "POST",
+        "/sign-ballot",
+        {"student_id": student_id, "blinded_ballot": str(blinded)},
+    )
+    if status != 200:
+        return False
+    blind_signature = int(json.loads(body)["blind_signature"])
+    signature = unblind_signature(blind_signature, r, public_key)
+
+    status, _, _ = await client.request(
+        "POST",
+        "/submit-vote",
+        {"vote": message, "signature": str(signature), "candidate": "A"},
+    )
+    return status == 200
+
+
+async def drive(voters, concurrency):
+    client = HttpClient("127.0.0.1", PORT)
+    _, _, body = await client.request("POST", "/get-public-key")
+    public_key = json.loads(body)["public_key"]
+    await client.close()
+
+    pending = list(range(voters))
+    accepted = 0
+
+    async def user():
+        nonlocal accepted
+        client = HttpClient("127.0.0.1", PORT)
+        while pending:
+            index = pending.pop()
+            counted = await vote(client, public_key, f"student{index}", index)
+            accepted += counted
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return time.perf_counter() - start, accepted
+
+
+def run(backend, workers, voters, concurrency, directory):
+    env = {
+        "COURSE_NAME": "Benchmark",
+        "VOTING_STUDENTS": ",".join(f"student{i}" for i in range(voters)),
+        "CANDIDATES": "A,B",
+        "STATE_BACKEND": backend,
+        "JOURNAL_DIR": os.path.join(directory, "journal"),
+        "STATE_SQLITE_PATH": os.path.join(directory, "election.db"),
+        "STATE_REDIS_URL": f"redis://127.0.0.1:{KV_PORT}/0",
+    }
+    server = start_server(env, workers=workers, port=PORT)
+    try:
+        return asyncio.run(drive(voters, concurrency))
+    finally:
+        stop_server(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts"
+    )
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite", "redis"])
+    args = parser.parse_args()
+
+    kvserver = None
+    if "redis" in args.backends:
+        # Local stand-in, point STATE_REDIS_URL at a real server to compare
+        kvserver = subprocess.Popen(
+            [sys.executable, "-m", "app.utils.kvserver", "--port", str(KV_PORT)],
+            stdout=subprocess.DEVNULL,
+        )
+        time.sleep(1)
+
+    rows = []
+    try:
+        for backend in args.backends:
+            for workers in args.workers:
+                if backend == "memory" and workers > 1:
+                    continue
+                with tempfile.TemporaryDirectory() as directory:
+                    if backend == "redis":
+                        # Fresh keyspace per run
+                        asyncio.run(RespClient(port=KV_PORT).execute("FLUSHDB"))
+                    elapsed, accepted = run(
+                        backend, workers, args.voters, args.concurrency, directory
+                    )
+                rows.append(
+                    (
+                        backend,
+                        workers,
+                        args.voters,
+                        accepted,
+                        f"{elapsed:.2f}",
+                        f"{args.voters / elapsed:,.0f}",
+                    )
+                )
+    finally:
+        if kvserver is not None:
+            kvserver.terminate()
+
+    print_table(
+        ["backend", "workers", "voters", "counted", "seconds", "voters/s"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from app.utils.crypto import generate_keys
+from app.utils.groups import standard_group
+
+
+def time_per_op(fn, iterations):
+    """Run fn(i) for i in range(iterations) and return the mean time per call
+
+    Args:
+        fn: Callable taking the iteration index
+        iterations: Number of calls
+
+    Returns:
+        float: Seconds per call
+    """
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return (time.perf_counter() - start) / iterations
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def print_table(headers, rows):
+    """Print rows as a simple fixed-width table"""
+    widths = [
+        max(len(str(h)), *(len(str(row[i])) for row in rows)) if rows else len(str(h))
+        for i, h in enumerate(headers)
+    ]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).rjust(w) for v, w in zip(row, widths)))
+
+
+class HttpClient:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams.
+
+    Avoids a dependency on an async HTTP library for the load benchmarks. One
+    instance is one connection, so use one client per simulated user.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Send a request and read the full response
+
+        Args:
+            method: HTTP method
+            path: Request path including the query string
+            body: dict sent as JSON, or bytes sent as is
+            headers: Extra request headers
+
+        Returns:
+            tuple: (status code, response headers dict, response body bytes)
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        body = body or b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        lines.append(f"Content-Length: {len(body)}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            # Server closed the idle connection, retry on a fresh one
+            await self.close()
+            return await self.request(method, path, body, headers)
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            data = b"".join(chunks)
+        else:
+            length = int(response_headers.get("content-length", 0))
+            data = await self._reader.readexactly(length) if length else b""
+
+        if response_headers.get("connection") == "close":
+            await self.close()
+        return status, response_headers, data
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def start_server(
+    env,
+    workers=1,
+    port=8800,
+    worker_class="uvicorn.workers.UvicornWorker",
+    cwd=None,
+    stderr=None,
+):
+    """Start the app with gunicorn in a subprocess and wait until it is ready
+
+    Args:
+        env: Extra environment variables (COURSE_NAME, VOTING_STUDENTS, ...)
+        workers: Number of worker processes
+        port: Port to bind on localhost
+        cwd: Working directory (default: current), see benchmark_workdir
+        stderr: File for the server's log output (default: inherited)
+
+    Returns:
+        subprocess.Popen: The server process, stop it with stop_server
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "app.main:app",
+            "-k", worker_class,
+            "-w", str(workers),
+            "-b", f"127.0.0.1:{port}",
+            "--log-level", "warning",
+        ],
+        env={**os.environ, **env},
+        cwd=cwd,
+        stderr=stderr,
+        # Own process group, so stop_server also reaches workers and their pools
+        start_new_session=True,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=1):
+                return process
+        except urllib.error.HTTPError:
+            # 503 while the app warms up
+            pass
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+        time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError("Server did not start within 60 seconds")
+
+
+def benchmark_workdir(directory, public_key, private_key):
+    """Prepare directory as working directory for a server with the given keys
+
+    The app reads data/keys.json and app/ relative to its working directory, so
+    this links app/ and writes the keys there instead of touching the real data
+    directory.
+
+    Returns:
+        str: directory, for start_server(cwd=...)
+    """
+    os.symlink(os.path.abspath("app"), os.path.join(directory, "app"))
+    os.makedirs(os.path.join(directory, "data"))
+    with open(os.path.join(directory, "data", "keys.json"), "w") as f:
+        json.dump({"public_key": public_key, "private_key": private_key}, f)
+    return directory
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        pass
+    # Workers still busy with a backlog would keep the port and the CPU
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def benchmark_keys(bits):
+    """Key pair for benchmarks: the toy demo group or an RFC 3526 MODP group
+
+    Args:
+        bits: 14 for the demo key (p = 9973), or 2048, 3072 or 4096
+
+    Returns:
+        tuple: (public_key, private_key) in the format of generate_keys
+    """
+    if bits == 14:
+        return generate_keys()
+    group = standard_group("modp", bits)
+    if group is None:
+        raise ValueError(f"No benchmark group with {bits} bits")
+    return generate_keys(group)